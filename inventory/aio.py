@@ -0,0 +1,35 @@
+"""ตัวช่วยสำหรับ view แบบ async (ASGI)
+
+ORM แบบ async ของ Django (aget, aaggregate, ...) ส่งทุก query ไปทำใน thread
+เดียวกันทีละคำสั่ง asyncio.gather บน query เหล่านั้นจึงไม่ได้ทำพร้อมกันจริง
+gather() ในไฟล์นี้ส่งฟังก์ชันแบบ sync แต่ละตัวไปทำใน thread ของตัวเอง
+(thread_sensitive=False) ซึ่งมี connection ฐานข้อมูลแยกกัน query ที่ไม่ขึ้นต่อกัน
+จึงทำงานพร้อมกันได้
+
+ใช้ได้เฉพาะการอ่านข้อมูลที่ commit แล้ว (แต่ละ thread อยู่คนละ transaction)
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _isolated(func):
+    def run():
+        try:
+            return func()
+        finally:
+            # ปิดหรือเก็บ connection ของ thread นี้ไว้ตาม CONN_MAX_AGE เหมือนตอนจบ request
+            close_old_connections()
+    return run
+
+
+async def gather(*funcs):
+    """เรียกฟังก์ชัน (ไม่มีอาร์กิวเมนต์) พร้อมกัน คืนผลลัพธ์ตามลำดับ"""
+    return await asyncio.gather(*(sync_to_async(_isolated(func), thread_sensitive=False)() for func in funcs))
+
+
+async def gather_dict(funcs):
+    """เหมือน gather() แต่รับ/คืนเป็น dict {ชื่อ: ฟังก์ชัน} -> {ชื่อ: ผลลัพธ์}"""
+    names = list(funcs)
+    return dict(zip(names, await gather(*(funcs[name] for name in names))))
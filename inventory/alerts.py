@@ -0,0 +1,89 @@
+"""อีเมลสรุปสินค้าสต็อกต่ำ (ส่งเป็นรอบ เช่น cron ทุกชั่วโมง)
+
+สถานะสต็อกต่ำถูกดูแลตอนสต็อกเปลี่ยน (Product.low_stock_since) แต่ละรอบจึงอ่าน
+เฉพาะสินค้าที่เพิ่งต่ำและยังไม่เคยแจ้ง (ผ่าน partial index) จัดกลุ่มตาม
+ผู้จัดจำหน่ายของใบสั่งซื้อล่าสุดของสินค้า แล้วส่งอีเมลฉบับเดียวต่อรอบ
+สินค้าจะถูกแจ้งอีกครั้งเมื่อสต็อกกลับมาพอแล้วต่ำลงใหม่
+"""
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+NO_SUPPLIER = 'ไม่มีประวัติการสั่งซื้อ'
+
+
+def pending():
+    """สินค้าที่เพิ่งต่ำและยังไม่ได้แจ้ง คืน [(ผู้จัดจำหน่ายหรือ None, [สินค้า, ...]), ...]"""
+    from .models import Product, PurchaseItem, Supplier
+
+    last_supplier = PurchaseItem.objects.filter(product=OuterRef('pk')).exclude(
+        purchase__status='cancelled',
+    ).order_by('-purchase__purchase_date').values('purchase__supplier')[:1]
+    products = Product.objects.filter(
+        low_stock_since__isnull=False, low_stock_alerted=False,
+    ).annotate(supplier_id=Subquery(last_supplier)).order_by('name')
+
+    groups = {}
+    for product in products:
+        groups.setdefault(product.supplier_id, []).append(product)
+    suppliers = Supplier.objects.in_bulk([pk for pk in groups if pk is not None])
+    return sorted(
+        ((suppliers.get(pk), items) for pk, items in groups.items()),
+        key=lambda group: (group[0] is None, group[0].name if group[0] else ''),
+    )
+
+
+def recipients():
+    """LOW_STOCK_ALERT_EMAILS หรืออีเมลของผู้ดูแลระบบ (superuser)"""
+    from django.contrib.auth.models import User
+
+    return list(settings.LOW_STOCK_ALERT_EMAILS) or list(
+        User.objects.filter(is_superuser=True, is_active=True).exclude(email='').values_list('email', flat=True)
+    )
+
+
+def render(groups):
+    """เนื้อหาอีเมล (ข้อความธรรมดา)"""
+    count = sum(len(items) for _, items in groups)
+    lines = [f'สินค้าสต็อกต่ำ {count} รายการ ณ {timezone.localtime():%d/%m/%Y %H:%M}', '']
+    for supplier, items in groups:
+        if supplier:
+            contact = ', '.join(value for value in (supplier.contact_person, supplier.phone, supplier.email) if value)
+            lines.append(f'{supplier.name}' + (f' ({contact})' if contact else ''))
+        else:
+            lines.append(NO_SUPPLIER)
+        for product in items:
+            lines.append(
+                f'  - {product.code} {product.name}: คงเหลือ {product.stock_quantity} '
+                f'{product.unit} (ขั้นต่ำ {product.min_stock})'
+            )
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def send_digest(dry_run=False):
+    """ส่งอีเมลสรุปหนึ่งฉบับ แล้วทำเครื่องหมายว่าแจ้งแล้ว คืน (จำนวนสินค้า, เนื้อหา)
+
+    ถ้าไม่มีสินค้าใหม่จะไม่ส่ง ถ้า dry_run=True จะไม่ส่งและไม่ทำเครื่องหมาย
+    """
+    from .models import Product
+
+    started = timezone.now()
+    groups = pending()
+    products = [product for _, items in groups for product in items]
+    if not products:
+        return 0, ''
+    body = render(groups)
+    if dry_run:
+        return len(products), body
+
+    to = recipients()
+    if not to:
+        raise ValueError('ไม่มีผู้รับอีเมล: ตั้งค่า LOW_STOCK_ALERT_EMAILS หรืออีเมลของ superuser')
+    send_mail(f'[myshop] สินค้าสต็อกต่ำ {len(products)} รายการ', body, None, to)
+    # สินค้าที่กลับมาพอแล้วต่ำลงใหม่ระหว่างรอบนี้ (low_stock_since ใหม่กว่า) จะรอแจ้งรอบถัดไป
+    Product.objects.filter(
+        pk__in=[product.pk for product in products], low_stock_since__lte=started,
+    ).update(low_stock_alerted=True)
+    return len(products), body
@@ -0,0 +1,173 @@
+"""ขายทั้งตะกร้าในคำขอเดียว
+
+สร้าง Sale และ SaleItem ทั้งหมดด้วย bulk_create ตัดสต็อกทุกสินค้าด้วย UPDATE
+เดียว และคำนวณยอดรวมครั้งเดียว ทั้งหมดอยู่ใน transaction เดียวกัน
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import costs, dashboard, sales_stats, sequences, stock, versions
+from .models import Product, Sale, SaleItem
+
+
+CENT = Decimal('0.01')
+
+
+class CheckoutError(Exception):
+    """ข้อมูลตะกร้าไม่ถูกต้อง"""
+
+
+def _decimal(value, field):
+    """จำนวนเงินที่ไม่ติดลบ ปัดเป็นสตางค์ (ไม่รับ NaN/Infinity)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise CheckoutError(f"{field} ไม่ถูกต้อง")
+    try:
+        amount = Decimal(str(value))
+        if not amount.is_finite():
+            raise ValueError
+        amount = amount.quantize(CENT)
+    except (InvalidOperation, ValueError):
+        raise CheckoutError(f"{field} ไม่ถูกต้อง")
+    if amount < 0:
+        raise CheckoutError(f"{field} ต้องไม่ติดลบ")
+    return amount
+
+
+def _integer(value):
+    """จำนวนเต็มจากตัวเลขหรือข้อความ (ไม่รับ bool, ทศนิยม, list, dict) ถ้าไม่ถูกต้องคืน None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        return int(value)
+    return None
+
+
+def _text(cart, field, label):
+    """ข้อความจากตะกร้า ต้องเป็น str และไม่ยาวเกินคอลัมน์ของ Sale"""
+    value = cart.get(field, '')
+    if not isinstance(value, str):
+        raise CheckoutError(f"{label} ไม่ถูกต้อง")
+    max_length = Sale._meta.get_field(field).max_length
+    if max_length and len(value) > max_length:
+        raise CheckoutError(f"{label} ยาวเกิน {max_length} ตัวอักษร")
+    return value
+
+
+def _parse_lines(items):
+    if not isinstance(items, list) or not items:
+        raise CheckoutError("ไม่มีรายการสินค้าในตะกร้า")
+    lines = []
+    for index, line in enumerate(items, start=1):
+        if not isinstance(line, dict):
+            raise CheckoutError(f"รายการที่ {index} ไม่ถูกต้อง")
+        quantity = _integer(line.get('quantity', 1))
+        if quantity is None:
+            raise CheckoutError(f"จำนวนในรายการที่ {index} ไม่ถูกต้อง")
+        if quantity <= 0:
+            raise CheckoutError(f"จำนวนในรายการที่ {index} ต้องมากกว่า 0")
+        unit_price = line.get('unit_price')
+        if unit_price is not None:
+            unit_price = _decimal(unit_price, f"ราคาในรายการที่ {index}")
+        product = line.get('product')
+        if product is not None:
+            product = _integer(product)
+            if product is None:
+                raise CheckoutError(f"รหัสอ้างอิงสินค้าในรายการที่ {index} ไม่ถูกต้อง")
+        code = line.get('code')
+        if code is not None and (isinstance(code, bool) or not isinstance(code, (str, int))):
+            raise CheckoutError(f"รหัสสินค้าในรายการที่ {index} ไม่ถูกต้อง")
+        lines.append({
+            'product': product,
+            'code': code,
+            'quantity': quantity,
+            'unit_price': unit_price,
+        })
+    return lines
+
+
+def _load_products(lines):
+    """โหลดสินค้าทั้งตะกร้า (ตาม id หรือรหัสสินค้า) ด้วย query ไม่เกินสองครั้ง"""
+    ids = {line['product'] for line in lines if line['product'] is not None}
+    codes = {str(line['code']) for line in lines if line['product'] is None and line['code']}
+    by_id = Product.objects.in_bulk(ids) if ids else {}
+    by_code = Product.objects.in_bulk(codes, field_name='code') if codes else {}
+    for index, line in enumerate(lines, start=1):
+        if line['product'] is not None:
+            product = by_id.get(line['product'])
+        else:
+            product = by_code.get(str(line['code']))
+        if product is None:
+            raise CheckoutError(f"ไม่พบสินค้าในรายการที่ {index}")
+        line['product'] = product
+
+
+def checkout(cart, user=None):
+    """บันทึกการขายจากตะกร้า คืนค่า Sale ที่บันทึกแล้ว (พร้อม sale.receipt_items)
+
+    cart = {'items': [{'product': id | 'code': รหัส, 'quantity': n, 'unit_price': ไม่บังคับ}],
+            'discount', 'customer_name', 'payment_method', 'note'}
+
+    unit_price ที่ต่างจากราคาขายของสินค้าใช้ได้เฉพาะผู้ใช้ staff
+    (user=None คือเรียกจากโค้ดภายใน เช่นคำสั่ง benchmark)
+    """
+    lines = _parse_lines(cart.get('items'))
+    discount = _decimal(cart.get('discount', 0), "ส่วนลด")
+    customer_name = _text(cart, 'customer_name', "ชื่อลูกค้า")
+    note = _text(cart, 'note', "หมายเหตุ")
+    payment_method = cart.get('payment_method', 'cash')
+    if payment_method not in dict(Sale._meta.get_field('payment_method').choices):
+        raise CheckoutError("วิธีชำระเงินไม่ถูกต้อง")
+    _load_products(lines)
+
+    quantities = {}
+    may_set_price = user is None or user.is_staff
+    for index, line in enumerate(lines, start=1):
+        if line['unit_price'] is None:
+            line['unit_price'] = line['product'].selling_price
+        elif line['unit_price'] != line['product'].selling_price and not may_set_price:
+            raise CheckoutError(f"ไม่มีสิทธิ์กำหนดราคาในรายการที่ {index}")
+        line['total_price'] = line['quantity'] * line['unit_price']
+        line['unit_cost'] = line['product'].average_cost
+        line['total_cost'] = costs.line_cost(line['quantity'], line['unit_cost'])
+        quantities[line['product'].pk] = quantities.get(line['product'].pk, 0) - line['quantity']
+    total = sum((line['total_price'] for line in lines), Decimal('0'))
+    if discount > total:
+        raise CheckoutError("ส่วนลดต้องไม่เกินยอดรวม")
+
+    # ขอเลขที่ใบเสร็จก่อนเปิด transaction (จองเป็นช่วงได้ ไม่ต้องเลื่อนตัวนับทุกใบ)
+    sale_number = sequences.early_number('INV')
+    with transaction.atomic():
+        sale = Sale(
+            sale_number=sale_number,
+            customer_name=customer_name,
+            total_amount=total,
+            discount=discount,
+            payment_method=payment_method,
+            note=note,
+            created_by=user,
+            cost_total=sum((line['total_cost'] for line in lines), Decimal('0')),
+        )
+        sale.save()
+        stock.record_many(quantities, 'sale', sale.sale_number, check_stock=True)
+        sale.receipt_items = SaleItem.objects.bulk_create([
+            SaleItem(
+                sale=sale,
+                product=line['product'],
+                quantity=line['quantity'],
+                unit_price=line['unit_price'],
+                total_price=line['total_price'],
+                unit_cost=line['unit_cost'],
+                total_cost=line['total_cost'],
+            )
+            for line in lines
+        ])
+        sales_stats.record_items(sale.receipt_items)
+        # bulk_create ไม่ส่ง signal
+        dashboard.invalidate('top_products')
+        versions.bump(SaleItem)
+    return sale
@@ -0,0 +1,149 @@
+"""ต้นทุนขายแบบถัวเฉลี่ยเคลื่อนที่ (moving average)
+
+ทุกครั้งที่รับสินค้า Product.average_cost จะถูกปรับใน UPDATE เดียวกับการเพิ่มสต็อก
+    ต้นทุนใหม่ = (คงเหลือเดิม × ต้นทุนเดิม + จำนวนรับ × ราคารับ) / (คงเหลือเดิม + จำนวนรับ)
+และตอนขาย ต้นทุนเฉลี่ยขณะนั้นถูกบันทึกลง SaleItem.unit_cost / total_cost
+แล้วรวมเป็น Sale.cost_total, DailySummary.cost_of_goods และ ProductSalesDay.cost
+รายงานกำไรจึงรวมยอดจากตารางสรุปได้ทันที ไม่ต้องย้อนอ่านประวัติการสั่งซื้อ
+
+rebuild() คำนวณต้นทุนย้อนหลังทั้งหมดใหม่ (คำสั่ง rebuild_costs)
+"""
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Func, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+
+from . import timeseries, versions
+
+UNIT_COST = DecimalField(max_digits=12, decimal_places=4)
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+UNIT = Decimal('0.0001')
+CENT = Decimal('0.01')
+
+
+class _Real(Func):
+    """ตัวหารที่ต้องหารแบบทศนิยม: SQLite หารจำนวนเต็มด้วยจำนวนเต็มแล้วปัดเศษทิ้ง
+    (CAST AS NUMERIC ก็ยังได้จำนวนเต็ม) ฐานข้อมูลอื่นใช้นิพจน์เดิม
+    """
+    template = '%(expressions)s'
+    output_field = UNIT_COST
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(%(expressions)s AS REAL)', **extra_context)
+
+
+def line_cost(quantity, unit_cost):
+    """ต้นทุนรวมของรายการขาย (ปัดเป็นสตางค์)"""
+    return (quantity * Decimal(unit_cost or 0)).quantize(CENT)
+
+
+def average_after_receipt(quantity, unit_cost):
+    """นิพจน์ต้นทุนเฉลี่ยใหม่สำหรับ UPDATE ที่เพิ่มสต็อก quantity ชิ้นในราคา unit_cost
+
+    ใช้ค่า stock_quantity ก่อน UPDATE (สต็อกติดลบนับเป็นศูนย์)
+    """
+    unit_cost = Decimal(unit_cost)
+    return Case(
+        When(
+            stock_quantity__gt=0,
+            then=Round(
+                (F('stock_quantity') * F('average_cost') + Value(quantity * unit_cost))
+                / _Real(F('stock_quantity') + Value(quantity)),
+                4,
+            ),
+        ),
+        default=Value(unit_cost),
+        output_field=UNIT_COST,
+    )
+
+
+def _receipts():
+    from .models import PurchaseItem
+
+    rows = PurchaseItem.objects.filter(
+        purchase__status='received', purchase__received_date__isnull=False,
+    ).order_by('purchase__received_date', 'pk').values_list(
+        'purchase__received_date', 'product_id', 'quantity', 'unit_price',
+    )
+    for moment, product_id, quantity, unit_price in rows.iterator(chunk_size=5000):
+        yield moment, 0, product_id, quantity, unit_price
+
+
+def _sales():
+    from .models import SaleItem
+
+    rows = SaleItem.objects.order_by('sale__sale_date', 'pk').values_list(
+        'sale__sale_date', 'pk', 'product_id', 'quantity',
+    )
+    for moment, pk, product_id, quantity in rows.iterator(chunk_size=5000):
+        yield moment, 1, product_id, quantity, pk
+
+
+def rebuild(batch_size=500):
+    """คำนวณต้นทุนเฉลี่ยและต้นทุนของทุกรายการขายใหม่ในการอ่านข้อมูลรอบเดียว
+
+    อ่านการรับสินค้าและการขายเรียงตามเวลาพร้อมกัน (รับสินค้าก่อนถ้าเวลาเท่ากัน)
+    ต้นทุนเริ่มต้นของสินค้าคือราคาทุน (cost_price) การปรับยอด/ยอดยกมาไม่มีราคา
+    จึงไม่นับ คืนค่า (จำนวนรายการขาย, จำนวนสินค้า)
+
+    ต้องสร้างตารางสรุปใหม่ต่อ (rollups.rebuild, sales_stats.rebuild)
+    """
+    from .models import DailySummary, Product, Sale, SaleItem
+
+    average = {
+        pk: Decimal(cost or 0)
+        for pk, cost in Product.objects.values_list('pk', 'cost_price').iterator(chunk_size=5000)
+    }
+    on_hand = defaultdict(int)
+    # รายการขายที่ยังใช้ต้นทุนเดิมของสินค้า เขียนลงฐานข้อมูลเมื่อต้นทุนเปลี่ยนหรือจบการอ่าน
+    pending = defaultdict(list)
+    items = 0
+
+    def flush(product_id):
+        pks = pending.pop(product_id, ())
+        unit_cost = average[product_id]
+        for start in range(0, len(pks), batch_size):
+            SaleItem.objects.filter(pk__in=pks[start:start + batch_size]).update(
+                unit_cost=unit_cost,
+                total_cost=Round(F('quantity') * Value(unit_cost, output_field=UNIT_COST), 2, output_field=MONEY),
+            )
+
+    with transaction.atomic():
+        events = heapq.merge(_receipts(), _sales(), key=lambda event: event[:2])
+        for _, kind, product_id, quantity, value in events:
+            if kind == 1:
+                pending[product_id].append(value)
+                on_hand[product_id] -= quantity
+                items += 1
+                continue
+            if pending.get(product_id):
+                flush(product_id)
+            base = max(on_hand[product_id], 0)
+            if base + quantity > 0:
+                average[product_id] = (
+                    (base * average[product_id] + quantity * Decimal(value)) / (base + quantity)
+                ).quantize(UNIT)
+            on_hand[product_id] += quantity
+        for product_id in list(pending):
+            flush(product_id)
+
+        Product.objects.bulk_update(
+            [Product(pk=pk, average_cost=cost) for pk, cost in average.items()],
+            ['average_cost'], batch_size=batch_size,
+        )
+        Sale.objects.update(cost_total=Coalesce(
+            Subquery(
+                SaleItem.objects.filter(sale=OuterRef('pk')).values('sale').annotate(
+                    total=Sum('total_cost'),
+                ).values('total')
+            ),
+            Value(Decimal('0')),
+            output_field=MONEY,
+        ))
+    # UPDATE/bulk_update ไม่ส่ง signal: รายงาน (ETag) และกราฟที่ cache ไว้ต้องอ่านใหม่
+    versions.bump(Product, Sale, SaleItem, DailySummary)
+    timeseries.invalidate()
+    return items, len(average)
@@ -0,0 +1,112 @@
+"""แคชข้อมูลแต่ละส่วน (tile) ของหน้าแดชบอร์ด
+
+แต่ละ tile ถูกคำนวณครั้งเดียวแล้วเก็บใน cache จนกว่าข้อมูลที่มันใช้จะเปลี่ยน
+signal ใน signals.py (และจุดที่แก้ข้อมูลแบบ bulk เช่น stock.record) จะเรียก
+invalidate() เฉพาะ tile ที่เกี่ยวข้อง ซึ่งเปลี่ยนเวอร์ชันของ tile (versions.py)
+หลัง transaction commit คีย์แคชมีเวอร์ชันอยู่ด้วย ทุก worker จึงเลิกใช้ค่าเดิมพร้อมกัน
+แม้ cache จะเป็นของแต่ละ process
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import aio, versions
+
+KEY_PREFIX = 'dashboard:'
+# กันกรณีข้อมูลถูกแก้โดยไม่ผ่าน signal
+CACHE_TIMEOUT = 10 * 60
+
+
+def _summary():
+    from .models import DailySummary
+
+    today = timezone.localdate()
+    today_summary = DailySummary.objects.filter(date=today).first()
+    month_totals = DailySummary.objects.filter(date__gte=today.replace(day=1)).aggregate(
+        revenue=Sum('revenue'),
+        cost=Sum('cost_of_goods'),
+        expense=Sum('expense_total'),
+    )
+    month_revenue = month_totals['revenue'] or 0
+    month_cost = month_totals['cost'] or 0
+    month_expense_total = month_totals['expense'] or 0
+    return {
+        'today_revenue': today_summary.revenue if today_summary else 0,
+        'today_sales_count': today_summary.sale_count if today_summary else 0,
+        'month_revenue': month_revenue,
+        'month_cost': month_cost,
+        'month_expense_total': month_expense_total,
+        'month_profit': month_revenue - month_cost - month_expense_total,
+    }
+
+
+def _low_stock():
+    from .models import Product
+
+    return list(Product.objects.filter(low_stock_since__isnull=False)[:5])
+
+
+def _top_products():
+    from .models import ProductSalesStats
+
+    top = []
+    for stats in ProductSalesStats.objects.filter(units_total__gt=0).select_related('product').order_by('-units_total')[:5]:
+        stats.product.total_sold = stats.units_total
+        top.append(stats.product)
+    return top
+
+
+def _recent_sales():
+    from .models import Sale
+
+    return list(Sale.objects.all()[:10])
+
+
+TILES = {
+    'summary': _summary,
+    'low_stock': _low_stock,
+    'top_products': _top_products,
+    'recent_sales': _recent_sales,
+}
+
+
+def _keys(names):
+    """{ชื่อ tile: คีย์แคช} ตามเวอร์ชันปัจจุบันของแต่ละ tile"""
+    stamps = versions.get_many(*(KEY_PREFIX + name for name in names))
+    keys = {name: f'{KEY_PREFIX}{name}:{stamp}' for name, stamp in zip(names, stamps)}
+    # tile สรุปยอดขึ้นกับวันที่ จึงเปลี่ยน key เมื่อขึ้นวันใหม่
+    if 'summary' in keys:
+        keys['summary'] += f':{timezone.localdate().isoformat()}'
+    return keys
+
+
+def get_tile(name):
+    return get_tiles(name)[name]
+
+
+def get_tiles(*names):
+    """คืน {ชื่อ tile: ข้อมูล} อ่านจาก cache ครั้งเดียว และคำนวณเฉพาะ tile ที่ไม่มีใน cache"""
+    keys = _keys(names)
+    cached = cache.get_many(keys.values())
+    values = {name: cached[key] for name, key in keys.items() if key in cached}
+    missing = {name: TILES[name]() for name in names if name not in values}
+    if missing:
+        cache.set_many({keys[name]: value for name, value in missing.items()}, CACHE_TIMEOUT)
+    return {**values, **missing}
+
+
+async def aget_tiles(*names):
+    """เหมือน get_tiles() แต่คำนวณ tile ที่ขาดพร้อมกัน (สำหรับ view แบบ async)"""
+    keys = await sync_to_async(_keys)(names)
+    cached = await cache.aget_many(keys.values())
+    values = {name: cached[key] for name, key in keys.items() if key in cached}
+    missing = await aio.gather_dict({name: TILES[name] for name in names if name not in values})
+    if missing:
+        await cache.aset_many({keys[name]: value for name, value in missing.items()}, CACHE_TIMEOUT)
+    return {**values, **missing}
+
+
+def invalidate(*names):
+    """เลิกใช้แคชของ tile ที่ระบุหลัง transaction ปัจจุบัน commit"""
+    versions.bump(*(KEY_PREFIX + name for name in names))
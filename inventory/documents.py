@@ -0,0 +1,367 @@
+"""เอกสาร PDF: ใบเสร็จ ใบสั่งซื้อ รายงานรายเดือน/รายปี (ต้องติดตั้ง reportlab)
+
+ขั้นตอน:
+1. อ่านข้อมูลของเอกสารจากฐานข้อมูลเป็น dict ธรรมดา (query ไม่กี่ครั้ง)
+2. คำนวณ version จาก hash ของข้อมูลนั้น ไฟล์ PDF เก็บที่
+   PDF_CACHE_DIR/<ชนิด>-<รหัส>-<version>.pdf ถ้ามีไฟล์อยู่แล้วก็ส่งไฟล์เดิม
+   ทันที เอกสารที่ข้อมูลเปลี่ยน (เช่น เพิ่มรายการในใบเสร็จ) จะได้ version ใหม่
+   และสร้างใหม่เฉพาะเอกสารนั้น ไฟล์ version เก่าจะถูกลบเมื่อสร้างเสร็จ
+3. การสร้าง PDF (ใช้ CPU) ทำใน process pool ของเครื่อง ไม่ใช่ใน worker ที่
+   รับ request ถ้าสร้างไม่เสร็จภายใน PDF_WAIT วินาที view จะตอบ 202 ให้
+   เบราว์เซอร์กลับมาโหลดใหม่ งานที่ขอซ้ำระหว่างกำลังสร้างจะรอผลงานเดิม
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+# เปลี่ยนค่านี้เมื่อแก้รูปแบบเอกสาร เพื่อให้ไฟล์เดิมใน cache ถูกสร้างใหม่
+RENDER_VERSION = 1
+
+_lock = threading.Lock()
+_pool = None
+_pending = {}
+
+
+class DocumentError(Exception):
+    """สร้างเอกสารไม่ได้ (เช่น ไม่ได้ติดตั้ง reportlab)"""
+
+
+def _money(value):
+    return f'{value or 0:,.2f}'
+
+
+def _datetime(value):
+    return timezone.localtime(value).strftime('%d/%m/%Y %H:%M') if value else '-'
+
+
+# ==================== ข้อมูลเอกสาร ====================
+def _receipt(pk):
+    from .exports import PAYMENT_METHODS
+    from .models import Sale
+
+    sale = Sale.objects.get(pk=pk)
+    items = sale.items.select_related('product').order_by('id')
+    return {
+        'filename': f'{sale.sale_number}.pdf',
+        'title': 'ใบเสร็จรับเงิน',
+        'subtitle': sale.sale_number,
+        'info': [
+            ['วันที่ขาย', _datetime(sale.sale_date)],
+            ['ชื่อลูกค้า', sale.customer_name or 'ไม่ระบุ'],
+            ['วิธีชำระเงิน', PAYMENT_METHODS.get(sale.payment_method, sale.payment_method)],
+        ],
+        'tables': [{
+            'headers': ['รหัสสินค้า', 'ชื่อสินค้า', 'จำนวน', 'ราคาต่อหน่วย', 'ราคารวม'],
+            'rows': [
+                [item.product.code, item.product.name, f'{item.quantity} {item.product.unit}',
+                 _money(item.unit_price), _money(item.total_price)]
+                for item in items
+            ],
+        }],
+        'totals': [
+            ['ยอดรวม', _money(sale.total_amount)],
+            ['ส่วนลด', _money(sale.discount)],
+            ['ยอดสุทธิ', _money(sale.net_amount)],
+        ],
+        'note': sale.note,
+    }
+
+
+def _purchase(pk):
+    from .exports import PURCHASE_STATUSES
+    from .models import Purchase
+
+    purchase = Purchase.objects.select_related('supplier').get(pk=pk)
+    items = purchase.items.select_related('product').order_by('id')
+    return {
+        'filename': f'{purchase.purchase_number}.pdf',
+        'title': 'ใบสั่งซื้อ',
+        'subtitle': purchase.purchase_number,
+        'info': [
+            ['ผู้จัดจำหน่าย', purchase.supplier.name],
+            ['ผู้ติดต่อ', purchase.supplier.contact_person or '-'],
+            ['เบอร์โทร', purchase.supplier.phone or '-'],
+            ['วันที่สั่งซื้อ', _datetime(purchase.purchase_date)],
+            ['วันที่รับสินค้า', _datetime(purchase.received_date)],
+            ['สถานะ', PURCHASE_STATUSES.get(purchase.status, purchase.status)],
+        ],
+        'tables': [{
+            'headers': ['รหัสสินค้า', 'ชื่อสินค้า', 'จำนวน', 'ราคาต่อหน่วย', 'ราคารวม'],
+            'rows': [
+                [item.product.code, item.product.name, f'{item.quantity} {item.product.unit}',
+                 _money(item.unit_price), _money(item.total_price)]
+                for item in items
+            ],
+        }],
+        'totals': [['ยอดรวม', _money(purchase.total_amount)]],
+        'note': purchase.note,
+    }
+
+
+def _summary_totals(context):
+    return [
+        ['รายได้', _money(context['total_revenue'])],
+        ['ต้นทุนขาย', _money(context['total_cost'])],
+        ['รายจ่าย', _money(context['total_expense'])],
+        ['กำไร', _money(context['profit'])],
+    ]
+
+
+def _report_monthly(key):
+    from . import reports
+    from .exports import EXPENSE_CATEGORIES
+
+    year, month = (int(part) for part in key.split('-'))
+    context = reports.monthly(year, month)
+    return {
+        'filename': f'report-{year}-{month:02d}.pdf',
+        'title': 'รายงานรายเดือน',
+        'subtitle': f'{reports.MONTH_NAMES[month - 1]} {year}',
+        'info': [],
+        'tables': [
+            {
+                'caption': 'ยอดขายรายวัน',
+                'headers': ['วันที่', 'จำนวนใบเสร็จ', 'ยอดขาย', 'ต้นทุนขาย'],
+                'rows': [
+                    [row['day'].strftime('%d/%m/%Y'), str(row['count']), _money(row['total']), _money(row['cost'])]
+                    for row in context['daily_sales']
+                ],
+            },
+            {
+                'caption': 'กำไรขั้นต้นตามหมวดหมู่',
+                'headers': ['หมวดหมู่', 'ยอดขาย', 'ต้นทุนขาย', 'กำไรขั้นต้น'],
+                'rows': [
+                    [row['category'], _money(row['revenue']), _money(row['cost']), _money(row['margin'])]
+                    for row in context['margin_by_category']
+                ],
+            },
+            {
+                'caption': 'รายจ่ายตามประเภท',
+                'headers': ['ประเภท', 'จำนวนเงิน'],
+                'rows': [
+                    [EXPENSE_CATEGORIES.get(row['category'], row['category']), _money(row['total'])]
+                    for row in context['expense_by_category']
+                ],
+            },
+        ],
+        'totals': _summary_totals(context),
+        'note': '',
+    }
+
+
+def _report_yearly(key):
+    from . import reports
+
+    year = int(key)
+    context = reports.yearly(year)
+    return {
+        'filename': f'report-{year}.pdf',
+        'title': 'รายงานรายปี',
+        'subtitle': str(year),
+        'info': [],
+        'tables': [{
+            'caption': 'สรุปรายเดือน',
+            'headers': ['เดือน', 'รายได้', 'ต้นทุนขาย', 'รายจ่าย', 'กำไร'],
+            'rows': [
+                [reports.MONTH_NAMES[row['month'] - 1], _money(row['revenue']), _money(row['cost']),
+                 _money(row['expense']), _money(row['profit'])]
+                for row in context['monthly_data']
+            ],
+        }],
+        'totals': _summary_totals(context),
+        'note': '',
+    }
+
+
+DOCUMENTS = {
+    'receipt': _receipt,
+    'purchase': _purchase,
+    'report_monthly': _report_monthly,
+    'report_yearly': _report_yearly,
+}
+
+
+def load(kind, key):
+    """คืนข้อมูลเอกสาร (dict) raise DoesNotExist ถ้าไม่พบเอกสาร"""
+    return DOCUMENTS[kind](key)
+
+
+def version(data):
+    payload = json.dumps([RENDER_VERSION, data], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_dir():
+    return str(getattr(settings, 'PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'shop-pdf')))
+
+
+def cache_path(kind, key, data):
+    return os.path.join(cache_dir(), f'{kind}-{key}-{version(data)}.pdf')
+
+
+def check_font(font_path=None):
+    """ตรวจว่า PDF_FONT เป็นฟอนต์ TrueType ที่มีอักษรไทย (เรียกตอนเริ่ม server ใน wsgi/asgi)
+
+    ถ้าไม่มี เอกสารภาษาไทยทุกฉบับจะแสดงเป็นกล่องว่าง จึง raise ImproperlyConfigured แทน
+    """
+    font_path = font_path or getattr(settings, 'PDF_FONT', None)
+    if not font_path:
+        raise ImproperlyConfigured('ต้องกำหนด PDF_FONT เป็นไฟล์ฟอนต์ TrueType ที่มีอักษรไทย เช่น THSarabunNew.ttf')
+    try:
+        from reportlab.pdfbase.ttfonts import TTFont
+    except ImportError:
+        raise ImproperlyConfigured('การสร้าง PDF ต้องติดตั้ง reportlab (pip install reportlab)')
+    try:
+        font = TTFont('check', font_path)
+    except Exception as e:
+        raise ImproperlyConfigured(f'อ่านฟอนต์ PDF_FONT={font_path} ไม่ได้: {e}')
+    if ord('ก') not in font.face.charToGlyph:
+        raise ImproperlyConfigured(f'ฟอนต์ PDF_FONT={font_path} ไม่มีอักษรไทย')
+
+
+# ==================== การสร้าง PDF (ทำงานใน process ลูก) ====================
+def _register_font(font_path):
+    """ลงทะเบียนฟอนต์ TrueType (ฟอนต์มาตรฐานของ PDF ไม่มีอักษรไทย จึงไม่ใช้แทน)"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if not font_path:
+        raise DocumentError('ไม่ได้กำหนด PDF_FONT (ฟอนต์ที่มีอักษรไทย)')
+    name = os.path.splitext(os.path.basename(font_path))[0]
+    if name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(name, font_path))
+    return name
+
+
+def render(data, path, font_path=None):
+    """สร้างไฟล์ PDF จาก data ลงที่ path (เขียนไฟล์ชั่วคราวแล้ว rename)"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    font = _register_font(font_path)
+    base = ParagraphStyle('base', fontName=font, fontSize=11, leading=15)
+    title = ParagraphStyle('title', parent=base, fontSize=18, leading=24)
+    caption = ParagraphStyle('caption', parent=base, fontSize=13, leading=18, spaceBefore=6)
+
+    story = [Paragraph(escape(data['title']), title), Paragraph(escape(data['subtitle']), base), Spacer(1, 4 * mm)]
+    if data['info']:
+        info = Table(data['info'], colWidths=[40 * mm, None], hAlign='LEFT')
+        info.setStyle(TableStyle([('FONTNAME', (0, 0), (-1, -1), font), ('FONTSIZE', (0, 0), (-1, -1), 11)]))
+        story += [info, Spacer(1, 4 * mm)]
+
+    for table in data['tables']:
+        if table.get('caption'):
+            story.append(Paragraph(escape(table['caption']), caption))
+        rows = [table['headers']] + (table['rows'] or [['-'] + [''] * (len(table['headers']) - 1)])
+        grid = Table(rows, repeatRows=1, hAlign='LEFT')
+        grid.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), font),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e9ecef')),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ]))
+        story += [grid, Spacer(1, 4 * mm)]
+
+    totals = Table(data['totals'], colWidths=[40 * mm, 40 * mm], hAlign='RIGHT')
+    totals.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), font),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('LINEABOVE', (0, -1), (-1, -1), 0.5, colors.black),
+    ]))
+    story.append(totals)
+    if data.get('note'):
+        story += [Spacer(1, 4 * mm), Paragraph(escape(f"หมายเหตุ: {data['note']}"), base)]
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        SimpleDocTemplate(tmp, pagesize=A4, title=f"{data['title']} {data['subtitle']}").build(story)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    # ลบไฟล์ version เก่าของเอกสารเดียวกัน
+    prefix = path.rsplit('-', 1)[0]
+    for old in glob.glob(glob.escape(prefix) + '-*.pdf'):
+        if old != path:
+            try:
+                os.unlink(old)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+# ==================== process pool ====================
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: ไม่ fork process ที่มีหลาย thread (เช่น gunicorn --threads)
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'PDF_WORKERS', 2),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+def _reset_after_fork():
+    global _pool, _lock
+    _pool = None
+    _pending.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _check_reportlab():
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        raise DocumentError('การสร้าง PDF ต้องติดตั้ง reportlab (pip install reportlab)')
+
+
+def get(kind, key, wait=None):
+    """คืน (path, filename) ของ PDF ถ้ายังสร้างไม่เสร็จภายใน wait วินาที path เป็น None
+
+    raise DoesNotExist ของโมเดลถ้าไม่พบเอกสาร และ DocumentError ถ้าสร้างไม่ได้
+    """
+    data = load(kind, key)
+    path = cache_path(kind, key, data)
+    if os.path.exists(path):
+        return path, data['filename']
+
+    _check_reportlab()
+    with _lock:
+        future = _pending.get(path)
+        if future is None:
+            future = _get_pool().submit(render, data, path, getattr(settings, 'PDF_FONT', None))
+            _pending[path] = future
+            future.add_done_callback(lambda _, path=path: _pending.pop(path, None))
+
+    wait = getattr(settings, 'PDF_WAIT', 3) if wait is None else wait
+    try:
+        future.result(timeout=wait)
+    except TimeoutError:
+        return None, data['filename']
+    except Exception as e:
+        raise DocumentError(f'สร้าง PDF ไม่สำเร็จ: {e}')
+    return path, data['filename']
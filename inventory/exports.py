@@ -0,0 +1,150 @@
+"""ส่งออกข้อมูลการขาย การนำเข้า และรายจ่าย เป็น CSV/XLSX
+
+อ่านข้อมูลด้วย values_list(...).iterator() ซึ่ง join สินค้า/ใบเสร็จมาใน query
+เดียวกันทีละ chunk แล้วเขียนออกทีละแถว หน่วยความจำจึงคงที่ไม่ว่าข้อมูล
+จะมากแค่ไหน และ CSV เริ่มส่งไบต์แรกได้ทันที
+"""
+import csv
+
+from django.utils import timezone
+
+from . import periods
+
+CHUNK_SIZE = 2000
+
+PAYMENT_METHODS = {'cash': 'เงินสด', 'transfer': 'โอนเงิน', 'card': 'บัตรเครดิต'}
+PURCHASE_STATUSES = {'pending': 'รอรับสินค้า', 'received': 'รับสินค้าแล้ว', 'cancelled': 'ยกเลิก'}
+EXPENSE_CATEGORIES = {
+    'utilities': 'ค่าน้ำ-ค่าไฟ',
+    'rent': 'ค่าเช่า',
+    'salary': 'เงินเดือน',
+    'maintenance': 'ค่าซ่อมบำรุง',
+    'other': 'อื่นๆ',
+}
+
+
+class ExportError(Exception):
+    """ประเภทข้อมูลหรือรูปแบบไฟล์ที่ส่งออกไม่ถูกต้อง"""
+
+
+def _datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def _period(params, field):
+    period = periods.custom(periods.parse_date(params.get('date_from')), periods.parse_date(params.get('date_to')))
+    return period.filter(field)
+
+
+def _sales(params):
+    from .models import SaleItem
+
+    headers = ['เลขที่ใบเสร็จ', 'วันที่', 'ลูกค้า', 'วิธีชำระเงิน', 'รหัสสินค้า', 'ชื่อสินค้า',
+               'จำนวน', 'หน่วย', 'ราคาต่อหน่วย', 'ราคารวม', 'ส่วนลดใบเสร็จ', 'ยอดสุทธิใบเสร็จ']
+    rows = SaleItem.objects.filter(**_period(params, 'sale__sale_date')).order_by('sale__sale_date', 'sale_id', 'id').values_list(
+        'sale__sale_number', 'sale__sale_date', 'sale__customer_name', 'sale__payment_method',
+        'product__code', 'product__name', 'quantity', 'product__unit', 'unit_price', 'total_price',
+        'sale__discount', 'sale__net_amount',
+    )
+
+    def convert(row):
+        row = list(row)
+        row[1] = _datetime(row[1])
+        row[3] = PAYMENT_METHODS.get(row[3], row[3])
+        return row
+    return headers, rows, convert
+
+
+def _purchases(params):
+    from .models import PurchaseItem
+
+    headers = ['เลขที่ใบสั่งซื้อ', 'วันที่สั่งซื้อ', 'วันที่รับสินค้า', 'สถานะ', 'ผู้จัดจำหน่าย',
+               'รหัสสินค้า', 'ชื่อสินค้า', 'จำนวน', 'หน่วย', 'ราคาต่อหน่วย', 'ราคารวม']
+    rows = PurchaseItem.objects.filter(**_period(params, 'purchase__purchase_date'))
+    if params.get('status'):
+        rows = rows.filter(purchase__status=params['status'])
+    rows = rows.order_by('purchase__purchase_date', 'purchase_id', 'id').values_list(
+        'purchase__purchase_number', 'purchase__purchase_date', 'purchase__received_date', 'purchase__status',
+        'purchase__supplier__name', 'product__code', 'product__name', 'quantity', 'product__unit',
+        'unit_price', 'total_price',
+    )
+
+    def convert(row):
+        row = list(row)
+        row[1] = _datetime(row[1])
+        row[2] = _datetime(row[2])
+        row[3] = PURCHASE_STATUSES.get(row[3], row[3])
+        return row
+    return headers, rows, convert
+
+
+def _expenses(params):
+    from .models import Expense
+
+    headers = ['วันที่จ่าย', 'ประเภท', 'รายละเอียด', 'จำนวนเงิน', 'หมายเหตุ']
+    rows = Expense.objects.filter(**_period(params, 'expense_date'))
+    if params.get('category'):
+        rows = rows.filter(category=params['category'])
+    rows = rows.order_by('expense_date', 'id').values_list('expense_date', 'category', 'description', 'amount', 'note')
+
+    def convert(row):
+        row = list(row)
+        row[0] = _datetime(row[0])
+        row[1] = EXPENSE_CATEGORIES.get(row[1], row[1])
+        return row
+    return headers, rows, convert
+
+
+EXPORTS = {
+    'sales': _sales,
+    'purchases': _purchases,
+    'expenses': _expenses,
+}
+
+FORMATS = ('csv', 'xlsx')
+
+
+def rows(kind, params):
+    """คืน generator ของแถว (แถวแรกเป็นหัวตาราง)"""
+    if kind not in EXPORTS:
+        raise ExportError(f'ไม่รองรับการส่งออก {kind}')
+    headers, queryset, convert = EXPORTS[kind](params)
+
+    def generate():
+        yield headers
+        for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield convert(row)
+    return generate()
+
+
+class _Echo:
+    """ไฟล์เทียมสำหรับ csv.writer ที่คืนค่าบรรทัดแทนการเขียน"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    # BOM ให้ Excel อ่านภาษาไทยได้ถูกต้อง
+    yield '\ufeff'.encode('utf-8')
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+def write_csv(rows, fileobj):
+    for chunk in iter_csv(rows):
+        fileobj.write(chunk)
+
+
+def write_xlsx(rows, fileobj, title='data'):
+    """เขียน XLSX แบบ write-only (ไม่เก็บทั้งไฟล์ในหน่วยความจำ) ต้องติดตั้ง openpyxl"""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError('การส่งออก XLSX ต้องติดตั้ง openpyxl (pip install openpyxl)')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
@@ -93,4 +93,16 @@ class ExpenseForm(forms.ModelForm):
             'description': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'รายละเอียด'}),
             'amount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'note': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
-        }
\ No newline at end of file
+        }
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(
+        label="ไฟล์สินค้า (CSV/XLSX)",
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+    )
+    create_categories = forms.BooleanField(
+        label="สร้างหมวดหมู่ที่ยังไม่มีในระบบ",
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
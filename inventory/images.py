@@ -0,0 +1,168 @@
+"""รูปย่อของรูปภาพสินค้า
+
+เมื่ออัพโหลดรูปสินค้า จะสร้างรูปย่อ 3 ขนาด (thumb / list / detail) เป็น WebP
+และ JPEG (สำรองสำหรับเบราว์เซอร์ที่ไม่รองรับ WebP) เก็บไว้ที่
+media/products/derived/<hash>-<ขนาด>.<นามสกุล> โดย hash คำนวณจากเนื้อไฟล์
+ต้นฉบับ ชื่อไฟล์จึงเปลี่ยนทุกครั้งที่รูปเปลี่ยน (cache ได้ไม่มีกำหนด) และรูปที่
+ซ้ำกันใช้ไฟล์ชุดเดียวกัน ค่า hash เก็บใน Product.image_hash
+"""
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+# ความกว้าง/สูงสูงสุด (px) ของแต่ละขนาด
+SIZES = {
+    'thumb': 100,
+    'list': 300,
+    'detail': 800,
+}
+
+# (นามสกุล, รูปแบบของ Pillow, content type, ตัวเลือกการบันทึก)
+FORMATS = (
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+DERIVED_DIR = 'products/derived'
+
+
+def derivative_name(image_hash, size, ext):
+    return f'{DERIVED_DIR}/{image_hash}-{size}.{ext}'
+
+
+def derivative_url(image_hash, size, ext):
+    return default_storage.url(derivative_name(image_hash, size, ext))
+
+
+def content_hash(fileobj):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def _flatten(image):
+    """แปลงเป็น RGB สำหรับ JPEG (พื้นหลังโปร่งใสเป็นสีขาว)"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate(name, force=False):
+    """สร้างรูปย่อของไฟล์ name (ชื่อไฟล์ใน storage) คืนค่า hash ของรูป
+
+    ถ้ารูปย่อของ hash นี้มีอยู่แล้วจะไม่สร้างซ้ำ (เว้นแต่ force=True) โดยดูจากไฟล์
+    ที่เขียนเป็นไฟล์สุดท้าย ถ้าครั้งก่อนถูกขัดจังหวะกลางทางจึงสร้างใหม่ให้ครบ
+    """
+    from PIL import Image, ImageOps
+
+    with default_storage.open(name, 'rb') as source:
+        image_hash = content_hash(source)
+        smallest = min(SIZES, key=SIZES.get)
+        last = derivative_name(image_hash, smallest, FORMATS[-1][0])
+        if not force and default_storage.exists(last):
+            return image_hash
+        source.seek(0)
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+
+    # สร้างจากขนาดใหญ่ไปเล็ก ย่อต่อจากภาพก่อนหน้าเพื่อลดเวลา
+    for size, edge in sorted(SIZES.items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        for ext, fmt, _, options in FORMATS:
+            output = image if fmt == 'WEBP' and image.mode in ('RGB', 'RGBA') else _flatten(image)
+            buffer = io.BytesIO()
+            output.save(buffer, fmt, **options)
+            target = derivative_name(image_hash, size, ext)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+    return image_hash
+
+
+def update_product(product):
+    """สร้างรูปย่อของสินค้าและบันทึก image_hash (ไม่เรียก Product.save ซ้ำ)"""
+    from .models import Product
+
+    image_hash = ''
+    if product.image:
+        try:
+            image_hash = generate(product.image.name)
+        except Exception:
+            # รูปเสียหาย/ไม่รองรับ ยังแสดงรูปต้นฉบับได้ตามเดิม
+            logger.warning('ไม่สามารถสร้างรูปย่อของสินค้า %s', product.pk, exc_info=True)
+    if image_hash != product.image_hash:
+        product.image_hash = image_hash
+        Product.objects.filter(pk=product.pk).update(image_hash=image_hash, updated_at=timezone.now())
+        versions.bump(Product)
+    return image_hash
+
+
+def _init_worker():
+    # จำเป็นเมื่อ process ลูกเริ่มแบบ spawn (Windows/macOS)
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _generate_job(job):
+    pk, name, force = job
+    try:
+        return pk, generate(name, force=force), None
+    except Exception as exc:
+        return pk, '', f'{type(exc).__name__}: {exc}'
+
+
+def backfill(queryset, workers=None, force=False, on_result=None):
+    """สร้างรูปย่อของสินค้าใน queryset แบบขนานด้วย process pool
+
+    process ลูกทำเฉพาะงานประมวลผลรูป (ไม่แตะฐานข้อมูล) แล้วส่ง hash กลับ
+    ให้ process หลักบันทึกลงฐานข้อมูล คืนค่า (จำนวนที่สำเร็จ, จำนวนที่ผิดพลาด)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from django.db import connections
+
+    from .models import Product
+
+    jobs = [
+        (pk, name, force)
+        for pk, name in queryset.exclude(image='').exclude(image__isnull=True).values_list('pk', 'image').iterator()
+    ]
+    if not jobs:
+        return 0, 0
+    # ไม่ให้ process ลูกได้ connection ของ process หลักติดไปด้วย
+    connections.close_all()
+
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for pk, image_hash, error in pool.map(_generate_job, jobs, chunksize=4):
+            if error:
+                failed += 1
+            else:
+                done += 1
+                Product.objects.filter(pk=pk).exclude(image_hash=image_hash).update(
+                    image_hash=image_hash, updated_at=timezone.now(),
+                )
+            if on_result:
+                on_result(pk, image_hash, error)
+    if done:
+        versions.bump(Product)
+    return done, failed
@@ -0,0 +1,268 @@
+"""นำเข้าสินค้าจำนวนมากจากไฟล์ CSV/XLSX (เช่น แคตตาล็อกของผู้จัดจำหน่าย)
+
+อ่านไฟล์ทีละแถวแบบ stream (CSV ผ่าน csv.reader, XLSX ผ่าน openpyxl แบบ
+read-only) แล้วตรวจสอบและบันทึกทีละกลุ่ม (batch) ต่อกลุ่มใช้ query จำนวน
+คงที่: ค้นหมวดหมู่ด้วยชื่อครั้งเดียว บันทึกสินค้าด้วย upsert ตามรหัสสินค้า
+(bulk_create(update_conflicts=True) หรือ bulk_create + bulk_update บนฐานข้อมูล
+ที่ไม่รองรับ) และทำดัชนีค้นหาของทั้งกลุ่มพร้อมกัน แถวที่ข้อมูลไม่ถูกต้อง
+จะถูกข้ามและรายงานเลขแถว โดยไม่หยุดการนำเข้าทั้งไฟล์
+
+หัวตารางใช้ได้ทั้งชื่อ field (code, name, ...) และชื่อภาษาไทย (รหัสสินค้า,
+ชื่อสินค้า, ...) คอลัมน์ที่ไม่มีในไฟล์หรือช่องที่ว่างจะไม่ทับค่าเดิมของสินค้าที่มีอยู่แล้ว
+จำนวนคงเหลือใช้เป็นยอดยกมาเฉพาะสินค้าใหม่ สินค้าเดิมต้องปรับสต็อกผ่าน
+การรับสินค้าหรือการแก้ไขสินค้าเพื่อให้มีประวัติความเคลื่อนไหว
+"""
+import csv
+import io
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import dashboard, search, stock, versions
+
+BATCH_SIZE = 1000
+FORMATS = ('csv', 'xlsx')
+
+FIELDS = ('code', 'name', 'category', 'description', 'unit', 'cost_price', 'selling_price', 'stock_quantity', 'min_stock')
+REQUIRED = ('code', 'name', 'cost_price', 'selling_price')
+# คอลัมน์ที่ไม่ทับค่าของสินค้าที่มีอยู่แล้ว
+CREATE_ONLY = ('stock_quantity',)
+
+
+class ImportFileError(Exception):
+    """ไฟล์นำเข้าไม่ถูกต้อง (ทั้งไฟล์)"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.categories_created = 0
+        self.errors = []
+
+    @property
+    def skipped(self):
+        return len(self.errors)
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    def __str__(self):
+        return f'เพิ่มใหม่ {self.created} รายการ, ปรับปรุง {self.updated} รายการ, ข้าม {self.skipped} แถว'
+
+
+def _columns():
+    from .models import Product
+
+    columns = {}
+    for name in FIELDS:
+        field = Product._meta.get_field(name)
+        columns[name] = name
+        columns[str(field.verbose_name)] = name
+    return columns
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # รหัส/บาร์โค้ดตัวเลขใน Excel ถูกเก็บเป็น float
+        value = int(value)
+    return str(value).strip()
+
+
+def _csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    except UnicodeDecodeError:
+        # เช่น CSV ที่ Excel บันทึกเป็น Windows-874/TIS-620 (แถวก่อนหน้าที่บันทึกแล้วยังคงอยู่)
+        raise ImportFileError('ไฟล์ CSV ต้องเข้ารหัส UTF-8 (ใน Excel ให้บันทึกเป็น "CSV UTF-8")')
+    finally:
+        text.detach()
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('การนำเข้า XLSX ต้องติดตั้ง openpyxl (pip install openpyxl)')
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'อ่านไฟล์ XLSX ไม่ได้: {e}')
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def detect_format(filename):
+    ext = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if ext not in FORMATS:
+        raise ImportFileError(f'ไม่รองรับไฟล์ .{ext} (รองรับ CSV และ XLSX)')
+    return ext
+
+
+def read_rows(fileobj, fmt):
+    """คืน (หัวตาราง, generator ของ (เลขแถว, {field: ข้อความ}))"""
+    rows = _csv_rows(fileobj) if fmt == 'csv' else _xlsx_rows(fileobj)
+    columns = _columns()
+    header = next(rows, None)
+    if not header:
+        raise ImportFileError('ไม่พบหัวตารางในไฟล์')
+    fields = [columns.get(_cell(name)) for name in header]
+    missing = [name for name in REQUIRED if name not in fields]
+    if missing:
+        raise ImportFileError(f'ไม่พบคอลัมน์ที่จำเป็น: {", ".join(missing)}')
+
+    def generate():
+        for line, row in enumerate(rows, start=2):
+            values = {field: _cell(value) for field, value in zip(fields, row) if field}
+            if any(values.values()):
+                yield line, values
+    return [field for field in fields if field], generate()
+
+
+def _clean(values):
+    """ตรวจสอบค่าในแถวด้วย field ของโมเดล คืน {field: ค่า} หรือ raise ValidationError"""
+    from .models import Product
+
+    cleaned, errors = {}, []
+    for name, raw in values.items():
+        # ช่องว่างไม่ทับค่าเดิมของสินค้าที่มีอยู่แล้ว (สินค้าใหม่ใช้ค่าเริ่มต้น)
+        if raw == '' and name not in REQUIRED:
+            continue
+        if name == 'category':
+            cleaned[name] = raw
+            continue
+        field = Product._meta.get_field(name)
+        try:
+            cleaned[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors.append(f'{field.verbose_name}: {" ".join(e.messages)}')
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def _categories(names, create, result):
+    """ค้นหมวดหมู่ตามชื่อด้วย query เดียว (สร้างหมวดหมู่ที่ยังไม่มีถ้า create=True)"""
+    from .models import Category
+
+    if not names:
+        return {}
+    found = {}
+    for pk, name in Category.objects.filter(name__in=names).order_by('-pk').values_list('pk', 'name'):
+        found[name] = pk
+    missing = [name for name in names if name not in found]
+    if missing and create:
+        Category.objects.bulk_create([Category(name=name) for name in missing])
+        result.categories_created += len(missing)
+        found.update(Category.objects.filter(name__in=missing).values_list('name', 'pk'))
+    return found
+
+
+def _upsert(products, existing, update_fields):
+    """เพิ่มสินค้าใหม่และปรับ update_fields ของสินค้าที่มีรหัสอยู่แล้ว existing = {รหัส: pk}"""
+    from .models import Product
+
+    if connection.features.supports_update_conflicts_with_target:
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['code'],
+            update_fields=update_fields,
+        )
+        return
+    new = [product for product in products if product.code not in existing]
+    old = [product for product in products if product.code in existing]
+    for product in old:
+        product.pk = existing[product.code]
+    Product.objects.bulk_create(new)
+    Product.objects.bulk_update(old, update_fields)
+
+
+def _save_batch(batch, fields, create_categories, result):
+    from .models import Product, StockMovement
+
+    # รหัสซ้ำในกลุ่มเดียวกัน ใช้แถวหลังสุด
+    rows = {}
+    for line, cleaned in batch:
+        rows[cleaned['code']] = (line, cleaned)
+
+    category_ids = _categories({c['category'] for _, c in rows.values() if c.get('category')}, create_categories, result)
+    now = timezone.now()
+    # แถวที่มีช่องว่างต่างกันถูกบันทึกแยกกลุ่ม แต่ละกลุ่มปรับเฉพาะคอลัมน์ที่มีค่า
+    groups = {}
+    for line, cleaned in rows.values():
+        values = dict(cleaned)
+        category = values.pop('category', '')
+        if category:
+            if category not in category_ids:
+                result.error(line, f'ไม่พบหมวดหมู่ "{category}"')
+                continue
+            values['category_id'] = category_ids[category]
+        # ต้นทุนเฉลี่ยเริ่มจากราคาทุน (สินค้าเดิมไม่ถูกแก้ เพราะไม่อยู่ใน update_fields)
+        product = Product(updated_at=now, average_cost=values.get('cost_price') or 0, **values)
+        groups.setdefault(frozenset(cleaned), []).append(product)
+    products = [product for group in groups.values() for product in group]
+    if not products:
+        return
+
+    codes = [product.code for product in products]
+
+    with transaction.atomic():
+        existing = dict(Product.objects.filter(code__in=codes).values_list('code', 'pk'))
+        for present, group in groups.items():
+            update_fields = [
+                name for name in fields if name in present and name not in ('code',) + CREATE_ONLY
+            ] + ['updated_at']
+            _upsert(group, existing, update_fields)
+
+        # bulk_create ไม่คืน pk ของแถวที่ถูก update ในทุกฐานข้อมูล จึงอ่าน pk จากรหัส
+        pks = dict(Product.objects.filter(code__in=codes).values_list('code', 'pk'))
+        for product in products:
+            product.pk = pks[product.code]
+
+        # ยอดยกมาของสินค้าใหม่
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=product.pk, kind='adjustment', quantity=product.stock_quantity)
+            for product in products
+            if product.code not in existing and product.stock_quantity
+        ])
+        # bulk_create ไม่เรียก Product.save() จึงทำดัชนีค้นหาและสถานะสต็อกต่ำของทั้งกลุ่มที่นี่
+        search.index_products(products)
+        stock.refresh_low_stock(Product.objects.filter(pk__in=[product.pk for product in products]))
+    result.updated += sum(1 for code in codes if code in existing)
+    result.created += sum(1 for code in codes if code not in existing)
+
+
+def import_products(fileobj, fmt, batch_size=BATCH_SIZE, create_categories=True):
+    """นำเข้าสินค้าจากไฟล์ คืนค่า ImportResult"""
+    from .models import Category, Product
+
+    result = ImportResult()
+    fields, rows = read_rows(fileobj, fmt)
+
+    batch = []
+    for line, values in rows:
+        try:
+            batch.append((line, _clean(values)))
+        except ValidationError as e:
+            result.error(line, ', '.join(e.messages))
+            continue
+        if len(batch) >= batch_size:
+            _save_batch(batch, fields, create_categories, result)
+            batch = []
+    if batch:
+        _save_batch(batch, fields, create_categories, result)
+
+    result.errors.sort()
+    if result.created or result.updated:
+        dashboard.invalidate('low_stock', 'top_products')
+        versions.bump(Product, Category)
+    return result
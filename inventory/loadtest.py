@@ -0,0 +1,169 @@
+"""จำลองเครื่องขายหน้าร้าน (POS) หลายเครื่องขายพร้อมกันผ่าน HTTP
+
+ใช้โดยคำสั่ง loadtest_checkout ไฟล์นี้ใช้เฉพาะ standard library และไม่ import
+Django เพื่อให้ process ลูก (multiprocessing แบบ spawn) เริ่มได้เร็วและไม่ต้อง
+ตั้งค่า Django
+
+เครื่องขายแต่ละเครื่อง (Till) ล็อกอินด้วย session ของตัวเอง แล้วขายซ้ำ ๆ
+ด้วยหนึ่งในสองแบบ:
+- form: สร้างใบเสร็จ (sale_create) แล้วเพิ่มสินค้าทีละรายการในหน้า sale_detail
+- api: ส่งตะกร้าทั้งใบไปที่ /api/sales/checkout/ ในคำขอเดียว
+"""
+import http.cookiejar
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+MODES = ('form', 'api', 'mixed')
+SALE_PATH = re.compile(r'/sales/(\d+)/$')
+
+
+class LoadTestError(Exception):
+    pass
+
+
+class Till:
+    """เครื่องขายหนึ่งเครื่อง (session และ cookie ของตัวเอง)"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def _csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, method, path, form=None, body=None):
+        """ส่งคำขอ (ตาม redirect) คืนค่า (status, เนื้อหา, URL สุดท้าย, เวลาที่ใช้)"""
+        headers = {}
+        data = None
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if method == 'POST':
+            headers['X-CSRFToken'] = self._csrf_token()
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                content = response.read()
+                return response.status, content, response.url, time.perf_counter() - start
+        except urllib.error.HTTPError as e:
+            content = e.read()
+            return e.code, content, e.url, time.perf_counter() - start
+
+    def login(self, username, password):
+        self.request('GET', '/login/')
+        status, _, url, _ = self.request('POST', '/login/', form={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self._csrf_token(),
+        })
+        if status != 200 or urllib.parse.urlparse(url).path.rstrip('/').endswith('login'):
+            raise LoadTestError(f'ล็อกอินด้วยผู้ใช้ {username} ไม่สำเร็จ')
+
+
+def _pick_items(rng, products, cum_weights, max_items):
+    picked = rng.choices(products, cum_weights=cum_weights, k=rng.randint(1, max_items))
+    return [(product, rng.choice((1, 1, 1, 2, 3))) for product in {p[0]: p for p in picked}.values()]
+
+
+def _sell_form(till, rng, items, records):
+    status, _, url, elapsed = till.request('POST', '/sales/create/', form={
+        'sale_date': datetime.now().strftime('%Y-%m-%dT%H:%M'),
+        'customer_name': '',
+        'discount': '0',
+        'payment_method': 'cash',
+        'note': 'loadtest',
+    })
+    records.append(('sale_create', status, elapsed))
+    match = SALE_PATH.search(urllib.parse.urlparse(url).path)
+    if status != 200 or match is None:
+        return None
+    sale_path = match.group(0)
+    for (pk, _, price), quantity in items:
+        status, _, _, elapsed = till.request('POST', sale_path, form={
+            'product': pk,
+            'quantity': quantity,
+            'unit_price': price,
+        })
+        records.append(('sale_detail_add', status, elapsed))
+    return int(match.group(1))
+
+
+def _sell_api(till, rng, items, records):
+    status, content, _, elapsed = till.request('POST', '/api/sales/checkout/', body={
+        'items': [{'product': pk, 'quantity': quantity} for (pk, _, _), quantity in items],
+        'payment_method': rng.choice(('cash', 'transfer')),
+        'note': 'loadtest',
+    })
+    records.append(('checkout_api', status, elapsed))
+    if status == 201:
+        return json.loads(content)['sale_number']
+    return None
+
+
+def run_tills(base_url, username, password, tills, sessions, duration, products, mode, max_items, seed):
+    """รันเครื่องขาย tills เครื่องพร้อมกัน (thread ละเครื่อง) ใน process นี้
+
+    products เป็น [(pk, code, ราคา)] เรียงจากขายดีที่สุด แต่ละเครื่องขาย sessions ใบ
+    หรือจนครบ duration วินาที คืนค่า {'records': [(ขั้นตอน, status, วินาที)],
+    'sale_ids': [...], 'sale_numbers': [...], 'errors': [...]}
+    """
+    cum_weights, total = [], 0.0
+    for rank in range(1, len(products) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+    deadline = time.monotonic() + duration if duration else None
+    result = {'records': [], 'sale_ids': [], 'sale_numbers': [], 'errors': []}
+    lock = threading.Lock()
+    ready = threading.Barrier(tills)
+
+    def work(index):
+        rng = random.Random(f'{seed}-{index}')
+        till = Till(base_url)
+        records, sale_ids, sale_numbers = [], [], []
+        try:
+            till.login(username, password)
+            ready.wait()
+            for _ in range(sessions):
+                if deadline and time.monotonic() > deadline:
+                    break
+                items = _pick_items(rng, products, cum_weights, max_items)
+                flow = rng.choice(('form', 'api')) if mode == 'mixed' else mode
+                if flow == 'form':
+                    sale_id = _sell_form(till, rng, items, records)
+                    if sale_id is not None:
+                        sale_ids.append(sale_id)
+                else:
+                    sale_number = _sell_api(till, rng, items, records)
+                    if sale_number is not None:
+                        sale_numbers.append(sale_number)
+        except (LoadTestError, OSError, threading.BrokenBarrierError) as e:
+            with lock:
+                result['errors'].append(f'till {index}: {e}')
+            ready.abort()
+        with lock:
+            result['records'].extend(records)
+            result['sale_ids'].extend(sale_ids)
+            result['sale_numbers'].extend(sale_numbers)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(tills)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result
@@ -0,0 +1,32 @@
+"""ค้นหาสินค้าจากรหัส/บาร์โค้ดสำหรับเครื่องสแกนหน้าร้าน
+
+ค้นจากฐานข้อมูลโดยตรงด้วย query เดียวบน unique index ของรหัสสินค้า
+ไม่มีดัชนีในหน่วยความจำ จึงได้ราคา/สต็อกล่าสุดและไม่ล้าสมัยระหว่าง worker
+"""
+
+FIELDS = ('pk', 'code', 'name', 'unit', 'selling_price', 'stock_quantity')
+
+
+def normalize(code):
+    return (code or '').strip()
+
+
+def _serialize(row):
+    return {
+        'id': row['pk'],
+        'code': row['code'],
+        'name': row['name'],
+        'unit': row['unit'],
+        'selling_price': str(row['selling_price']),
+        'stock_quantity': row['stock_quantity'],
+    }
+
+
+def lookup(codes):
+    """คืน {รหัส: ข้อมูลสินค้า} ของรหัสที่พบ (รหัสที่ไม่พบจะไม่อยู่ในผลลัพธ์)"""
+    from .models import Product
+
+    codes = [code for code in dict.fromkeys(normalize(code) for code in codes) if code]
+    if not codes:
+        return {}
+    return {row['code']: _serialize(row) for row in Product.objects.filter(code__in=codes).values(*FIELDS)}
@@ -0,0 +1,111 @@
+import asyncio
+import math
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.utils import timezone
+
+from inventory import dashboard, views
+
+
+class Command(BaseCommand):
+    help = 'เปรียบเทียบ latency (p50/p99) ของแดชบอร์ดและรายงาน ระหว่าง view แบบ sync และ async'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--warm', action='store_true', help='ไม่ล้างแคชแดชบอร์ดก่อนแต่ละ request')
+        parser.add_argument(
+            '--db-latency', type=float, default=0,
+            help='หน่วงเวลาต่อ query (ms) จำลองฐานข้อมูลที่อยู่คนละเครื่อง',
+        )
+
+    def _percentile(self, timings, pct):
+        ordered = sorted(timings)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000
+
+    def _request(self, user, path, params=None):
+        request = RequestFactory().get(path, params or {})
+        request.user = user
+
+        async def auser():
+            return user
+        request.auser = auser
+        return request
+
+    def _latency_wrapper(self, seconds):
+        def wrapper(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+        return wrapper
+
+    def _before(self, cold):
+        if cold:
+            dashboard.cache.delete_many([dashboard._key(name) for name in dashboard.TILES])
+
+    def _run_sync(self, view, request, repeat, cold):
+        timings = []
+        for _ in range(repeat):
+            self._before(cold)
+            start = time.perf_counter()
+            view(request)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    async def _run_async(self, view, request, repeat, cold):
+        timings = []
+        for _ in range(repeat):
+            self._before(cold)
+            start = time.perf_counter()
+            await view(request)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError('ต้องมีผู้ใช้อย่างน้อย 1 คน (python manage.py createsuperuser)')
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] == ':memory:':
+            raise CommandError('SQLite แบบ in-memory ใช้ connection ร่วมกันหลาย thread ไม่ได้')
+
+        today = timezone.localdate()
+        cases = [
+            ('dashboard', views.dashboard, views.dashboard_async, '/', None),
+            ('report_monthly', views.report_monthly, views.report_monthly_async, '/reports/monthly/',
+             {'year': today.year, 'month': today.month}),
+            ('report_yearly', views.report_yearly, views.report_yearly_async, '/reports/yearly/',
+             {'year': today.year}),
+        ]
+        repeat = options['repeat']
+        cold = not options['warm']
+        latency = options['db_latency'] / 1000
+
+        with ExitStack() as stack:
+            if latency:
+                # ทุก connection รวมถึงของ thread ที่ async view สร้างใหม่
+                from django.db.backends.signals import connection_created
+
+                wrapper = self._latency_wrapper(latency)
+
+                def add_latency(sender, connection, **kwargs):
+                    if wrapper not in connection.execute_wrappers:
+                        connection.execute_wrappers.append(wrapper)
+                connection_created.connect(add_latency, weak=False)
+                stack.callback(connection_created.disconnect, add_latency)
+                connections.close_all()
+
+            self.stdout.write(f'repeat={repeat} cold={cold} db_latency={options["db_latency"]}ms ({connection.vendor})')
+            for name, sync_view, async_view, path, params in cases:
+                request = self._request(user, path, params)
+                sync_view(request)
+                sync_timings = self._run_sync(sync_view, request, repeat, cold)
+                async_timings = asyncio.run(self._run_async(async_view, request, repeat, cold))
+                self.stdout.write(self.style.MIGRATE_HEADING(f'== {name} =='))
+                for label, timings in (('sync', sync_timings), ('async', async_timings)):
+                    self.stdout.write(
+                        f'[{label:5}] p50 {self._percentile(timings, 50):7.2f} ms   '
+                        f'p99 {self._percentile(timings, 99):7.2f} ms'
+                    )
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory import periods
+from inventory.models import Sale, Purchase, Expense
+
+
+class Command(BaseCommand):
+    help = 'เปรียบเทียบแผนการ query และเวลา ระหว่างการกรอง field__date กับช่วงเวลาครึ่งเปิด'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None)
+        parser.add_argument('--month', type=int, default=None)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def _time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2] * 1000
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        year = options['year'] or today.year
+        month = options['month'] or today.month
+        period = periods.month(year, month)
+        start, end = period.start_date, period.end_date
+
+        cases = [
+            (
+                'ยอดขายรายเดือน',
+                Sale.objects.filter(sale_date__date__gte=start, sale_date__date__lt=end),
+                Sale.objects.filter(**period.filter('sale_date')),
+            ),
+            (
+                'ต้นทุนที่รับสินค้าแล้ว',
+                Purchase.objects.filter(received_date__date__gte=start, received_date__date__lt=end, status='received'),
+                Purchase.objects.filter(status='received', **period.filter('received_date')),
+            ),
+            (
+                'ใบสั่งซื้อตามวันที่สั่ง',
+                Purchase.objects.filter(purchase_date__date__gte=start, purchase_date__date__lt=end),
+                Purchase.objects.filter(**period.filter('purchase_date')),
+            ),
+            (
+                'รายจ่ายรายเดือน',
+                Expense.objects.filter(expense_date__date__gte=start, expense_date__date__lt=end),
+                Expense.objects.filter(**period.filter('expense_date')),
+            ),
+        ]
+
+        repeat = options['repeat']
+        for label, old, new in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label} ({year}-{month:02d}) =='))
+            for name, queryset in (('field__date', old), ('ช่วงเวลา', new)):
+                plan = queryset.order_by().explain()
+                self.stdout.write(f'[{name}] {self._time(queryset.order_by(), repeat):.2f} ms (median)')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
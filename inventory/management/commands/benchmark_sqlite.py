@@ -0,0 +1,164 @@
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+PROFILES = {
+    'default': '0',
+    'production': '1',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'เปรียบเทียบ throughput และ latency ของการขาย (เขียน) พร้อมกับรายงาน/ส่งออก (อ่าน) บน SQLite '
+        'ระหว่างค่าเริ่มต้น และ SQLITE_PRODUCTION=1 (WAL, busy_timeout ฯลฯ)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10, help='เวลาที่วัดต่อโปรไฟล์ (วินาที)')
+        parser.add_argument('--writers', type=int, default=4, help='จำนวน thread ที่ขายสินค้า')
+        parser.add_argument('--readers', type=int, default=4, help='จำนวน thread ที่เปิดรายงานและส่งออกข้อมูล')
+        parser.add_argument('--sales', type=int, default=10000, help='ขนาดข้อมูลจำลอง (จำนวนการขาย)')
+        parser.add_argument('--worker', choices=PROFILES, help=argparse.SUPPRESS)
+
+    def _percentile(self, timings, pct):
+        if not timings:
+            return 0.0
+        ordered = sorted(timings)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000
+
+    # ---------- process ลูก: วัดหนึ่งโปรไฟล์บนไฟล์ฐานข้อมูลใหม่ ----------
+    def _work(self, options):
+        from inventory import exports, reports, synthetic
+        from inventory.checkout import checkout
+        from inventory.models import Product
+
+        call_command('migrate', verbosity=0)
+        synthetic.generate(
+            products=max(200, options['sales'] // 10),
+            sales=options['sales'],
+            purchases=options['sales'] // 20,
+            expenses=options['sales'] // 50,
+        )
+        Product.objects.update(stock_quantity=10 ** 6)
+        product_ids = list(Product.objects.values_list('pk', flat=True))
+        connection.close()
+
+        today = timezone.localdate()
+        readers = (
+            lambda: reports.monthly(today.year, today.month),
+            lambda: reports.yearly(today.year),
+            lambda: sum(1 for _ in exports.rows('sales', {})),
+        )
+        results = {'write': [], 'read': [], 'errors': {}}
+        lock = threading.Lock()
+        start = threading.Barrier(options['writers'] + options['readers'])
+        deadline = []
+
+        def run(kind, index):
+            rng = random.Random(index)
+            timings, errors = [], {}
+            try:
+                start.wait()
+                if not deadline:
+                    deadline.append(time.monotonic() + options['duration'])
+                while time.monotonic() < deadline[0]:
+                    began = time.perf_counter()
+                    try:
+                        if kind == 'write':
+                            checkout({'items': [
+                                {'product': pk, 'quantity': 1}
+                                for pk in rng.sample(product_ids, rng.randint(1, 3))
+                            ]})
+                        else:
+                            readers[rng.randrange(len(readers))]()
+                    except OperationalError as e:
+                        errors[str(e)] = errors.get(str(e), 0) + 1
+                        continue
+                    timings.append(time.perf_counter() - began)
+            finally:
+                connection.close()
+            with lock:
+                results[kind].extend(timings)
+                for message, count in errors.items():
+                    results['errors'][message] = results['errors'].get(message, 0) + count
+
+        threads = [threading.Thread(target=run, args=('write', i)) for i in range(options['writers'])]
+        threads += [threading.Thread(target=run, args=('read', 1000 + i)) for i in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        summary = {'errors': results['errors']}
+        for kind in ('write', 'read'):
+            timings = results[kind]
+            summary[kind] = {
+                'ops': len(timings),
+                'per_second': len(timings) / options['duration'],
+                'p50_ms': self._percentile(timings, 50),
+                'p99_ms': self._percentile(timings, 99),
+            }
+        self.stdout.write(json.dumps(summary))
+
+    # ---------- process หลัก: รันแต่ละโปรไฟล์แยก process ----------
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self._work(options)
+        if options['writers'] < 1 or options['readers'] < 0:
+            raise CommandError('--writers ต้องมีอย่างน้อย 1')
+
+        path = Path(settings.BASE_DIR) / 'var' / 'benchmark-sqlite.sqlite3'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.stdout.write(
+            f'writers={options["writers"]} readers={options["readers"]} '
+            f'sales={options["sales"]} duration={options["duration"]}s'
+        )
+        for profile, flag in PROFILES.items():
+            files = [path, Path(f'{path}-wal'), Path(f'{path}-shm')]
+            for name in files:
+                name.unlink(missing_ok=True)
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', SQLITE_PRODUCTION=flag)
+            env.pop('DATABASE_REPLICA_URL', None)
+            try:
+                completed = subprocess.run(
+                    [
+                        sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'benchmark_sqlite',
+                        '--worker', profile,
+                        '--duration', str(options['duration']),
+                        '--writers', str(options['writers']),
+                        '--readers', str(options['readers']),
+                        '--sales', str(options['sales']),
+                    ],
+                    env=env, capture_output=True, text=True,
+                )
+            finally:
+                for name in files:
+                    name.unlink(missing_ok=True)
+            if completed.returncode:
+                raise CommandError(f'โปรไฟล์ {profile} ล้มเหลว:\n{completed.stderr}')
+            summary = json.loads(completed.stdout.strip().splitlines()[-1])
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {profile} (SQLITE_PRODUCTION={flag}) =='))
+            for kind, label in (('write', 'ขาย'), ('read', 'รายงาน')):
+                result = summary[kind]
+                self.stdout.write(
+                    f'  {label:7} {result["per_second"]:8.1f} ครั้ง/วินาที  '
+                    f'p50 {result["p50_ms"]:7.1f} ms  p99 {result["p99_ms"]:8.1f} ms'
+                )
+            for message, count in summary['errors'].items():
+                self.stdout.write(self.style.WARNING(f'  ผิดพลาด {count} ครั้ง: {message}'))
+        self.stdout.write(self.style.SUCCESS('วัดเวลาเรียบร้อยแล้ว'))
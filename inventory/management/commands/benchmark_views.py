@@ -0,0 +1,252 @@
+import json
+import math
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from inventory import exports, synthetic, urls
+from inventory.models import Product, Purchase, Sale
+
+# view ที่แก้ไขข้อมูล (ทำให้ข้อมูลของรอบถัดไปไม่เหมือนเดิม) หรือไม่ได้วัดเวลาของ view เอง
+SKIP = {
+    'login', 'logout',
+    'product_delete', 'purchase_item_delete', 'sale_item_delete', 'purchase_receive', 'sale_checkout',
+    # PDF สร้างใน worker pool แล้วเก็บเป็นไฟล์ (ดู documents.py)
+    'sale_pdf', 'purchase_pdf', 'report_monthly_pdf', 'report_yearly_pdf',
+}
+# โมเดลที่ใช้เลือก pk ให้ URL ที่มี <int:pk>
+PK_MODELS = {
+    'product_update': Product,
+    'purchase_detail': Purchase,
+    'sale_detail': Sale,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'จับเวลาทุก URL ใน inventory/urls.py บนข้อมูลจำลองหลายขนาด '
+        'แล้วเขียนผลเป็น JSON สำหรับเปรียบเทียบระหว่าง commit'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000',
+            help='จำนวนการขายของข้อมูลแต่ละชุด คั่นด้วยจุลภาค (สินค้า ใบสั่งซื้อ รายจ่าย ปรับตามสัดส่วน)',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='ไฟล์ JSON สำหรับบันทึกผล')
+        parser.add_argument('--compare', help='ไฟล์ JSON ของรอบก่อน เพื่อแสดงเปอร์เซ็นต์ที่เปลี่ยนไป')
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help='วัดบนฐานข้อมูลปัจจุบันโดยไม่สร้างข้อมูลจำลอง (ไม่สนใจ --sizes)',
+        )
+        parser.add_argument('--keepdb', action='store_true', help='ไม่ลบฐานข้อมูลทดสอบหลังวัดเสร็จ')
+
+    # ---------- ข้อมูล ----------
+    def _dataset(self, sales, seed):
+        return {
+            'products': max(200, sales // 10),
+            'sales': sales,
+            'purchases': max(20, sales // 20),
+            'expenses': max(30, sales // 50),
+            'years': 2,
+            'seed': seed,
+        }
+
+    def _create_test_db(self, keepdb):
+        if connection.vendor == 'sqlite':
+            # ใช้ไฟล์แทน in-memory เพื่อให้เวลาใกล้กับการใช้งานจริง
+            path = Path(settings.BASE_DIR) / 'var' / 'benchmark.sqlite3'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            connection.settings_dict['TEST']['NAME'] = str(path)
+        # setup_databases ชี้ฐานข้อมูล replica (ถ้ามี) มาที่ฐานข้อมูลทดสอบด้วย
+        return setup_databases(verbosity=0, interactive=False, keepdb=keepdb, serialized_aliases=set())
+
+    # ---------- URL ----------
+    def _cases(self):
+        """คืนค่า [(ชื่อ, path, query params)] ของทุก URL ที่วัดได้"""
+        cases = []
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in SKIP:
+                continue
+            converters = pattern.pattern.converters
+            if 'pk' in converters:
+                model = PK_MODELS.get(pattern.name)
+                if model is None:
+                    self.stderr.write(f'ข้าม {pattern.name}: ไม่รู้ว่าจะใช้ pk ของโมเดลใด')
+                    continue
+                # ใช้แถวกลางตาราง ไม่ใช่แถวแรกที่อาจอยู่ในแคชของฐานข้อมูลมากกว่า
+                pks = model.objects.order_by('pk').values_list('pk', flat=True)
+                count = pks.count()
+                if not count:
+                    continue
+                cases.append((pattern.name, self._path(pattern, pk=pks[count // 2]), {}))
+            elif 'kind' in converters:
+                for kind in exports.EXPORTS:
+                    cases.append((f'{pattern.name}[{kind}]', self._path(pattern, kind=kind), {}))
+            elif pattern.name == 'product_lookup':
+                codes = list(Product.objects.order_by('?').values_list('code', flat=True)[:20])
+                cases.append((pattern.name, self._path(pattern), {'code': codes}))
+            else:
+                cases.append((pattern.name, self._path(pattern), {}))
+        return cases
+
+    def _path(self, pattern, **kwargs):
+        return reverse(pattern.name, kwargs=kwargs or None)
+
+    # ---------- การวัด ----------
+    def _get(self, client, path, params):
+        response = client.get(path, params)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response
+
+    def _percentile(self, timings, pct):
+        ordered = sorted(timings)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000
+
+    def _measure(self, client, path, params, repeat):
+        for _ in range(2):
+            self._get(client, path, params)
+        # นับด้วย execute wrapper เพราะ request_started ล้าง connection.queries ทุก request
+        queries = []
+        with ExitStack() as stack:
+            # ทุกฐานข้อมูล รวมถึง replica ของรายงานและการส่งออก
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(
+                    lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+                ))
+            response = self._get(client, path, params)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self._get(client, path, params)
+            timings.append(time.perf_counter() - start)
+        return {
+            'status': response.status_code,
+            'queries': len(queries),
+            'p50_ms': round(self._percentile(timings, 50), 3),
+            'p95_ms': round(self._percentile(timings, 95), 3),
+            'p99_ms': round(self._percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        }
+
+    def _run(self, user, repeat):
+        from django.test import Client
+
+        client = Client()
+        client.force_login(user)
+        results = {}
+        for name, path, params in self._cases():
+            results[name] = result = self._measure(client, path, params, repeat)
+            self.stdout.write(
+                f'  {name:28} {result["status"]}  p50 {result["p50_ms"]:8.2f} ms  '
+                f'p95 {result["p95_ms"]:8.2f} ms  queries {result["queries"]:4}'
+            )
+        return results
+
+    # ---------- รายงาน ----------
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def _compare(self, report, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                old = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'อ่านไฟล์ {path} ไม่ได้: {e}')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'== เทียบกับ {old.get("commit") or path} (p50, ค่าลบคือเร็วขึ้น) =='
+        ))
+        for size, run in report['sizes'].items():
+            old_views = old.get('sizes', {}).get(size, {}).get('views')
+            if old_views is None:
+                self.stdout.write(f'[{size}] ไม่มีข้อมูลขนาดนี้ในไฟล์เดิม')
+                continue
+            for name, result in run['views'].items():
+                before = old_views.get(name)
+                if not before or not before['p50_ms']:
+                    continue
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+                line = (
+                    f'[{size}] {name:28} {before["p50_ms"]:8.2f} -> {result["p50_ms"]:8.2f} ms '
+                    f'({change:+6.1f}%)  queries {before["queries"]} -> {result["queries"]}'
+                )
+                if change > 10:
+                    line = self.style.WARNING(line)
+                self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError('--sizes ต้องเป็นตัวเลขคั่นด้วยจุลภาค เช่น 1000,10000')
+        repeat = max(1, options['repeat'])
+
+        report = {
+            'commit': self._commit(),
+            'created': timezone.now().isoformat(timespec='seconds'),
+            'vendor': connection.vendor,
+            'repeat': repeat,
+            'sizes': {},
+        }
+
+        setup_test_environment()
+        old_config = None
+        try:
+            if options['current_db']:
+                user = User.objects.filter(is_active=True, is_superuser=True).first()
+                if user is None:
+                    raise CommandError('ต้องมีผู้ดูแลระบบอย่างน้อย 1 คน (python manage.py createsuperuser)')
+                self.stdout.write(self.style.MIGRATE_HEADING('== ฐานข้อมูลปัจจุบัน =='))
+                report['sizes']['current'] = {'data': {}, 'views': self._run(user, repeat)}
+            else:
+                old_config = self._create_test_db(options['keepdb'])
+                user, _ = User.objects.get_or_create(
+                    username='benchmark', defaults={'is_staff': True, 'is_superuser': True},
+                )
+                for size in sizes:
+                    dataset = self._dataset(size, options['seed'])
+                    synthetic.clear()
+                    cache.clear()
+                    start = time.perf_counter()
+                    counts = synthetic.generate(**dataset)
+                    self.stdout.write(self.style.MIGRATE_HEADING(
+                        f'== sales={size} (สร้างข้อมูล {time.perf_counter() - start:.1f} วินาที) =='
+                    ))
+                    report['sizes'][str(size)] = {'data': counts, 'views': self._run(user, repeat)}
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self._compare(report, options['compare'])
+        self.stdout.write(self.style.SUCCESS(
+            'วัดเวลาเรียบร้อยแล้ว' + (f' บันทึกผลที่ {options["output"]}' if options['output'] else '')
+        ))
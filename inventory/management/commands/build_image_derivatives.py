@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from inventory import images
+from inventory.models import Product
+
+
+class Command(BaseCommand):
+    help = 'สร้างรูปย่อ (WebP/JPEG) ของรูปสินค้าที่มีอยู่แบบขนาน'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='จำนวน process (ค่าเริ่มต้น = จำนวน CPU)')
+        parser.add_argument('--missing-only', action='store_true', help='เฉพาะสินค้าที่ยังไม่มีรูปย่อ')
+        parser.add_argument('--force', action='store_true', help='สร้างรูปย่อใหม่แม้มีอยู่แล้ว')
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(image_hash='')
+
+        def report(pk, image_hash, error):
+            if error:
+                self.stderr.write(f'สินค้า #{pk}: {error}')
+
+        done, failed = images.backfill(
+            queryset,
+            workers=options['workers'],
+            force=options['force'],
+            on_result=report,
+        )
+        self.stdout.write(self.style.SUCCESS(f'สร้างรูปย่อ {done} รายการเรียบร้อยแล้ว (ผิดพลาด {failed} รายการ)'))
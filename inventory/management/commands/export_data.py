@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import exports
+
+
+class Command(BaseCommand):
+    help = 'ส่งออกข้อมูลการขาย (รายการสินค้า) การนำเข้า หรือรายจ่าย เป็น CSV/XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='ไฟล์ปลายทาง (ค่าเริ่มต้น: stdout สำหรับ CSV)')
+        parser.add_argument('--date-from', help='YYYY-MM-DD')
+        parser.add_argument('--date-to', help='YYYY-MM-DD (รวมวันนี้)')
+        parser.add_argument('--status', help='สถานะใบสั่งซื้อ (purchases)')
+        parser.add_argument('--category', help='ประเภทรายจ่าย (expenses)')
+
+    def handle(self, *args, **options):
+        params = {
+            key: options[key]
+            for key in ('date_from', 'date_to', 'status', 'category')
+            if options[key]
+        }
+        if options['format'] == 'xlsx' and not options['output']:
+            raise CommandError('การส่งออก XLSX ต้องระบุ --output')
+
+        rows = exports.rows(options['kind'], params)
+        try:
+            if options['output']:
+                with open(options['output'], 'wb') as fileobj:
+                    if options['format'] == 'xlsx':
+                        exports.write_xlsx(rows, fileobj, title=options['kind'])
+                    else:
+                        exports.write_csv(rows, fileobj)
+                self.stderr.write(self.style.SUCCESS(f"ส่งออกไปที่ {options['output']} เรียบร้อยแล้ว"))
+            else:
+                exports.write_csv(rows, sys.stdout.buffer)
+        except exports.ExportError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import synthetic
+
+
+class Command(BaseCommand):
+    help = 'สร้างข้อมูลจำลองของร้าน (สินค้า การขาย ใบสั่งซื้อ รายจ่าย) ตามจำนวนที่กำหนด สำหรับทดสอบประสิทธิภาพ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--sales', type=int, default=10000)
+        parser.add_argument('--purchases', type=int, default=500)
+        parser.add_argument('--expenses', type=int, default=200)
+        parser.add_argument('--years', type=float, default=2, help='ช่วงเวลาย้อนหลังที่กระจายข้อมูล (ปี)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--clear', action='store_true', help='ลบข้อมูลเดิมของร้านทั้งหมดก่อน (ไม่รวมผู้ใช้)')
+
+    def handle(self, *args, **options):
+        if options['products'] < 1:
+            raise CommandError('--products ต้องมีอย่างน้อย 1')
+        if options['clear']:
+            synthetic.clear()
+        elif synthetic.has_data():
+            raise CommandError('ฐานข้อมูลมีข้อมูลอยู่แล้ว ใช้ --clear เพื่อลบข้อมูลเดิมก่อน')
+
+        start = time.perf_counter()
+        counts = synthetic.generate(
+            products=options['products'],
+            sales=options['sales'],
+            purchases=options['purchases'],
+            expenses=options['expenses'],
+            years=options['years'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - start
+        summary = ', '.join(f'{name} {count}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'สร้างข้อมูลจำลองเรียบร้อยแล้ว: {summary} ({elapsed:.1f} วินาที)'))
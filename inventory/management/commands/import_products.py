@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import imports
+
+
+class Command(BaseCommand):
+    help = 'นำเข้า/ปรับปรุงสินค้าจากไฟล์ CSV หรือ XLSX (upsert ตามรหัสสินค้า)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=imports.FORMATS, help='ค่าเริ่มต้น: ตามนามสกุลไฟล์')
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+        parser.add_argument('--no-create-categories', action='store_true', help='ข้ามแถวที่หมวดหมู่ยังไม่มีในระบบ')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            fmt = options['format'] or imports.detect_format(options['path'])
+            with open(options['path'], 'rb') as fileobj:
+                result = imports.import_products(
+                    fileobj,
+                    fmt,
+                    batch_size=options['batch_size'],
+                    create_categories=not options['no_create_categories'],
+                )
+        except (OSError, imports.ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for line, message in result.errors:
+            self.stderr.write(f'แถว {line}: {message}')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'นำเข้าสินค้าเรียบร้อยแล้ว: {result} ({elapsed:.1f} วินาที)'))
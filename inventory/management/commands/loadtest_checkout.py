@@ -0,0 +1,258 @@
+import math
+import multiprocessing
+import secrets
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.test.testcases import LiveServerThread
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+
+from inventory import loadtest, synthetic
+from inventory.models import Product, Purchase, PurchaseItem, Sale, SaleItem, StockMovement, Supplier
+
+
+class Command(BaseCommand):
+    help = (
+        'ทดสอบโหลดการขายหน้าร้านหลายเครื่องพร้อมกัน (sale_create -> sale_detail และ checkout API) '
+        'รายงาน throughput/latency แล้วตรวจว่าสต็อกและเลขที่ใบเสร็จถูกต้อง'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tills', type=int, default=16, help='จำนวนเครื่องขายพร้อมกัน')
+        parser.add_argument('--processes', type=int, default=2, help='จำนวน process ที่แบ่งเครื่องขายไปรัน (0 = process นี้)')
+        parser.add_argument('--sessions', type=int, default=25, help='จำนวนใบเสร็จต่อเครื่อง')
+        parser.add_argument('--duration', type=float, default=0, help='หยุดเมื่อครบเวลา (วินาที) แม้ยังขายไม่ครบ')
+        parser.add_argument('--mode', choices=loadtest.MODES, default='mixed')
+        parser.add_argument('--hot', type=int, default=20, help='จำนวนสินค้าขายดีที่ทุกเครื่องแย่งกันขาย')
+        parser.add_argument('--max-items', type=int, default=5, help='จำนวนรายการสินค้าสูงสุดต่อใบเสร็จ')
+        parser.add_argument('--restocks', type=int, default=10, help='จำนวนใบสั่งซื้อที่รับสินค้าเข้าระหว่างทดสอบ')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--url',
+            help='ทดสอบกับเซิร์ฟเวอร์ที่รันอยู่แล้ว (ต้องใช้ฐานข้อมูลเดียวกับ settings นี้) '
+                 'ค่าเริ่มต้น: เปิดเซิร์ฟเวอร์ในตัวบนฐานข้อมูลทดสอบพร้อมข้อมูลจำลอง',
+        )
+        parser.add_argument('--username', help='ผู้ใช้สำหรับ --url')
+        parser.add_argument('--password', help='รหัสผ่านสำหรับ --url')
+
+    # ---------- การเตรียมข้อมูล ----------
+    def _create_test_db(self):
+        if connection.vendor == 'sqlite':
+            # in-memory ใช้ร่วมกับ thread ของเซิร์ฟเวอร์ไม่ได้ จึงใช้ไฟล์
+            path = Path(settings.BASE_DIR) / 'var' / 'loadtest.sqlite3'
+            path.parent.mkdir(parents=True, exist_ok=True)
+            connection.settings_dict['TEST']['NAME'] = str(path)
+        # setup_databases ชี้ฐานข้อมูล replica (ถ้ามี) มาที่ฐานข้อมูลทดสอบด้วย
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+        synthetic.generate(products=300, sales=2000, purchases=100, expenses=50, seed=1)
+        return old_config
+
+    def _hot_products(self, count):
+        """สินค้าขายดีที่มีสต็อก เรียงตามยอดขาย 30 วัน"""
+        return [
+            (pk, code, str(price))
+            for pk, code, price in Product.objects.filter(stock_quantity__gt=0).order_by(
+                '-sales_stats__units_30d', 'pk'
+            ).values_list('pk', 'code', 'selling_price')[:count]
+        ]
+
+    def _create_restocks(self, products, count):
+        """ใบสั่งซื้อที่รอรับของสินค้าขายดี ให้รับเข้าระหว่างที่เครื่องขายกำลังขาย"""
+        supplier = Supplier.objects.order_by('pk').first() or Supplier.objects.create(name='ผู้จัดจำหน่ายทดสอบโหลด')
+        costs = dict(Product.objects.filter(pk__in=[pk for pk, _, _ in products]).values_list('pk', 'cost_price'))
+        ids = []
+        for n in range(count):
+            items = [
+                PurchaseItem(product_id=pk, quantity=12, unit_price=costs[pk], total_price=costs[pk] * 12)
+                for pk, _, _ in products[n % 2::2]
+            ]
+            with transaction.atomic():
+                purchase = Purchase.objects.create(
+                    supplier=supplier,
+                    status='pending',
+                    total_amount=sum(item.total_price for item in items),
+                    note='loadtest',
+                )
+                for item in items:
+                    item.purchase = purchase
+                PurchaseItem.objects.bulk_create(items)
+            ids.append(purchase.pk)
+        return ids
+
+    # ---------- การรับสินค้าระหว่างทดสอบ ----------
+    def _receiver(self, base_url, username, password, purchase_ids, interval, stop, records):
+        till = loadtest.Till(base_url)
+        till.login(username, password)
+        for pk in purchase_ids:
+            if stop.wait(interval):
+                break
+            status, _, _, elapsed = till.request('GET', reverse('purchase_receive', args=[pk]))
+            records.append(('purchase_receive', status, elapsed))
+
+    # ---------- การตรวจผล ----------
+    def _snapshot(self):
+        return {
+            'stock': dict(Product.objects.values_list('pk', 'stock_quantity')),
+            'last_sale': Sale.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+            'last_movement': StockMovement.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+        }
+
+    def _verify(self, before, restock_ids, result):
+        """คืนค่ารายการปัญหาที่พบ (ว่าง = ถูกต้อง)"""
+        problems = []
+        sales = Sale.objects.filter(pk__gt=before['last_sale'])
+
+        sold = defaultdict(int, SaleItem.objects.filter(sale__in=sales).values('product').annotate(
+            total=Sum('quantity')).values_list('product', 'total'))
+        received = defaultdict(int, PurchaseItem.objects.filter(
+            purchase_id__in=restock_ids, purchase__status='received'
+        ).values('product').annotate(total=Sum('quantity')).values_list('product', 'total'))
+        moved = defaultdict(int, StockMovement.objects.filter(pk__gt=before['last_movement']).values(
+            'product').annotate(total=Sum('quantity')).values_list('product', 'total'))
+
+        for pk, stock_quantity in Product.objects.values_list('pk', 'stock_quantity'):
+            expected = before['stock'].get(pk, 0) + received[pk] - sold[pk]
+            if stock_quantity != expected:
+                problems.append(f'สินค้า {pk}: สต็อก {stock_quantity} แต่ควรเป็น {expected}')
+            if stock_quantity < 0:
+                problems.append(f'สินค้า {pk}: สต็อกติดลบ ({stock_quantity})')
+            if moved[pk] != stock_quantity - before['stock'].get(pk, 0):
+                problems.append(f'สินค้า {pk}: ความเคลื่อนไหวสต็อกรวม {moved[pk]} ไม่ตรงกับสต็อกที่เปลี่ยนไป')
+
+        duplicates = Sale.objects.values('sale_number').annotate(n=Count('pk')).filter(n__gt=1)
+        for row in duplicates:
+            problems.append(f'เลขที่ใบเสร็จ {row["sale_number"]} ซ้ำ {row["n"]} ใบ')
+        observed = Counter(result['sale_numbers'])
+        for number, n in observed.items():
+            if n > 1:
+                problems.append(f'เครื่องขายได้รับเลขที่ใบเสร็จ {number} ซ้ำ {n} ครั้ง')
+
+        for sale in sales.annotate(items_total=Sum('items__total_price')):
+            if sale.total_amount != (sale.items_total or 0):
+                problems.append(f'ใบเสร็จ {sale.sale_number}: ยอดรวม {sale.total_amount} ไม่ตรงกับรายการ {sale.items_total}')
+        return problems, sales.count()
+
+    # ---------- รายงาน ----------
+    def _percentile(self, timings, pct):
+        ordered = sorted(timings)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000
+
+    def _report(self, records, elapsed, sale_count):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'== {sale_count} ใบเสร็จใน {elapsed:.1f} วินาที ({sale_count / elapsed:.1f} ใบ/วินาที) =='
+        ))
+        steps = defaultdict(list)
+        for step, status, seconds in records:
+            steps[step].append((status, seconds))
+        for step, rows in steps.items():
+            timings = [seconds for _, seconds in rows]
+            statuses = ' '.join(f'{status}×{n}' for status, n in sorted(Counter(s for s, _ in rows).items()))
+            self.stdout.write(
+                f'  {step:17} n={len(rows):5}  {len(rows) / elapsed:7.1f}/s  '
+                f'p50 {self._percentile(timings, 50):7.1f} ms  p95 {self._percentile(timings, 95):7.1f} ms  '
+                f'p99 {self._percentile(timings, 99):7.1f} ms  [{statuses}]'
+            )
+
+    def _run_tills(self, base_url, username, password, products, options):
+        tills, processes = options['tills'], options['processes']
+        args = (base_url, username, password)
+        common = (options['sessions'], options['duration'], products, options['mode'], options['max_items'])
+        if processes <= 0:
+            return loadtest.run_tills(*args, tills, *common, options['seed'])
+
+        # spawn: ไม่ fork process ที่มี thread ของเซิร์ฟเวอร์และ connection ฐานข้อมูลเปิดอยู่
+        shares = [tills // processes + (i < tills % processes) for i in range(processes)]
+        result = {'records': [], 'sale_ids': [], 'sale_numbers': [], 'errors': []}
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [
+                pool.submit(loadtest.run_tills, *args, share, *common, f'{options["seed"]}-{i}')
+                for i, share in enumerate(shares) if share
+            ]
+            for future in futures:
+                for key, values in future.result().items():
+                    result[key].extend(values)
+        return result
+
+    def handle(self, *args, **options):
+        if options['tills'] < 1 or options['hot'] < 1:
+            raise CommandError('--tills และ --hot ต้องมีอย่างน้อย 1')
+
+        old_config = server = None
+        try:
+            if options['url']:
+                if not (options['username'] and options['password']):
+                    raise CommandError('--url ต้องระบุ --username และ --password')
+                base_url, username, password = options['url'], options['username'], options['password']
+            else:
+                old_config = self._create_test_db()
+                username, password = 'loadtest', secrets.token_urlsafe(16)
+                User.objects.create_user(username, password=password, is_staff=True)
+                # DEBUG=False: ไม่เก็บ SQL ทุกคำสั่งไว้ในหน่วยความจำ เหมือนเซิร์ฟเวอร์จริง
+                debug_off = override_settings(DEBUG=False)
+                debug_off.enable()
+                server = LiveServerThread('localhost', lambda handler: handler)
+                server.daemon = True
+                server.start()
+                server.is_ready.wait()
+                if server.error:
+                    raise CommandError(f'เปิดเซิร์ฟเวอร์ทดสอบไม่ได้: {server.error}')
+                base_url = f'http://localhost:{server.port}'
+
+            products = self._hot_products(options['hot'])
+            if not products:
+                raise CommandError('ไม่มีสินค้าที่มีสต็อกให้ขาย')
+            restock_ids = self._create_restocks(products, options['restocks'])
+            before = self._snapshot()
+            self.stdout.write(
+                f'{options["tills"]} เครื่องขาย ({options["processes"]} process) x {options["sessions"]} ใบ '
+                f'แบบ {options["mode"]} สินค้าขายดี {len(products)} รายการ -> {base_url} ({connection.vendor})'
+            )
+
+            receiver_records = []
+            stop = threading.Event()
+            # กระจายการรับสินค้าไปตลอดช่วงเวลาที่คาดว่าจะขาย
+            interval = max(0.05, (options['duration'] or options['sessions'] * 0.05) / max(1, len(restock_ids)))
+            receiver = threading.Thread(target=self._receiver, args=(
+                base_url, username, password, restock_ids, interval, stop, receiver_records,
+            ))
+            start = time.perf_counter()
+            receiver.start()
+            try:
+                result = self._run_tills(base_url, username, password, products, options)
+            finally:
+                stop.set()
+                receiver.join()
+            elapsed = time.perf_counter() - start
+
+            for error in result['errors']:
+                self.stderr.write(error)
+            problems, sale_count = self._verify(before, restock_ids, result)
+            records = result['records'] + receiver_records
+            self._report(records, elapsed, sale_count)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.join()
+                debug_off.disable()
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+
+        if problems:
+            for problem in problems[:50]:
+                self.stderr.write(problem)
+            raise CommandError(f'พบความไม่ถูกต้อง {len(problems)} รายการ')
+        errors = sum(1 for _, status, _ in records if status >= 500)
+        if errors:
+            raise CommandError(f'สต็อกถูกต้อง แต่มีคำขอที่ผิดพลาด (5xx) {errors} ครั้ง')
+        self.stdout.write(self.style.SUCCESS(
+            'สต็อก = ยอดเริ่มต้น + รับเข้า - ขาย ครบทุกสินค้า และเลขที่ใบเสร็จไม่ซ้ำ'
+        ))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory import costs, dashboard, rollups, sales_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'คำนวณต้นทุนเฉลี่ยของสินค้าและต้นทุนขายของทุกรายการขายใหม่จากประวัติการรับสินค้าและการขาย '
+        'แล้วสร้างตารางสรุปยอดรายวันและยอดขายรายสินค้าใหม่'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        items, products = costs.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(f'ต้นทุนขาย {items} รายการ สินค้า {products} รายการ ({time.perf_counter() - start:.1f} วินาที)')
+        rollups.rebuild()
+        sales_stats.rebuild()
+        dashboard.invalidate('summary')
+        self.stdout.write(self.style.SUCCESS(
+            f'คำนวณต้นทุนและสร้างตารางสรุปใหม่เรียบร้อยแล้ว ({time.perf_counter() - start:.1f} วินาที)'
+        ))
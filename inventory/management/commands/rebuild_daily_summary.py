@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from inventory import rollups
+
+
+class Command(BaseCommand):
+    help = 'คำนวณตารางสรุปยอดรายวันใหม่จากข้อมูลการขาย การรับสินค้า และรายจ่าย'
+
+    def handle(self, *args, **options):
+        days, expense_rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'สร้างสรุปยอดรายวัน {days} วัน และรายจ่ายตามประเภท {expense_rows} แถวเรียบร้อยแล้ว'
+        ))
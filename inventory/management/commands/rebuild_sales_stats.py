@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory import sales_stats
+
+
+class Command(BaseCommand):
+    help = 'สร้างสถิติยอดขายรายสินค้าใหม่ (หรือปรับเฉพาะยอด 7/30 วันด้วย --windows-only วันละครั้ง)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--windows-only', action='store_true', help='ตัดยอดวันที่เลยช่วง 7/30 วันออกจากถังรายวันเท่านั้น')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['windows_only']:
+            sales_stats.roll_windows()
+            self.stdout.write(self.style.SUCCESS('ปรับยอดขาย 7/30 วันเรียบร้อยแล้ว'))
+            return
+        buckets, products = sales_stats.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'สร้างสถิติยอดขาย {products} สินค้า ({buckets} ถังรายวัน) เรียบร้อยแล้ว'
+        ))
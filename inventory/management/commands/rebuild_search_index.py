@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from inventory import search
+
+
+class Command(BaseCommand):
+    help = 'สร้างดัชนีค้นหาสินค้าใหม่ทั้งหมด'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'สร้างดัชนีค้นหาสินค้า {count} รายการเรียบร้อยแล้ว'))
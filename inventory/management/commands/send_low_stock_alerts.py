@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import alerts
+
+
+class Command(BaseCommand):
+    help = (
+        'ส่งอีเมลสรุปสินค้าที่เพิ่งสต็อกต่ำ จัดกลุ่มตามผู้จัดจำหน่าย (หนึ่งฉบับต่อรอบ '
+        'ควรตั้ง cron ให้รันเป็นระยะ เช่น ทุกชั่วโมง)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='แสดงเนื้อหาอีเมลโดยไม่ส่งและไม่ทำเครื่องหมายว่าแจ้งแล้ว')
+
+    def handle(self, *args, **options):
+        try:
+            count, body = alerts.send_digest(dry_run=options['dry_run'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not count:
+            self.stdout.write(self.style.SUCCESS('ไม่มีสินค้าสต็อกต่ำรายการใหม่'))
+            return
+        if options['dry_run']:
+            self.stdout.write(body)
+            self.stdout.write(self.style.SUCCESS(f'สินค้าสต็อกต่ำ {count} รายการ (ยังไม่ได้ส่ง)'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'ส่งอีเมลสรุปสินค้าสต็อกต่ำ {count} รายการเรียบร้อยแล้ว'))
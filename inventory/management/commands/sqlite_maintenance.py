@@ -0,0 +1,78 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'ดูแลฐานข้อมูล SQLite: checkpoint ไฟล์ WAL, ANALYZE (PRAGMA optimize) และ VACUUM '
+        '(ค่าเริ่มต้น: checkpoint + analyze ควรตั้ง cron ให้รันทุกคืน)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--checkpoint', action='store_true', help='ย้ายข้อมูลจาก WAL กลับเข้าไฟล์หลักแล้วล้าง WAL')
+        parser.add_argument('--analyze', action='store_true', help='เก็บสถิติให้ query planner เลือก index ได้ถูกต้อง')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='จัดไฟล์ใหม่คืนพื้นที่ว่าง (lock ทั้งฐานข้อมูลระหว่างทำ ควรทำนอกเวลาเปิดร้าน)',
+        )
+
+    def _sizes(self, path):
+        return tuple(
+            os.path.getsize(name) if os.path.exists(name) else 0
+            for name in (path, f'{path}-wal')
+        )
+
+    def _mb(self, size):
+        return f'{size / 1024 / 1024:.1f} MB'
+
+    def _step(self, label, func):
+        start = time.perf_counter()
+        result = func()
+        self.stdout.write(f'{label}: {time.perf_counter() - start:.2f} วินาที' + (f' {result}' if result else ''))
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'ฐานข้อมูล {options["database"]} ไม่ใช่ SQLite ({connection.vendor})')
+        path = str(connection.settings_dict['NAME'])
+        if not options['checkpoint'] and not options['analyze'] and not options['vacuum']:
+            options['checkpoint'] = options['analyze'] = True
+
+        db_size, wal_size = self._sizes(path)
+        with connection.cursor() as cursor:
+            journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+            freelist = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+            page_size = cursor.execute('PRAGMA page_size').fetchone()[0]
+            self.stdout.write(
+                f'{path}: {self._mb(db_size)} (WAL {self._mb(wal_size)}) journal_mode={journal_mode} '
+                f'พื้นที่ว่างในไฟล์ {self._mb(freelist * page_size)}'
+            )
+
+            if options['analyze']:
+                # optimize ANALYZE เฉพาะตารางที่สถิติเก่า (analysis_limit จำกัดเวลาบนตารางใหญ่)
+                def analyze():
+                    cursor.execute('PRAGMA analysis_limit=1000')
+                    cursor.execute('PRAGMA optimize=0x10002')
+                self._step('ANALYZE', analyze)
+            if options['vacuum']:
+                def vacuum():
+                    cursor.execute('VACUUM')
+                self._step('VACUUM', vacuum)
+            if options['checkpoint']:
+                if journal_mode.lower() != 'wal':
+                    self.stdout.write('ข้าม checkpoint: ไม่ได้ใช้ WAL (ตั้ง SQLITE_PRODUCTION=1)')
+                else:
+                    def checkpoint():
+                        busy, log, done = cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+                        if busy:
+                            return f'(ยังมี connection อื่นอ่านอยู่ ย้ายได้ {done}/{log} หน้า)'
+                    self._step('checkpoint', checkpoint)
+
+        db_size, wal_size = self._sizes(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'ดูแลฐานข้อมูลเรียบร้อยแล้ว: {self._mb(db_size)} (WAL {self._mb(wal_size)})'
+        ))
@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import reorder
+from inventory.models import Product, Supplier
+
+
+class Command(BaseCommand):
+    help = (
+        'คำนวณคำแนะนำการสั่งซื้อของทุกสินค้าจากยอดขายย้อนหลัง แล้วร่างใบสั่งซื้อหนึ่งใบต่อผู้จัดจำหน่าย '
+        '(ควรตั้ง cron ให้รันทุกคืน ต้องติดตั้ง numpy)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookback-days', type=int, default=reorder.LOOKBACK_DAYS, help='ช่วงยอดขายที่ใช้คำนวณ (วัน)')
+        parser.add_argument('--lead-time', type=int, default=reorder.LEAD_TIME_DAYS, help='เวลารอสินค้าหลังสั่ง (วัน)')
+        parser.add_argument('--review-days', type=int, default=reorder.REVIEW_DAYS, help='ระยะห่างระหว่างรอบการสั่ง (วัน)')
+        parser.add_argument('--service-level', type=float, default=reorder.SERVICE_LEVEL, help='โอกาสที่สินค้าไม่ขาดระหว่างรอ (0-1)')
+        parser.add_argument('--username', help='ผู้บันทึกใบสั่งซื้อที่ร่าง')
+        parser.add_argument('--dry-run', action='store_true', help='แสดงคำแนะนำโดยไม่สร้างใบสั่งซื้อ')
+        parser.add_argument('--show', type=int, default=20, help='จำนวนรายการที่แสดง')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError(f'ไม่พบผู้ใช้ {options["username"]}')
+
+        start = time.perf_counter()
+        try:
+            count, suggestions = reorder.suggest(
+                lookback_days=options['lookback_days'],
+                lead_time=options['lead_time'],
+                review_days=options['review_days'],
+                service_level=options['service_level'],
+            )
+        except reorder.ReorderError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'คำนวณ {count} สินค้าใน {elapsed:.2f} วินาที: ควรสั่ง {len(suggestions)} รายการ')
+
+        shown = suggestions[:options['show']]
+        products = Product.objects.in_bulk([line.product_id for line in shown])
+        suppliers = Supplier.objects.in_bulk({line.supplier_id for line in shown if line.supplier_id})
+        for line in shown:
+            supplier = suppliers.get(line.supplier_id)
+            self.stdout.write(
+                f'  {products[line.product_id].code:15} คงเหลือ {line.stock:6} สั่งแล้ว {line.on_order:5} '
+                f'ขาย/วัน {line.velocity:6.1f} พอขาย {line.days_of_cover:6.1f} วัน  '
+                f'สั่ง {line.quantity:6}  {supplier.name if supplier else "-"}'
+            )
+
+        missing = sum(1 for line in suggestions if line.supplier_id is None)
+        if missing:
+            self.stdout.write(self.style.WARNING(f'ไม่ทราบผู้จัดจำหน่าย (ไม่มีประวัติการสั่งซื้อ) {missing} รายการ'))
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('คำนวณเรียบร้อยแล้ว (ยังไม่ได้สร้างใบสั่งซื้อ)'))
+            return
+
+        purchases = reorder.draft_purchases(suggestions, user=user)
+        for purchase in purchases:
+            self.stdout.write(f'  {purchase.purchase_number} {purchase.supplier.name}: ฿{purchase.total_amount:,.2f}')
+        self.stdout.write(self.style.SUCCESS(f'ร่างใบสั่งซื้อ {len(purchases)} ใบเรียบร้อยแล้ว'))
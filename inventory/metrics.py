@@ -0,0 +1,176 @@
+"""สถิติการทำงานของแต่ละ view (จำนวน request, latency, SQL, เวลา render template)
+
+MetricsMiddleware (middleware.py) สร้าง RequestStats ต่อ request เก็บไว้ใน
+contextvar ระหว่างทำงาน:
+- SQL: execute wrapper ที่ติดตั้งกับทุก connection (ผ่าน signal
+  connection_created) จับเวลาทุก query ของ request ปัจจุบัน รวมถึง query
+  ที่ view แบบ async ส่งไปทำใน thread อื่น (asgiref คัดลอก contextvar ไปด้วย)
+- template: ครอบ Template._render (วิธีเดียวกับที่ test runner ของ Django ใช้)
+  จับเวลาเฉพาะ template ชั้นนอกสุด ไม่นับซ้ำ extends/include
+
+ข้อมูลเก็บในหน่วยความจำของแต่ละ process ต่อ view (ชื่อ URL) และ method
+ต้นทุนต่อ request คือการจับเวลาไม่กี่ครั้งและ lock หนึ่งครั้ง
+หมายเหตุ: ถ้ารันหลาย worker แต่ละ worker มีตัวเลขของตัวเอง Prometheus ควร
+scrape ทุก worker หรือรวมค่าด้วย label ของ instance
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+# ขอบบนของช่วง latency (วินาที) แบบเดียวกับค่าเริ่มต้นของ Prometheus client
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('request_stats', default=None)
+_lock = threading.Lock()
+_views = {}
+_installed = False
+
+
+class RequestStats:
+    __slots__ = ('sql_times', 'template_time', 'template_depth')
+
+    def __init__(self):
+        # list.append ปลอดภัยเมื่อหลาย thread ของ request เดียวกันเพิ่มพร้อมกัน
+        self.sql_times = []
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+class _ViewMetrics:
+    __slots__ = ('statuses', 'buckets', 'duration', 'count', 'sql_count', 'sql_time', 'template_time')
+
+    def __init__(self):
+        self.statuses = defaultdict(int)
+        self.buckets = [0] * len(BUCKETS)
+        self.duration = 0.0
+        self.count = 0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+
+def start():
+    """เริ่มเก็บสถิติของ request ปัจจุบัน คืนค่า (stats, token)"""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish(token, stats, view, method, status, duration):
+    _current.reset(token)
+    with _lock:
+        metrics = _views.get((view, method))
+        if metrics is None:
+            metrics = _views[(view, method)] = _ViewMetrics()
+        metrics.statuses[status] += 1
+        metrics.count += 1
+        metrics.duration += duration
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                metrics.buckets[i] += 1
+                break
+        metrics.sql_count += len(stats.sql_times)
+        metrics.sql_time += sum(stats.sql_times)
+        metrics.template_time += stats.template_time
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+# ==================== ตัวจับเวลา SQL / template ====================
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_times.append(time.perf_counter() - start)
+
+
+def _add_sql_wrapper(sender=None, connection=None, **kwargs):
+    # DatabaseWrapper ตัวเดิมถูกใช้ซ้ำเมื่อเชื่อมต่อใหม่ จึงต้องกันการเพิ่มซ้ำ
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def install():
+    """ติดตั้งตัวจับเวลา (เรียกครั้งเดียวตอนสร้าง middleware)"""
+    global _installed
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from django.template.base import Template
+
+    with _lock:
+        if _installed:
+            return
+        _installed = True
+
+    connection_created.connect(_add_sql_wrapper, dispatch_uid='inventory_metrics_sql')
+    for conn in connections.all(initialized_only=True):
+        _add_sql_wrapper(connection=conn)
+
+    original = Template._render
+
+    def _timed_render(self, context):
+        stats = _current.get()
+        if stats is None or stats.template_depth:
+            return original(self, context)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.template_depth -= 1
+            stats.template_time += time.perf_counter() - start
+
+    Template._render = _timed_render
+
+
+# ==================== รูปแบบข้อความของ Prometheus ====================
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_prometheus():
+    with _lock:
+        snapshot = []
+        for (view, method), metrics in sorted(_views.items()):
+            snapshot.append((view, method, dict(metrics.statuses), list(metrics.buckets), metrics.duration,
+                             metrics.count, metrics.sql_count, metrics.sql_time, metrics.template_time))
+
+    lines = [
+        '# HELP shop_requests_total Requests handled, by view, method and status.',
+        '# TYPE shop_requests_total counter',
+    ]
+    for view, method, statuses, *_ in snapshot:
+        for status, count in sorted(statuses.items()):
+            lines.append(f'shop_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+    lines += [
+        '# HELP shop_request_duration_seconds Request latency, by view and method.',
+        '# TYPE shop_request_duration_seconds histogram',
+    ]
+    for view, method, _, buckets, duration, count, *_ in snapshot:
+        cumulative = 0
+        for bound, value in zip(BUCKETS, buckets):
+            cumulative += value
+            lines.append(f'shop_request_duration_seconds_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+        lines.append(f'shop_request_duration_seconds_bucket{_labels(view=view, method=method, le="+Inf")} {count}')
+        lines.append(f'shop_request_duration_seconds_sum{_labels(view=view, method=method)} {duration:.6f}')
+        lines.append(f'shop_request_duration_seconds_count{_labels(view=view, method=method)} {count}')
+
+    for name, index, help_text, fmt in (
+        ('shop_sql_queries_total', 6, 'SQL queries executed, by view and method.', '{}'),
+        ('shop_sql_duration_seconds_total', 7, 'Time spent in SQL queries, by view and method.', '{:.6f}'),
+        ('shop_template_render_seconds_total', 8, 'Time spent rendering templates, by view and method.', '{:.6f}'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for row in snapshot:
+            lines.append(f'{name}{_labels(view=row[0], method=row[1])} {fmt.format(row[index])}')
+    return '\n'.join(lines) + '\n'
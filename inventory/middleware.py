@@ -0,0 +1,55 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+class MetricsMiddleware:
+    """บันทึกจำนวน request, latency, SQL และเวลา render template ต่อ view
+
+    ควรอยู่บนสุดของ MIDDLEWARE เพื่อจับเวลาทั้ง request ดูผลได้ที่ /metrics
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        metrics.install()
+
+    def _view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        # URL ที่ไม่ตรงกับ pattern ใด ๆ รวมเป็นค่าเดียว เพื่อไม่ให้ label มีค่าไม่จำกัด
+        if match is None:
+            return '<unmatched>'
+        return match.view_name or match._func_path
+
+    def _finish(self, request, token, stats, start, status):
+        metrics.finish(token, stats, self._view_name(request), request.method, status, time.perf_counter() - start)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token = metrics.start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, token, stats, start, status)
+
+    async def __acall__(self, request):
+        stats, token = metrics.start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, token, stats, start, status)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='วันที่')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='รายได้')),
+                ('sale_count', models.IntegerField(default=0, verbose_name='จำนวนใบเสร็จ')),
+                ('purchase_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุนสินค้าที่รับ')),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='รายจ่าย')),
+            ],
+            options={
+                'verbose_name': 'สรุปยอดรายวัน',
+                'verbose_name_plural': 'สรุปยอดรายวัน',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyExpenseSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='วันที่')),
+                ('category', models.CharField(max_length=100, verbose_name='ประเภท')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='จำนวนเงิน')),
+            ],
+            options={
+                'verbose_name': 'สรุปรายจ่ายรายวัน',
+                'verbose_name_plural': 'สรุปรายจ่ายรายวัน',
+                'ordering': ['date', 'category'],
+                'unique_together': {('date', 'category')},
+            },
+        ),
+    ]
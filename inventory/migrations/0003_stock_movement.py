@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_daily_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'ขาย'), ('receive', 'รับสินค้า'), ('return', 'คืนสินค้า'), ('adjustment', 'ปรับยอด')], max_length=20, verbose_name='ประเภท')),
+                ('quantity', models.IntegerField(verbose_name='จำนวน (+เข้า / -ออก)')),
+                ('reference', models.CharField(blank=True, max_length=50, verbose_name='เอกสารอ้างอิง')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.product', verbose_name='สินค้า')),
+            ],
+            options={
+                'verbose_name': 'ความเคลื่อนไหวสต็อก',
+                'verbose_name_plural': 'ความเคลื่อนไหวสต็อก',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', 'created_at'], name='inventory_s_product_5919a9_idx')],
+            },
+        ),
+    ]
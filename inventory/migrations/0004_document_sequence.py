@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """เริ่มตัวนับต่อจากเลขที่เอกสารที่มีอยู่แล้ว"""
+    DocumentSequence = apps.get_model('inventory', 'DocumentSequence')
+    for name, model_name, field in (('INV', 'Sale', 'sale_number'), ('PO', 'Purchase', 'purchase_number')):
+        model = apps.get_model('inventory', model_name)
+        last = 0
+        for number in model.objects.values_list(field, flat=True).iterator():
+            try:
+                last = max(last, int(number.split('-')[1]))
+            except (IndexError, ValueError):
+                continue
+        DocumentSequence.objects.create(name=name, next_value=last + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stock_movement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20, unique=True, verbose_name='ประเภทเอกสาร')),
+                ('next_value', models.BigIntegerField(default=1, verbose_name='เลขถัดไป')),
+            ],
+            options={
+                'verbose_name': 'ตัวนับเลขที่เอกสาร',
+                'verbose_name_plural': 'ตัวนับเลขที่เอกสาร',
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
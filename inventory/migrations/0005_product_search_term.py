@@ -0,0 +1,76 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:45
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# สำเนาตัวตัดคำของ inventory.search ณ ตอนสร้าง migration นี้
+# ห้าม import จากโค้ดปัจจุบัน เพราะถ้าภายหลังเปลี่ยนวิธีทำดัชนี migration เดิมจะให้ผลต่างไป
+NGRAM_SIZE = 3
+NAME_WEIGHT = 1
+CODE_PREFIX_WEIGHT = 100
+CODE_EXACT_WEIGHT = 200
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFC', text or '').lower()
+    return ''.join(ch for ch in text if not ch.isspace())
+
+
+def ngrams(text):
+    text = normalize(text)
+    if len(text) <= NGRAM_SIZE:
+        return {text} if text else set()
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def terms_for(product):
+    code = normalize(product.code)
+    terms = {('n:' + gram, NAME_WEIGHT) for gram in ngrams(product.name)}
+    terms.update(('c:' + code[:i], CODE_PREFIX_WEIGHT) for i in range(1, len(code)))
+    if code:
+        terms.add(('c:' + code, CODE_EXACT_WEIGHT))
+    return terms
+
+
+def index_products(apps, schema_editor):
+    """สร้างดัชนีค้นหาของสินค้าที่มีอยู่แล้ว"""
+    Product = apps.get_model('inventory', 'Product')
+    ProductSearchTerm = apps.get_model('inventory', 'ProductSearchTerm')
+    batch = []
+    for product in Product.objects.only('pk', 'code', 'name').iterator():
+        batch.extend(
+            ProductSearchTerm(product_id=product.pk, term=term, weight=weight)
+            for term, weight in terms_for(product)
+        )
+        if len(batch) >= 1000:
+            ProductSearchTerm.objects.bulk_create(batch)
+            batch = []
+    ProductSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_document_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=60, verbose_name='คำค้น')),
+                ('weight', models.SmallIntegerField(default=1, verbose_name='น้ำหนัก')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='inventory.product', verbose_name='สินค้า')),
+            ],
+            options={
+                'verbose_name': 'ดัชนีค้นหาสินค้า',
+                'verbose_name_plural': 'ดัชนีค้นหาสินค้า',
+                'indexes': [models.Index(fields=['term', 'product', 'weight'], name='inventory_p_term_4c0b55_idx')],
+                'unique_together': {('product', 'term')},
+            },
+        ),
+        migrations.RunPython(index_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_product_search_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales_stats', serialize=False, to='inventory.product', verbose_name='สินค้า')),
+                ('units_total', models.IntegerField(default=0, verbose_name='จำนวนขายสะสม')),
+                ('revenue_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดขายสะสม')),
+                ('units_7d', models.IntegerField(default=0, verbose_name='จำนวนขาย 7 วัน')),
+                ('revenue_7d', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดขาย 7 วัน')),
+                ('units_30d', models.IntegerField(default=0, verbose_name='จำนวนขาย 30 วัน')),
+                ('revenue_30d', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดขาย 30 วัน')),
+            ],
+            options={
+                'verbose_name': 'สถิติยอดขายรายสินค้า',
+                'verbose_name_plural': 'สถิติยอดขายรายสินค้า',
+                'indexes': [models.Index(fields=['-units_total'], name='inventory_p_units_t_1bd1bb_idx'), models.Index(fields=['-units_7d'], name='inventory_p_units_7_b8f6a3_idx'), models.Index(fields=['-units_30d'], name='inventory_p_units_3_d58175_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='วันที่')),
+                ('units', models.IntegerField(default=0, verbose_name='จำนวนขาย')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ยอดขาย')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_days', to='inventory.product', verbose_name='สินค้า')),
+            ],
+            options={
+                'verbose_name': 'ยอดขายรายสินค้ารายวัน',
+                'verbose_name_plural': 'ยอดขายรายสินค้ารายวัน',
+                'indexes': [models.Index(fields=['date', 'product'], name='inventory_p_date_edbd3d_idx')],
+                'unique_together': {('product', 'date')},
+            },
+        ),
+    ]
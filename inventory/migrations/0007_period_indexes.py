@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_product_sales_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['expense_date', 'category'], name='inventory_e_expense_a9eb09_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['purchase_date'], name='inventory_p_purchas_30b10b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(fields=['status', 'received_date'], name='inventory_p_status_c7a454_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sale_date'], name='inventory_s_sale_da_793dc6_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_period_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='รหัสรูปย่อ'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_product_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
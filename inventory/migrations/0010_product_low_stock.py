@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:24
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_low_stock(apps, schema_editor):
+    """ตั้งสถานะสต็อกต่ำของสินค้าที่มีอยู่แล้ว (จะถูกรวมในการแจ้งเตือนรอบแรก)"""
+    Product = apps.get_model('inventory', 'Product')
+    Product.objects.filter(stock_quantity__lte=F('min_stock')).update(low_stock_since=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_sale_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_alerted',
+            field=models.BooleanField(default=False, editable=False, verbose_name='แจ้งเตือนสต็อกต่ำแล้ว'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='low_stock_since',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='สต็อกต่ำตั้งแต่'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('low_stock_since__isnull', False)), fields=['low_stock_since'], name='product_low_stock_idx'),
+        ),
+        migrations.RunPython(mark_low_stock, migrations.RunPython.noop),
+    ]
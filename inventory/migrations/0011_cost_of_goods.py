@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_average_cost(apps, schema_editor):
+    """ต้นทุนเฉลี่ยเริ่มจากราคาทุน (คำนวณย้อนหลังจริงด้วย python manage.py rebuild_costs)"""
+    Product = apps.get_model('inventory', 'Product')
+    Product.objects.update(average_cost=F('cost_price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_product_low_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysummary',
+            name='cost_of_goods',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุนขาย'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='average_cost',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=12, verbose_name='ต้นทุนเฉลี่ย'),
+        ),
+        migrations.AddField(
+            model_name='productsalesday',
+            name='cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='ต้นทุนขาย'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='cost_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='ต้นทุนขาย'),
+        ),
+        migrations.AddField(
+            model_name='saleitem',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='ต้นทุนรวม'),
+        ),
+        migrations.AddField(
+            model_name='saleitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=12, verbose_name='ต้นทุนต่อหน่วย'),
+        ),
+        migrations.RunPython(start_average_cost, migrations.RunPython.noop),
+    ]
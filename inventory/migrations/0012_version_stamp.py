@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_cost_of_goods'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='ชื่อข้อมูล')),
+                ('value', models.BigIntegerField(verbose_name='เวอร์ชัน')),
+            ],
+            options={
+                'verbose_name': 'เวอร์ชันของข้อมูล',
+                'verbose_name_plural': 'เวอร์ชันของข้อมูล',
+            },
+        ),
+    ]
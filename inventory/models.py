@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from . import costs, images, rollups, sales_stats, search, sequences, stock
+
 class Category(models.Model):
     """หมวดหมู่สินค้า"""
     name = models.CharField(max_length=100, verbose_name="ชื่อหมวดหมู่")
@@ -26,7 +28,13 @@ class Product(models.Model):
     selling_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="ราคาขาย")
     stock_quantity = models.IntegerField(default=0, verbose_name="จำนวนคงเหลือ")
     min_stock = models.IntegerField(default=10, verbose_name="จำนวนขั้นต่ำ")
+    # ต้นทุนเฉลี่ยเคลื่อนที่ ปรับทุกครั้งที่รับสินค้า (stock.record(..., unit_cost=...))
+    average_cost = models.DecimalField(max_digits=12, decimal_places=4, default=0, editable=False, verbose_name="ต้นทุนเฉลี่ย")
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="รูปภาพ")
+    image_hash = models.CharField(max_length=40, blank=True, editable=False, verbose_name="รหัสรูปย่อ")
+    # เวลาที่สต็อกลดถึงจำนวนขั้นต่ำ (None = สต็อกยังพอ) ดูแลโดย save() และ stock.refresh_low_stock()
+    low_stock_since = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="สต็อกต่ำตั้งแต่")
+    low_stock_alerted = models.BooleanField(default=False, editable=False, verbose_name="แจ้งเตือนสต็อกต่ำแล้ว")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -34,13 +42,73 @@ class Product(models.Model):
         verbose_name = "สินค้า"
         verbose_name_plural = "สินค้า"
         ordering = ['-created_at']
+        indexes = [
+            # สินค้าสต็อกต่ำมีไม่กี่รายการ index เฉพาะแถวเหล่านั้น
+            models.Index(
+                fields=['low_stock_since'],
+                condition=models.Q(low_stock_since__isnull=False),
+                name='product_low_stock_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # ชื่อรูปตอนโหลด ใช้ตรวจว่ารูปเปลี่ยนหรือไม่ตอน save()
+        if 'image' in field_names:
+            instance._loaded_image = values[field_names.index('image')] or ''
+        return instance
+    
     @property
     def is_low_stock(self):
         return self.stock_quantity <= self.min_stock
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            if not self.is_low_stock:
+                self.low_stock_since, self.low_stock_alerted = None, False
+            elif self.low_stock_since is None:
+                self.low_stock_since = timezone.now()
+        # สร้างรูปย่อเฉพาะเมื่อรูปเปลี่ยน: อัพโหลดใหม่ (ยังไม่ถูกเขียนลง storage, _committed=False)
+        # หรือชื่อไฟล์ต่างจากตอนโหลด ไม่ใช่ทุกครั้งที่บันทึกสินค้า
+        image_changed = (
+            (update_fields is None or 'image' in update_fields)
+            and 'image' not in self.get_deferred_fields()
+        ) and (
+            not self.image._committed
+            or (self.image.name or '') != getattr(self, '_loaded_image', '')
+            or (not self.image and bool(self.image_hash))
+        )
+        if self._state.adding and not self.average_cost:
+            self.average_cost = self.cost_price or 0
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # อัพเดทดัชนีค้นหาเมื่อรหัสหรือชื่อสินค้าเปลี่ยน
+            if update_fields is None or {'code', 'name'} & set(update_fields):
+                search.index_product(self)
+            # บันทึกบางช่อง: ปรับสถานะสต็อกต่ำจากค่าในฐานข้อมูล ไม่ใช้ค่าที่โหลดไว้ซึ่งอาจเก่า
+            if update_fields is not None and {'stock_quantity', 'min_stock'} & set(update_fields):
+                stock.refresh_low_stock(Product.objects.filter(pk=self.pk))
+        # สร้างรูปย่อหลังไฟล์ต้นฉบับถูกบันทึกแล้ว
+        if image_changed:
+            images.update_product(self)
+            self._loaded_image = self.image.name or ''
+
+class ProductSearchTerm(models.Model):
+    """ดัชนีค้นหาสินค้า (n-gram ของชื่อ และ prefix ของรหัส)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_terms', verbose_name="สินค้า")
+    term = models.CharField(max_length=60, verbose_name="คำค้น")
+    weight = models.SmallIntegerField(default=1, verbose_name="น้ำหนัก")
+    
+    class Meta:
+        verbose_name = "ดัชนีค้นหาสินค้า"
+        verbose_name_plural = "ดัชนีค้นหาสินค้า"
+        unique_together = [('product', 'term')]
+        indexes = [models.Index(fields=['term', 'product', 'weight'])]
 
 class Supplier(models.Model):
     """ผู้จัดจำหน่าย/ซัพพลายเออร์"""
@@ -58,6 +126,30 @@ class Supplier(models.Model):
     def __str__(self):
         return self.name
 
+class DocumentSequence(models.Model):
+    """ตัวนับเลขที่เอกสาร (INV, PO)"""
+    name = models.CharField(max_length=20, unique=True, verbose_name="ประเภทเอกสาร")
+    next_value = models.BigIntegerField(default=1, verbose_name="เลขถัดไป")
+    
+    class Meta:
+        verbose_name = "ตัวนับเลขที่เอกสาร"
+        verbose_name_plural = "ตัวนับเลขที่เอกสาร"
+    
+    def __str__(self):
+        return f"{self.name} - {self.next_value}"
+
+class VersionStamp(models.Model):
+    """เวอร์ชันของข้อมูลแต่ละชนิด (inventory/versions.py) ใช้ร่วมกันทุก process"""
+    name = models.CharField(max_length=100, unique=True, verbose_name="ชื่อข้อมูล")
+    value = models.BigIntegerField(verbose_name="เวอร์ชัน")
+    
+    class Meta:
+        verbose_name = "เวอร์ชันของข้อมูล"
+        verbose_name_plural = "เวอร์ชันของข้อมูล"
+    
+    def __str__(self):
+        return f"{self.name} - {self.value}"
+
 class Purchase(models.Model):
     """การนำเข้าสินค้า"""
     purchase_number = models.CharField(max_length=50, unique=True, verbose_name="เลขที่ใบสั่งซื้อ")
@@ -78,19 +170,31 @@ class Purchase(models.Model):
         verbose_name = "การนำเข้าสินค้า"
         verbose_name_plural = "การนำเข้าสินค้า"
         ordering = ['-purchase_date']
+        indexes = [
+            models.Index(fields=['purchase_date']),
+            models.Index(fields=['status', 'received_date']),
+        ]
     
     def __str__(self):
         return f"{self.purchase_number} - {self.supplier.name}"
     
     def save(self, *args, **kwargs):
         if not self.purchase_number:
-            last = Purchase.objects.order_by('-id').first()
-            if last:
-                num = int(last.purchase_number.split('-')[1]) + 1
-            else:
-                num = 1
-            self.purchase_number = f"PO-{num:05d}"
-        super().save(*args, **kwargs)
+            self.purchase_number = sequences.early_number('PO')
+        # ปรับยอดสรุปรายวันใน transaction เดียวกับการบันทึก
+        with transaction.atomic():
+            if not self.purchase_number:
+                self.purchase_number = sequences.next_number('PO')
+            old = Purchase.objects.filter(pk=self.pk).first() if self.pk else None
+            super().save(*args, **kwargs)
+            rollups.purchase_changed(old, self)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old = Purchase.objects.filter(pk=self.pk).first()
+            result = super().delete(*args, **kwargs)
+            rollups.purchase_changed(old, None)
+        return result
 
 class PurchaseItem(models.Model):
     """รายการสินค้าที่สั่งซื้อ"""
@@ -106,12 +210,16 @@ class PurchaseItem(models.Model):
     
     def save(self, *args, **kwargs):
         self.total_price = self.quantity * self.unit_price
-        super().save(*args, **kwargs)
-        
-        # อัพเดท stock เมื่อรับสินค้าแล้ว
-        if self.purchase.status == 'received':
-            self.product.stock_quantity += self.quantity
-            self.product.save()
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            
+            # อัพเดท stock และต้นทุนเฉลี่ยเมื่อรับสินค้าแล้ว
+            if adding and self.purchase.status == 'received':
+                stock.record(
+                    self.product_id, self.quantity, 'receive', self.purchase.purchase_number,
+                    unit_cost=self.unit_price,
+                )
 
 class Sale(models.Model):
     """การขายสินค้า"""
@@ -121,6 +229,7 @@ class Sale(models.Model):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ยอดรวม")
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="ส่วนลด")
     net_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="ยอดสุทธิ")
+    cost_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name="ต้นทุนขาย")
     payment_method = models.CharField(max_length=20, choices=[
         ('cash', 'เงินสด'),
         ('transfer', 'โอนเงิน'),
@@ -129,26 +238,36 @@ class Sale(models.Model):
     note = models.TextField(blank=True, verbose_name="หมายเหตุ")
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="ผู้บันทึก")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "การขายสินค้า"
         verbose_name_plural = "การขายสินค้า"
         ordering = ['-sale_date']
+        indexes = [models.Index(fields=['sale_date'])]
     
     def __str__(self):
         return f"{self.sale_number}"
     
     def save(self, *args, **kwargs):
-        if not self.sale_number:
-            last = Sale.objects.order_by('-id').first()
-            if last:
-                num = int(last.sale_number.split('-')[1]) + 1
-            else:
-                num = 1
-            self.sale_number = f"INV-{num:05d}"
-        
         self.net_amount = self.total_amount - self.discount
-        super().save(*args, **kwargs)
+        
+        if not self.sale_number:
+            self.sale_number = sequences.early_number('INV')
+        # ปรับยอดสรุปรายวันใน transaction เดียวกับการบันทึก
+        with transaction.atomic():
+            if not self.sale_number:
+                self.sale_number = sequences.next_number('INV')
+            old = Sale.objects.filter(pk=self.pk).first() if self.pk else None
+            super().save(*args, **kwargs)
+            rollups.sale_changed(old, self)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old = Sale.objects.filter(pk=self.pk).first()
+            result = super().delete(*args, **kwargs)
+            rollups.sale_changed(old, None)
+        return result
 
 class SaleItem(models.Model):
     """รายการสินค้าที่ขาย"""
@@ -157,6 +276,9 @@ class SaleItem(models.Model):
     quantity = models.IntegerField(verbose_name="จำนวน")
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="ราคาต่อหน่วย")
     total_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="ราคารวม")
+    # ต้นทุนเฉลี่ยของสินค้า ณ เวลาที่ขาย (ไม่เปลี่ยนตามการรับสินค้าภายหลัง)
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4, default=0, editable=False, verbose_name="ต้นทุนต่อหน่วย")
+    total_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name="ต้นทุนรวม")
     
     class Meta:
         verbose_name = "รายการสินค้าขาย"
@@ -164,11 +286,24 @@ class SaleItem(models.Model):
     
     def save(self, *args, **kwargs):
         self.total_price = self.quantity * self.unit_price
-        super().save(*args, **kwargs)
-        
-        # ลด stock
-        self.product.stock_quantity -= self.quantity
-        self.product.save()
+        adding = self._state.adding
+        if adding and not self.unit_cost:
+            self.unit_cost = self.product.average_cost
+        self.total_cost = costs.line_cost(self.quantity, self.unit_cost)
+        with transaction.atomic():
+            # ตรวจและลด stock ในคำสั่ง UPDATE เดียว (InsufficientStock ถ้าไม่พอ)
+            if adding:
+                stock.record(self.product_id, -self.quantity, 'sale', self.sale.sale_number, check_stock=True)
+            super().save(*args, **kwargs)
+            if adding:
+                sales_stats.record_items([self])
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # คืน stock
+            stock.record(self.product_id, self.quantity, 'return', self.sale.sale_number)
+            sales_stats.record_items([self], sign=-1)
+            return super().delete(*args, **kwargs)
 
 class Expense(models.Model):
     """รายจ่ายอื่นๆ"""
@@ -190,6 +325,114 @@ class Expense(models.Model):
         verbose_name = "รายจ่าย"
         verbose_name_plural = "รายจ่าย"
         ordering = ['-expense_date']
+        indexes = [models.Index(fields=['expense_date', 'category'])]
+    
+    def __str__(self):
+        return f"{self.description} - {self.amount}"
+    
+    def save(self, *args, **kwargs):
+        # ปรับยอดสรุปรายวันใน transaction เดียวกับการบันทึก
+        with transaction.atomic():
+            old = Expense.objects.filter(pk=self.pk).first() if self.pk else None
+            super().save(*args, **kwargs)
+            rollups.expense_changed(old, self)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old = Expense.objects.filter(pk=self.pk).first()
+            result = super().delete(*args, **kwargs)
+            rollups.expense_changed(old, None)
+        return result
+
+class DailySummary(models.Model):
+    """สรุปยอดรายวัน (ตามเวลาท้องถิ่น) สำหรับแดชบอร์ดและรายงาน"""
+    date = models.DateField(unique=True, verbose_name="วันที่")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="รายได้")
+    sale_count = models.IntegerField(default=0, verbose_name="จำนวนใบเสร็จ")
+    purchase_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุนสินค้าที่รับ")
+    cost_of_goods = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุนขาย")
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="รายจ่าย")
+    
+    class Meta:
+        verbose_name = "สรุปยอดรายวัน"
+        verbose_name_plural = "สรุปยอดรายวัน"
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"{self.date} - {self.revenue}"
+
+class DailyExpenseSummary(models.Model):
+    """สรุปรายจ่ายรายวันแยกตามประเภท"""
+    date = models.DateField(verbose_name="วันที่")
+    category = models.CharField(max_length=100, verbose_name="ประเภท")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="จำนวนเงิน")
+    
+    class Meta:
+        verbose_name = "สรุปรายจ่ายรายวัน"
+        verbose_name_plural = "สรุปรายจ่ายรายวัน"
+        ordering = ['date', 'category']
+        unique_together = [('date', 'category')]
+    
+    def __str__(self):
+        return f"{self.date} - {self.category} - {self.amount}"
+
+class StockMovement(models.Model):
+    """ความเคลื่อนไหวสต็อก (บันทึกเพิ่มอย่างเดียว ไม่แก้ไขย้อนหลัง)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements', verbose_name="สินค้า")
+    kind = models.CharField(max_length=20, choices=[
+        ('sale', 'ขาย'),
+        ('receive', 'รับสินค้า'),
+        ('return', 'คืนสินค้า'),
+        ('adjustment', 'ปรับยอด')
+    ], verbose_name="ประเภท")
+    quantity = models.IntegerField(verbose_name="จำนวน (+เข้า / -ออก)")
+    reference = models.CharField(max_length=50, blank=True, verbose_name="เอกสารอ้างอิง")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "ความเคลื่อนไหวสต็อก"
+        verbose_name_plural = "ความเคลื่อนไหวสต็อก"
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['product', 'created_at'])]
+    
+    def __str__(self):
+        return f"{self.product_id} {self.kind} {self.quantity:+d}"
+
+class ProductSalesStats(models.Model):
+    """สถิติยอดขายรายสินค้า (สะสม / 7 วัน / 30 วัน)"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='sales_stats', verbose_name="สินค้า")
+    units_total = models.IntegerField(default=0, verbose_name="จำนวนขายสะสม")
+    revenue_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดขายสะสม")
+    units_7d = models.IntegerField(default=0, verbose_name="จำนวนขาย 7 วัน")
+    revenue_7d = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดขาย 7 วัน")
+    units_30d = models.IntegerField(default=0, verbose_name="จำนวนขาย 30 วัน")
+    revenue_30d = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดขาย 30 วัน")
+    
+    class Meta:
+        verbose_name = "สถิติยอดขายรายสินค้า"
+        verbose_name_plural = "สถิติยอดขายรายสินค้า"
+        indexes = [
+            models.Index(fields=['-units_total']),
+            models.Index(fields=['-units_7d']),
+            models.Index(fields=['-units_30d']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} - {self.units_total}"
+
+class ProductSalesDay(models.Model):
+    """ยอดขายรายสินค้ารายวัน (ถังสำหรับคำนวณยอดช่วงเวลา)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_days', verbose_name="สินค้า")
+    date = models.DateField(verbose_name="วันที่")
+    units = models.IntegerField(default=0, verbose_name="จำนวนขาย")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ยอดขาย")
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="ต้นทุนขาย")
+    
+    class Meta:
+        verbose_name = "ยอดขายรายสินค้ารายวัน"
+        verbose_name_plural = "ยอดขายรายสินค้ารายวัน"
+        unique_together = [('product', 'date')]
+        indexes = [models.Index(fields=['date', 'product'])]
     
     def __str__(self):
-        return f"{self.description} - {self.amount}"
\ No newline at end of file
+        return f"{self.product_id} {self.date} - {self.units}"
@@ -0,0 +1,91 @@
+"""ช่วงเวลาสำหรับกรองข้อมูลตามวันที่
+
+แปลง วัน/เดือน/ปี/ช่วงที่กำหนดเอง เป็นช่วง datetime แบบครึ่งเปิด [start, end)
+ตามเขตเวลาของร้าน (Asia/Bangkok) เพื่อกรองด้วย field__gte / field__lt
+ซึ่งใช้ index ได้ แทน field__date ที่ต้องแปลงค่าทุกแถวก่อนเทียบ
+"""
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def local_date(value):
+    """แปลง datetime เป็นวันที่ตามเขตเวลาของร้าน"""
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localdate(value)
+
+
+def start_of(day):
+    """datetime เวลา 00:00 ของวันที่ตามเขตเวลาของร้าน"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_day(field):
+    """นิพจน์จัดกลุ่มตามวันที่ท้องถิ่น (ไม่ใช่วันที่ UTC)"""
+    return TruncDate(field, tzinfo=timezone.get_current_timezone())
+
+
+class Period(namedtuple('Period', 'start end')):
+    """ช่วงเวลา [start, end) ค่า None หมายถึงไม่จำกัดด้านนั้น"""
+    __slots__ = ()
+
+    @property
+    def start_date(self):
+        return local_date(self.start)
+
+    @property
+    def end_date(self):
+        return local_date(self.end)
+
+    def filter(self, field):
+        """คืน kwargs สำหรับ QuerySet.filter() เช่น period.filter('sale_date')"""
+        lookups = {}
+        if self.start is not None:
+            lookups[f'{field}__gte'] = self.start
+        if self.end is not None:
+            lookups[f'{field}__lt'] = self.end
+        return lookups
+
+    def date_filter(self, field='date'):
+        """kwargs สำหรับกรอง DateField (เช่น ตารางสรุปรายวัน)"""
+        lookups = {}
+        if self.start is not None:
+            lookups[f'{field}__gte'] = self.start_date
+        if self.end is not None:
+            lookups[f'{field}__lt'] = self.end_date
+        return lookups
+
+
+def day(value):
+    return Period(start_of(value), start_of(value + timedelta(days=1)))
+
+
+def month(year, month):
+    first = date(year, month, 1)
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return Period(start_of(first), start_of(following))
+
+
+def year(year):
+    return Period(start_of(date(year, 1, 1)), start_of(date(year + 1, 1, 1)))
+
+
+def custom(date_from=None, date_to=None):
+    """ช่วงวันที่ที่ผู้ใช้เลือก (รวมวันสุดท้าย)"""
+    return Period(
+        start_of(date_from) if date_from else None,
+        start_of(date_to + timedelta(days=1)) if date_to else None,
+    )
+
+
+def parse_date(value):
+    """แปลงข้อความ YYYY-MM-DD เป็น date ถ้าไม่ถูกต้องคืน None"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,188 @@
+"""คำแนะนำการสั่งซื้อสินค้า และร่างใบสั่งซื้อแยกตามผู้จัดจำหน่าย
+
+อ่านยอดขายรายวันของทุกสินค้าจาก ProductSalesDay (ถังรายวันที่ sales_stats
+ดูแลจาก SaleItem) ย้อนหลัง lookback_days วัน เป็นเมทริกซ์ NumPy [สินค้า × วัน]
+แล้วคำนวณของทุกสินค้าพร้อมกันโดยไม่วนลูปทีละสินค้า:
+
+- ยอดขายเฉลี่ยต่อวัน (velocity) และส่วนเบี่ยงเบนมาตรฐาน นับเฉพาะวันที่มีสินค้าแล้ว
+- จำนวนวันที่สต็อกคงเหลือพอขาย (days of cover)
+- จุดสั่งซื้อ = min_stock + ยอดขายระหว่างรอสินค้า (lead time) + safety stock
+  โดย safety stock = z × σ × √lead time และ z มาจากระดับบริการ (service level)
+- ถ้าสต็อก + จำนวนที่สั่งไว้แล้ว (ใบสั่งซื้อ pending) ต่ำกว่าจุดสั่งซื้อ
+  แนะนำให้สั่งจนพอขายถึงรอบถัดไป (lead time + review days)
+
+ต้องติดตั้ง numpy (pip install numpy)
+"""
+import math
+from collections import namedtuple
+from datetime import timedelta
+from statistics import NormalDist
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import versions
+
+LOOKBACK_DAYS = 90
+LEAD_TIME_DAYS = 7
+REVIEW_DAYS = 7
+SERVICE_LEVEL = 0.95
+
+Suggestion = namedtuple('Suggestion', (
+    'product_id stock on_order velocity std days_of_cover reorder_point quantity unit_price supplier_id'
+))
+
+
+class ReorderError(Exception):
+    """ไม่สามารถคำนวณคำแนะนำการสั่งซื้อ"""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ReorderError('การคำนวณคำแนะนำการสั่งซื้อต้องติดตั้ง numpy (pip install numpy)')
+    return numpy
+
+
+def _last_suppliers():
+    """ผู้จัดจำหน่ายของใบสั่งซื้อล่าสุด (ที่ไม่ถูกยกเลิก) ของแต่ละสินค้า {product_id: supplier_id}"""
+    from .models import PurchaseItem
+
+    rows = PurchaseItem.objects.exclude(purchase__status='cancelled').order_by(
+        'purchase__purchase_date', 'purchase_id',
+    ).values_list('product_id', 'purchase__supplier_id')
+    return dict(rows.iterator(chunk_size=10000))
+
+
+def suggest(lookback_days=LOOKBACK_DAYS, lead_time=LEAD_TIME_DAYS, review_days=REVIEW_DAYS,
+            service_level=SERVICE_LEVEL, today=None):
+    """คำนวณคำแนะนำของทุกสินค้า คืน (จำนวนสินค้าที่คำนวณ, [Suggestion ที่ต้องสั่ง])
+
+    รายการเรียงจากสินค้าที่สต็อกจะหมดก่อน
+    """
+    np = _numpy()
+    from .models import Product, ProductSalesDay, PurchaseItem
+
+    if lookback_days < 1 or lead_time < 0 or review_days < 0:
+        raise ReorderError('จำนวนวันต้องไม่ติดลบ (lookback อย่างน้อย 1 วัน)')
+    if not 0 < service_level < 1:
+        raise ReorderError('service level ต้องอยู่ระหว่าง 0 ถึง 1')
+    today = today or timezone.localdate()
+    start = today - timedelta(days=lookback_days - 1)
+
+    products = list(Product.objects.order_by('pk').values_list(
+        'pk', 'stock_quantity', 'min_stock', 'cost_price', 'created_at',
+    ).iterator(chunk_size=10000))
+    if not products:
+        return 0, []
+    pks, stock_quantity, min_stock, cost_price, created_at = zip(*products)
+    pks = np.array(pks, dtype=np.int64)
+    count = len(pks)
+
+    # เมทริกซ์ยอดขาย [สินค้า × วัน] จากถังรายวัน
+    rows = list(ProductSalesDay.objects.filter(date__gte=start, date__lte=today).values_list(
+        'product_id', 'date', 'units',
+    ).iterator(chunk_size=10000))
+    sales = np.zeros(count * lookback_days, dtype=np.float64)
+    if rows:
+        product_ids, dates, units = zip(*rows)
+        index = np.searchsorted(pks, np.array(product_ids, dtype=np.int64))
+        origin = start.toordinal()
+        day = np.fromiter((d.toordinal() - origin for d in dates), dtype=np.int64, count=len(dates))
+        sales = np.bincount(index * lookback_days + day, weights=np.array(units, dtype=np.float64),
+                            minlength=count * lookback_days)
+    sales = sales.reshape(count, lookback_days)
+
+    # สินค้าที่เพิ่งเพิ่มเข้าระบบ นับเฉพาะวันหลังจากนั้น (ไม่ให้ velocity ต่ำเกินจริง)
+    created_ordinal = np.fromiter(
+        (timezone.localtime(value).toordinal() for value in created_at), dtype=np.int64, count=count,
+    )
+    first_day = np.clip(created_ordinal - start.toordinal(), 0, lookback_days - 1)
+    active_days = lookback_days - first_day
+    total = sales.sum(axis=1)
+    velocity = total / active_days
+    # Σ(x - μ)² = Σx² - nμ² (วันก่อนเพิ่มสินค้าไม่มียอดขาย) ไม่ต้องสร้างเมทริกซ์ส่วนต่างอีกชุด
+    squares = np.einsum('ij,ij->i', sales, sales)
+    std = np.sqrt(np.maximum(squares - active_days * velocity ** 2, 0) / np.maximum(active_days - 1, 1))
+
+    on_order = np.zeros(count, dtype=np.float64)
+    pending = list(PurchaseItem.objects.filter(purchase__status='pending').values('product_id').annotate(
+        quantity=Sum('quantity'),
+    ).values_list('product_id', 'quantity'))
+    if pending:
+        product_ids, quantities = zip(*pending)
+        np.add.at(on_order, np.searchsorted(pks, np.array(product_ids, dtype=np.int64)), quantities)
+
+    stock = np.array(stock_quantity, dtype=np.float64)
+    minimum = np.array(min_stock, dtype=np.float64)
+    z = NormalDist().inv_cdf(service_level)
+    safety = z * std * math.sqrt(lead_time)
+    reorder_point = minimum + velocity * lead_time + safety
+    target = minimum + velocity * (lead_time + review_days) + safety
+    position = np.maximum(stock, 0) + on_order
+    quantity = np.where(position < reorder_point, np.ceil(target - position), 0).astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(velocity > 0, np.maximum(stock, 0) / velocity, np.inf)
+
+    selected = np.flatnonzero(quantity > 0)
+    selected = selected[np.argsort(cover[selected], kind='stable')]
+    suppliers = _last_suppliers() if len(selected) else {}
+    return count, [
+        Suggestion(
+            product_id=int(pks[i]),
+            stock=int(stock[i]),
+            on_order=int(on_order[i]),
+            velocity=float(velocity[i]),
+            std=float(std[i]),
+            days_of_cover=float(cover[i]),
+            reorder_point=float(reorder_point[i]),
+            quantity=int(quantity[i]),
+            unit_price=cost_price[i],
+            supplier_id=suppliers.get(int(pks[i])),
+        )
+        for i in selected.tolist()
+    ]
+
+
+def draft_purchases(suggestions, user=None, batch_size=1000):
+    """ร่างใบสั่งซื้อ (สถานะรอรับสินค้า) หนึ่งใบต่อผู้จัดจำหน่าย คืนรายการ Purchase ที่สร้าง
+
+    สินค้าที่ไม่มีประวัติการสั่งซื้อ (ไม่ทราบผู้จัดจำหน่าย) จะถูกข้าม
+    ใบสั่งซื้อที่ร่างไว้นับเป็นจำนวนที่สั่งแล้วในการคำนวณรอบถัดไป จึงไม่สั่งซ้ำ
+    """
+    from .models import Purchase, PurchaseItem
+
+    by_supplier = {}
+    for suggestion in suggestions:
+        if suggestion.supplier_id is not None:
+            by_supplier.setdefault(suggestion.supplier_id, []).append(suggestion)
+
+    purchases = []
+    with transaction.atomic():
+        for supplier_id, lines in sorted(by_supplier.items()):
+            purchase = Purchase(
+                supplier_id=supplier_id,
+                status='pending',
+                total_amount=sum(line.quantity * line.unit_price for line in lines),
+                note=f'ร่างจากคำแนะนำการสั่งซื้อ {len(lines)} รายการ',
+                created_by=user,
+            )
+            purchase.save()
+            # ยังไม่ได้รับสินค้า จึงไม่ต้องผ่าน PurchaseItem.save() (ไม่มีการปรับสต็อก)
+            PurchaseItem.objects.bulk_create([
+                PurchaseItem(
+                    purchase=purchase,
+                    product_id=line.product_id,
+                    quantity=line.quantity,
+                    unit_price=line.unit_price,
+                    total_price=line.quantity * line.unit_price,
+                )
+                for line in lines
+            ], batch_size=batch_size)
+            purchases.append(purchase)
+        if purchases:
+            # bulk_create ไม่ส่ง signal
+            versions.bump(PurchaseItem)
+    return purchases
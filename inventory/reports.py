@@ -0,0 +1,147 @@
+"""ข้อมูลรายงานรายเดือน/รายปี (ใช้ร่วมกันระหว่างหน้าเว็บและ PDF)
+
+อ่านจากตารางสรุปยอดรายวัน (DailySummary / DailyExpenseSummary / ProductSalesDay)
+ต้นทุนคือต้นทุนขาย (ต้นทุนเฉลี่ยของสินค้าที่ขายได้ ดู costs.py) ไม่ใช่ยอดสั่งซื้อ
+"""
+from django.db.models import Sum, F
+from django.db.models.functions import ExtractMonth
+
+from . import aio, periods
+
+MONTH_NAMES = (
+    'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
+    'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม',
+)
+
+
+def _totals(summaries):
+    totals = summaries.aggregate(
+        revenue=Sum('revenue'),
+        cost=Sum('cost_of_goods'),
+        purchases=Sum('purchase_cost'),
+        expense=Sum('expense_total'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_cost = totals['cost'] or 0
+    total_expense = totals['expense'] or 0
+    return {
+        'total_revenue': total_revenue,
+        'total_cost': total_cost,
+        'gross_profit': total_revenue - total_cost,
+        'total_purchases': totals['purchases'] or 0,
+        'total_expense': total_expense,
+        'profit': total_revenue - total_cost - total_expense,
+    }
+
+
+# แต่ละรายงานแบ่งเป็นส่วนที่ query แยกกันได้ {ชื่อ: ฟังก์ชัน} monthly()/yearly()
+# เรียกทีละส่วน ส่วน amonthly()/ayearly() เรียกทุกส่วนพร้อมกัน
+def _margin_by_category(period):
+    from .models import ProductSalesDay
+
+    rows = ProductSalesDay.objects.filter(**period.date_filter()).values(
+        category=F('product__category__name'),
+    ).annotate(revenue=Sum('revenue'), cost=Sum('cost')).order_by('-revenue')
+    result = []
+    for row in rows:
+        revenue, cost = row['revenue'] or 0, row['cost'] or 0
+        result.append({
+            'category': row['category'] or 'ไม่ระบุหมวดหมู่',
+            'revenue': revenue,
+            'cost': cost,
+            'margin': revenue - cost,
+            'margin_percent': (revenue - cost) / revenue * 100 if revenue else 0,
+        })
+    return result
+
+
+def _monthly_parts(year, month):
+    from .models import DailySummary, DailyExpenseSummary
+
+    period = periods.month(year, month)
+    summaries = DailySummary.objects.filter(**period.date_filter())
+    return {
+        # รายได้ ต้นทุน รายจ่าย และกำไร
+        'totals': lambda: _totals(summaries),
+        'expense_by_category': lambda: list(DailyExpenseSummary.objects.filter(
+            **period.date_filter()
+        ).values('category').annotate(total=Sum('amount')).order_by('category')),
+        # กำไรขั้นต้นตามหมวดหมู่สินค้า (ยอดขายรายสินค้ารายวันมีต้นทุนขายอยู่แล้ว)
+        'margin_by_category': lambda: _margin_by_category(period),
+        # รายงานตามวัน
+        'daily_sales': lambda: list(summaries.filter(sale_count__gt=0).values(
+            day=F('date'),
+            total=F('revenue'),
+            cost=F('cost_of_goods'),
+            count=F('sale_count'),
+        ).order_by('date')),
+    }
+
+
+def _monthly_context(year, month, parts):
+    return {
+        'year': year,
+        'month': month,
+        **parts['totals'],
+        'expense_by_category': parts['expense_by_category'],
+        'margin_by_category': parts['margin_by_category'],
+        'daily_sales': parts['daily_sales'],
+    }
+
+
+def _yearly_parts(year):
+    from .models import DailySummary
+
+    period = periods.year(year)
+    summaries = DailySummary.objects.filter(**period.date_filter())
+    return {
+        # รายได้ ต้นทุน รายจ่าย และกำไร
+        'totals': lambda: _totals(summaries),
+        # รายงานรายเดือน
+        'by_month': lambda: {
+            row['month']: row
+            for row in summaries.values(month=ExtractMonth('date')).annotate(
+                revenue=Sum('revenue'),
+                cost=Sum('cost_of_goods'),
+                expense=Sum('expense_total'),
+            ).order_by()
+        },
+    }
+
+
+def _yearly_context(year, parts):
+    monthly_data = []
+    for m in range(1, 13):
+        row = parts['by_month'].get(m, {})
+        month_revenue = row.get('revenue') or 0
+        month_cost = row.get('cost') or 0
+        month_expense = row.get('expense') or 0
+
+        monthly_data.append({
+            'month': m,
+            'revenue': month_revenue,
+            'cost': month_cost,
+            'expense': month_expense,
+            'profit': month_revenue - month_cost - month_expense,
+        })
+    return {'year': year, **parts['totals'], 'monthly_data': monthly_data}
+
+
+def _run(parts):
+    return {name: func() for name, func in parts.items()}
+
+
+def monthly(year, month):
+    return _monthly_context(year, month, _run(_monthly_parts(year, month)))
+
+
+def yearly(year):
+    return _yearly_context(year, _run(_yearly_parts(year)))
+
+
+async def amonthly(year, month):
+    return _monthly_context(year, month, await aio.gather_dict(_monthly_parts(year, month)))
+
+
+async def ayearly(year):
+    return _yearly_context(year, await aio.gather_dict(_yearly_parts(year)))
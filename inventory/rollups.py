@@ -0,0 +1,147 @@
+"""ตารางสรุปยอดรายวันสำหรับแดชบอร์ดและรายงาน
+
+ทุกครั้งที่บันทึก/ลบ การขาย การรับสินค้า หรือรายจ่าย โมเดลจะเรียก
+ฟังก์ชัน *_changed ในไฟล์นี้พร้อมค่าเดิม (จากฐานข้อมูล) และค่าใหม่
+เพื่อปรับยอดใน DailySummary / DailyExpenseSummary แบบ delta ด้วย F()
+ภายใน transaction เดียวกัน รายงานจึงอ่านเพียงไม่กี่ร้อยแถวแทนการ scan
+ข้อมูลย้อนหลังทั้งหมด
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum, Count
+from django.utils import timezone
+
+from . import timeseries, versions
+from .periods import local_date, local_day
+
+
+def _sale_entry(sale):
+    if sale is None:
+        return None
+    return {'date': local_date(sale.sale_date)}, {
+        'revenue': sale.net_amount or 0,
+        'sale_count': 1,
+        'cost_of_goods': sale.cost_total or 0,
+    }
+
+
+def _purchase_entry(purchase):
+    # นับเป็นต้นทุนเฉพาะใบสั่งซื้อที่รับสินค้าแล้ว ตามวันที่รับสินค้า
+    if purchase is None or purchase.status != 'received' or purchase.received_date is None:
+        return None
+    return {'date': local_date(purchase.received_date)}, {
+        'purchase_cost': purchase.total_amount or 0,
+    }
+
+
+def _expense_entry(expense):
+    if expense is None:
+        return None
+    return {'date': local_date(expense.expense_date)}, {
+        'expense_total': expense.amount or 0,
+    }
+
+
+def _expense_category_entry(expense):
+    if expense is None:
+        return None
+    return {'date': local_date(expense.expense_date), 'category': expense.category}, {
+        'amount': expense.amount or 0,
+    }
+
+
+def _bump(model, lookup, deltas):
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if not model.objects.filter(**lookup).update(**updates):
+        model.objects.get_or_create(**lookup)
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _move(model, old, new):
+    """หักยอดเดิมออกและบวกยอดใหม่ (รวมเป็นครั้งเดียวถ้าเป็นวันเดียวกัน)"""
+    changes = defaultdict(dict)
+    for entry, sign in ((old, -1), (new, 1)):
+        if entry is None:
+            continue
+        lookup, deltas = entry
+        key = tuple(sorted(lookup.items()))
+        for field, value in deltas.items():
+            changes[key][field] = changes[key].get(field, 0) + sign * value
+    for key, deltas in changes.items():
+        _bump(model, dict(key), deltas)
+
+
+def sale_changed(old, new):
+    from .models import DailySummary
+    old, new = _sale_entry(old), _sale_entry(new)
+    _move(DailySummary, old, new)
+    today = timezone.localdate()
+    if any(entry and entry[0]['date'] < today for entry in (old, new)):
+        # แก้ยอดขายย้อนหลัง ก้อนข้อมูลกราฟที่ cache ไว้ใช้ไม่ได้
+        timeseries.invalidate()
+
+
+def purchase_changed(old, new):
+    from .models import DailySummary
+    _move(DailySummary, _purchase_entry(old), _purchase_entry(new))
+
+
+def expense_changed(old, new):
+    from .models import DailySummary, DailyExpenseSummary
+    _move(DailySummary, _expense_entry(old), _expense_entry(new))
+    _move(DailyExpenseSummary, _expense_category_entry(old), _expense_category_entry(new))
+
+
+def rebuild():
+    """คำนวณตารางสรุปใหม่ทั้งหมดจากข้อมูลจริง คืนค่าจำนวนแถว (วัน, รายจ่ายตามประเภท)"""
+    from .models import Sale, SaleItem, Purchase, Expense, DailySummary, DailyExpenseSummary
+
+    days = defaultdict(lambda: {
+        'revenue': Decimal('0'),
+        'sale_count': 0,
+        'cost_of_goods': Decimal('0'),
+        'purchase_cost': Decimal('0'),
+        'expense_total': Decimal('0'),
+    })
+
+    sales = Sale.objects.annotate(day=local_day('sale_date')).values('day').annotate(
+        revenue=Sum('net_amount'),
+        sale_count=Count('id'),
+        cost_of_goods=Sum('cost_total'),
+    ).order_by()
+    for row in sales:
+        days[row['day']]['revenue'] += row['revenue'] or 0
+        days[row['day']]['sale_count'] += row['sale_count']
+        days[row['day']]['cost_of_goods'] += row['cost_of_goods'] or 0
+
+    purchases = Purchase.objects.filter(status='received', received_date__isnull=False).annotate(
+        day=local_day('received_date')
+    ).values('day').annotate(total=Sum('total_amount')).order_by()
+    for row in purchases:
+        days[row['day']]['purchase_cost'] += row['total'] or 0
+
+    expenses = Expense.objects.annotate(day=local_day('expense_date')).values(
+        'day', 'category'
+    ).annotate(total=Sum('amount')).order_by()
+    expense_rows = []
+    for row in expenses:
+        days[row['day']]['expense_total'] += row['total'] or 0
+        expense_rows.append(DailyExpenseSummary(date=row['day'], category=row['category'], amount=row['total'] or 0))
+
+    with transaction.atomic():
+        DailySummary.objects.all().delete()
+        DailyExpenseSummary.objects.all().delete()
+        DailySummary.objects.bulk_create(
+            [DailySummary(date=day, **totals) for day, totals in days.items()],
+            batch_size=500,
+        )
+        DailyExpenseSummary.objects.bulk_create(expense_rows, batch_size=500)
+    # bulk_create ไม่ส่ง signal: รายงาน (ETag) และกราฟที่ cache ไว้ต้องอ่านใหม่
+    versions.bump(Sale, SaleItem, DailySummary)
+    timeseries.invalidate()
+    return len(days), len(expense_rows)
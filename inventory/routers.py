@@ -0,0 +1,79 @@
+"""ส่ง query อ่านของรายงานและการส่งออกข้อมูลไปที่ฐานข้อมูลสำเนา (read replica)
+
+ตั้งค่า DATABASE_REPLICA_URL แล้ว settings จะเพิ่มฐานข้อมูล 'replica' ให้
+view ที่ครอบด้วย @read_replica (หรือโค้ดใน with use_replica():) จะอ่านจาก
+replica ส่วนการเขียนทั้งหมดยังไปที่ 'default' เสมอ ถ้าไม่มี replica ทุกอย่าง
+ใช้ 'default' เหมือนเดิม
+
+ใช้เฉพาะ view ที่อ่านอย่างเดียวและยอมรับข้อมูลที่ช้ากว่าฐานข้อมูลหลักเล็กน้อย
+(replication lag) ได้ เช่น รายงานย้อนหลังและไฟล์ส่งออก
+สถานะเก็บใน contextvar จึงตามไปถึง thread ที่ view แบบ async ส่งงานไปทำ (aio.gather)
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+from django.http import FileResponse
+
+REPLICA = 'replica'
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+@contextmanager
+def use_replica():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view):
+    """decorator ของ view ที่อ่านอย่างเดียว (รองรับทั้ง view แบบ sync และ async)"""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            with use_replica():
+                return await view(*args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with use_replica():
+                response = view(*args, **kwargs)
+            if getattr(response, 'streaming', False) and not response.is_async and not isinstance(response, FileResponse):
+                # เนื้อหาแบบ streaming ถูกอ่านจากฐานข้อมูลหลัง view คืนค่าไปแล้ว
+                response.streaming_content = _on_replica(response.streaming_content)
+            return response
+    return wrapper
+
+
+def _on_replica(iterator):
+    # ตั้งค่าใหม่ทุกครั้งที่ดึงข้อมูล เพราะ ASGI อาจดึงแต่ละส่วนใน context ต่างกัน
+    iterator = iter(iterator)
+    while True:
+        with use_replica():
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and REPLICA in connections.settings:
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica เป็นสำเนาของ default ข้อมูลชุดเดียวกัน
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
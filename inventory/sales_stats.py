@@ -0,0 +1,142 @@
+"""สถิติยอดขายรายสินค้า (ทั้งหมด / 7 วัน / 30 วัน)
+
+ทุกครั้งที่เพิ่มหรือลบ SaleItem จะปรับยอดใน ProductSalesDay (ถังรายวัน)
+และ ProductSalesStats (ยอดสะสม + ยอดช่วง 7/30 วัน) แบบ delta ด้วย UPDATE
+แบบ CASE ครั้งเดียวต่อกลุ่ม ยอดช่วงเวลาที่เลยกำหนดจะถูกตัดออกโดย
+roll_windows() (รันวันละครั้งด้วยคำสั่ง rebuild_sales_stats --windows-only)
+ซึ่งอ่านเฉพาะถังรายวัน 30 วันล่าสุด ไม่ต้อง scan รายการขายย้อนหลัง
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum, Case, When, Value, IntegerField, DecimalField
+from django.utils import timezone
+
+from . import timeseries, versions
+from .periods import local_date, local_day
+
+WINDOWS = (7, 30)
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _add(model, filters, key, deltas):
+    """บวก delta ให้หลายแถวด้วย UPDATE เดียว deltas = {ค่า key: {field: delta}}"""
+    deltas = {k: d for k, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return
+    model.objects.bulk_create([model(**filters, **{key: k}) for k in deltas], ignore_conflicts=True)
+    fields = {field for d in deltas.values() for field, value in d.items() if value}
+    updates = {}
+    for field in fields:
+        output = MONEY if field.startswith(('revenue', 'cost')) else IntegerField()
+        updates[field] = F(field) + Case(
+            *[When(**{key: k}, then=Value(d[field])) for k, d in deltas.items() if d.get(field)],
+            default=Value(0),
+            output_field=output,
+        )
+    model.objects.filter(**filters, **{f'{key}__in': list(deltas)}).update(**updates)
+
+
+def record(lines, sign=1):
+    """ปรับสถิติจากรายการขาย lines = [(product_id, วันที่ขาย, จำนวน, ยอดเงิน, ต้นทุน)]
+
+    sign=1 เมื่อเพิ่มรายการขาย และ -1 เมื่อลบ
+    """
+    from .models import ProductSalesDay, ProductSalesStats
+
+    today = timezone.localdate()
+    by_day = defaultdict(lambda: defaultdict(lambda: {'units': 0, 'revenue': Decimal('0'), 'cost': Decimal('0')}))
+    totals = defaultdict(lambda: defaultdict(int))
+    for product_id, day, units, revenue, cost in lines:
+        units, revenue = sign * units, sign * Decimal(revenue)
+        bucket = by_day[day][product_id]
+        bucket['units'] += units
+        bucket['revenue'] += revenue
+        bucket['cost'] += sign * Decimal(cost)
+        stats = totals[product_id]
+        stats['units_total'] += units
+        stats['revenue_total'] += revenue
+        for days in WINDOWS:
+            if today - timedelta(days=days - 1) <= day <= today:
+                stats[f'units_{days}d'] += units
+                stats[f'revenue_{days}d'] += revenue
+
+    with transaction.atomic():
+        for day, deltas in by_day.items():
+            _add(ProductSalesDay, {'date': day}, 'product_id', deltas)
+        _add(ProductSalesStats, {}, 'product_id', totals)
+    if any(day < today for day in by_day):
+        # ยอดชิ้นของวันที่ผ่านมาแล้วเปลี่ยน กราฟยอดขายที่ cache ไว้ใช้ไม่ได้
+        timeseries.invalidate()
+
+
+def record_items(items, sign=1):
+    """ปรับสถิติจาก SaleItem (ต้องมี item.sale)"""
+    record(
+        [
+            (item.product_id, local_date(item.sale.sale_date), item.quantity, item.total_price, item.total_cost)
+            for item in items
+        ],
+        sign,
+    )
+
+
+def roll_windows(today=None):
+    """คำนวณยอด 7/30 วันใหม่จากถังรายวัน (ตัดวันที่เลยช่วงออก)"""
+    from .models import ProductSalesDay, ProductSalesStats
+
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        reset = {}
+        for days in WINDOWS:
+            reset[f'units_{days}d'] = 0
+            reset[f'revenue_{days}d'] = 0
+        ProductSalesStats.objects.exclude(**{f'units_{max(WINDOWS)}d': 0, f'revenue_{max(WINDOWS)}d': 0}).update(**reset)
+        for days in WINDOWS:
+            rows = ProductSalesDay.objects.filter(
+                date__gte=today - timedelta(days=days - 1), date__lte=today
+            ).values('product_id').annotate(units=Sum('units'), revenue=Sum('revenue')).order_by()
+            _add(ProductSalesStats, {}, 'product_id', {
+                row['product_id']: {f'units_{days}d': row['units'], f'revenue_{days}d': row['revenue']}
+                for row in rows
+            })
+
+
+def rebuild(batch_size=1000):
+    """สร้างถังรายวันและสถิติใหม่ทั้งหมดจาก SaleItem คืนค่าจำนวน (ถังรายวัน, สินค้า)"""
+    from .models import Sale, SaleItem, DailySummary, ProductSalesDay, ProductSalesStats
+
+    rows = SaleItem.objects.annotate(day=local_day('sale__sale_date')).values(
+        'product_id', 'day'
+    ).annotate(units=Sum('quantity'), revenue=Sum('total_price'), cost=Sum('total_cost')).order_by()
+
+    with transaction.atomic():
+        ProductSalesDay.objects.all().delete()
+        ProductSalesStats.objects.all().delete()
+        buckets = []
+        totals = defaultdict(lambda: {'units_total': 0, 'revenue_total': Decimal('0')})
+        for row in rows.iterator(chunk_size=batch_size):
+            buckets.append(ProductSalesDay(
+                product_id=row['product_id'],
+                date=row['day'],
+                units=row['units'] or 0,
+                revenue=row['revenue'] or 0,
+                cost=row['cost'] or 0,
+            ))
+            totals[row['product_id']]['units_total'] += row['units'] or 0
+            totals[row['product_id']]['revenue_total'] += row['revenue'] or 0
+            if len(buckets) >= batch_size:
+                ProductSalesDay.objects.bulk_create(buckets)
+                buckets = []
+        ProductSalesDay.objects.bulk_create(buckets)
+        ProductSalesStats.objects.bulk_create(
+            [ProductSalesStats(product_id=product_id, **values) for product_id, values in totals.items()],
+            batch_size=batch_size,
+        )
+        roll_windows()
+    # bulk_create ไม่ส่ง signal: รายงาน (ETag) และกราฟที่ cache ไว้ต้องอ่านใหม่
+    versions.bump(Sale, SaleItem, DailySummary, ProductSalesDay)
+    timeseries.invalidate()
+    return ProductSalesDay.objects.count(), len(totals)
@@ -0,0 +1,170 @@
+"""ดัชนีค้นหาสินค้า
+
+ชื่อสินค้าภาษาไทยไม่มีการเว้นวรรคระหว่างคำ จึงทำดัชนีเป็น n-gram (3 ตัวอักษร)
+ของชื่อที่ตัดช่องว่างออก ส่วนรหัสสินค้าทำดัชนีเป็น prefix ทุกความยาว
+การค้นหาจึงเป็นการเทียบค่าตรง ๆ บน index ของ ProductSearchTerm แทนการ
+scan ทั้งตารางด้วย icontains และเรียงผลตามคะแนนที่ตรงกัน
+
+คำค้นที่สั้นกว่า NGRAM_SIZE ไม่มี n-gram ให้เทียบ จึงค้นด้วย icontains ของชื่อ
+และ prefix ของรหัสแทน (เรียงตามคะแนนแบบเดียวกัน)
+"""
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+
+NGRAM_SIZE = 3
+NAME_WEIGHT = 1
+CODE_PREFIX_WEIGHT = 100
+CODE_EXACT_WEIGHT = 200
+PAGE_SIZE = 50
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFC', text or '').lower()
+    return ''.join(ch for ch in text if not ch.isspace())
+
+
+def ngrams(text):
+    text = normalize(text)
+    if len(text) <= NGRAM_SIZE:
+        return {text} if text else set()
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def terms_for(product):
+    """คืน {(term, weight)} ของสินค้าหนึ่งรายการ"""
+    code = normalize(product.code)
+    terms = {('n:' + gram, NAME_WEIGHT) for gram in ngrams(product.name)}
+    terms.update(('c:' + code[:i], CODE_PREFIX_WEIGHT) for i in range(1, len(code)))
+    if code:
+        terms.add(('c:' + code, CODE_EXACT_WEIGHT))
+    return terms
+
+
+def _insert_terms(rows):
+    """เพิ่มแถว (product_id, term, weight) ด้วย executemany
+
+    สินค้าหนึ่งรายการมีคำค้นหลายสิบแถว การสร้าง model instance ทีละแถว
+    ผ่าน bulk_create จึงกินเวลา CPU มากกว่าการเขียนลงฐานข้อมูลหลายเท่า
+    """
+    from .models import ProductSearchTerm
+
+    if not rows:
+        return
+    meta = ProductSearchTerm._meta
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(meta.get_field(name).column) for name in ('product', 'term', 'weight'))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {qn(meta.db_table)} ({columns}) VALUES (%s, %s, %s)', rows)
+
+
+def index_product(product):
+    index_products([product])
+
+
+def index_products(products):
+    """ทำดัชนีใหม่ให้สินค้าหลายรายการ (ลบ/เพิ่มทั้งกลุ่มพร้อมกัน)"""
+    from .models import ProductSearchTerm
+
+    with transaction.atomic():
+        ProductSearchTerm.objects.filter(product_id__in=[product.pk for product in products]).delete()
+        _insert_terms([
+            (product.pk, term, weight)
+            for product in products
+            for term, weight in terms_for(product)
+        ])
+
+
+def rebuild(batch_size=1000):
+    """สร้างดัชนีค้นหาใหม่ทั้งหมด คืนค่าจำนวนสินค้า"""
+    from .models import Product, ProductSearchTerm
+
+    count = 0
+    with transaction.atomic():
+        ProductSearchTerm.objects.all().delete()
+        batch = []
+        for product in Product.objects.only('pk', 'code', 'name').iterator(chunk_size=batch_size):
+            batch.extend((product.pk, term, weight) for term, weight in terms_for(product))
+            count += 1
+            if len(batch) >= batch_size:
+                _insert_terms(batch)
+                batch = []
+        _insert_terms(batch)
+    return count
+
+
+def _cursor(value):
+    """แปลง cursor 'คะแนน.id' หรือ 'id' จาก query string"""
+    try:
+        return [int(part) for part in value.split('.')] if value else None
+    except ValueError:
+        return None
+
+
+def search_products(query='', category_id=None, after=None, page_size=PAGE_SIZE):
+    """ค้นหาสินค้าแบบแบ่งหน้าด้วย keyset
+
+    คืนค่า (products, next_cursor) โดย next_cursor เป็น None เมื่อไม่มีหน้าถัดไป
+    """
+    from .models import Product, ProductSearchTerm
+
+    cursor = _cursor(after)
+    products = Product.objects.select_related('category')
+    code = normalize(query)
+
+    if not code:
+        if category_id:
+            products = products.filter(category_id=category_id)
+        if cursor:
+            products = products.filter(pk__lt=cursor[-1])
+        page = list(products.order_by('-pk')[:page_size + 1])
+        next_cursor = str(page[page_size - 1].pk) if len(page) > page_size else None
+        return page[:page_size], next_cursor
+
+    if len(code) < NGRAM_SIZE:
+        return _search_short(products, code, category_id, cursor, page_size)
+
+    grams = ngrams(query)
+    terms = ProductSearchTerm.objects.filter(
+        Q(term__in=['n:' + gram for gram in grams]) | Q(term='c:' + code)
+    )
+    if category_id:
+        terms = terms.filter(product__category_id=category_id)
+    # ชื่อต้องมีครบทุก n-gram ของคำค้น (หรือรหัสตรง ซึ่งน้ำหนักมากกว่าเสมอ)
+    ranked = terms.values('product_id').annotate(score=Sum('weight')).filter(score__gte=len(grams))
+    if cursor and len(cursor) == 2:
+        score, pk = cursor
+        ranked = ranked.filter(Q(score__lt=score) | Q(score=score, product_id__lt=pk))
+    rows = list(ranked.order_by('-score', '-product_id')[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = f"{last['score']}.{last['product_id']}"
+        rows = rows[:page_size]
+    found = products.in_bulk([row['product_id'] for row in rows])
+    return [found[row['product_id']] for row in rows if row['product_id'] in found], next_cursor
+
+
+def _search_short(products, code, category_id, cursor, page_size):
+    """ค้นหาด้วยคำค้นสั้นกว่า n-gram: ชื่อที่มีคำค้น หรือรหัสที่ขึ้นต้นด้วยคำค้น"""
+    if category_id:
+        products = products.filter(category_id=category_id)
+    ranked = products.filter(Q(name__icontains=code) | Q(code__istartswith=code)).annotate(
+        score=Case(
+            When(code__iexact=code, then=Value(CODE_EXACT_WEIGHT)),
+            When(code__istartswith=code, then=Value(CODE_PREFIX_WEIGHT)),
+            default=Value(NAME_WEIGHT),
+            output_field=IntegerField(),
+        ),
+    )
+    if cursor and len(cursor) == 2:
+        score, pk = cursor
+        ranked = ranked.filter(Q(score__lt=score) | Q(score=score, pk__lt=pk))
+    page = list(ranked.order_by('-score', '-pk')[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        last = page[page_size - 1]
+        next_cursor = f"{last.score}.{last.pk}"
+    return page[:page_size], next_cursor
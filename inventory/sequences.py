@@ -0,0 +1,126 @@
+"""ตัวจ่ายเลขที่เอกสาร (INV-/PO-) จากตารางตัวนับ DocumentSequence
+
+โหมดปกติ: แต่ละ process จองเลขเป็นช่วง (block_size) ด้วย UPDATE เดียว
+แล้วจ่ายจากหน่วยความจำ ไม่ต้อง query ทุกใบ และไม่ชนกันระหว่าง worker
+(เลขอาจข้ามได้เมื่อ worker ปิดตัว และไม่เรียงตามเวลาระหว่าง worker)
+
+โหมด gap_free: เลื่อนตัวนับทีละ 1 ใน transaction เดียวกับการบันทึกเอกสาร
+เลขจะเรียงต่อเนื่องไม่ขาด (เหมาะกับใบกำกับภาษี) แต่การออกเลขจะต่อคิวกัน
+
+Sale.save, Purchase.save และ checkout ขอเลขด้วย early_number() ก่อนเปิด transaction
+ของเอกสาร เพื่อให้จองเป็นช่วงได้แม้บน SQLite (ดู next_value)
+
+ตั้งค่าได้ใน settings.DOCUMENT_SEQUENCES เช่น
+    {'INV': {'gap_free': True}, 'PO': {'block_size': 50}}
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+
+DEFAULT_BLOCK_SIZE = 20
+
+_lock = threading.Lock()
+_blocks = {}
+
+# process ลูกที่ fork ออกมา (เช่น gunicorn --preload) ต้องไม่ใช้ช่วงเลขที่ process แม่จองไว้
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_blocks.clear)
+
+
+def _config(name):
+    conf = getattr(settings, 'DOCUMENT_SEQUENCES', {}).get(name, {})
+    return conf.get('block_size', DEFAULT_BLOCK_SIZE), conf.get('gap_free', False)
+
+
+def _advance(conn, name, count):
+    """เลื่อนตัวนับ count ค่า คืนค่าแรกของช่วงที่ได้"""
+    from .models import DocumentSequence
+
+    table = conn.ops.quote_name(DocumentSequence._meta.db_table)
+    with conn.cursor() as cursor:
+        for _ in range(2):
+            if conn.vendor in ('postgresql', 'sqlite'):
+                cursor.execute(
+                    f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s RETURNING next_value",
+                    [count, name],
+                )
+                row = cursor.fetchone()
+            else:
+                cursor.execute(f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s", [count, name])
+                cursor.execute(f"SELECT next_value FROM {table} WHERE name = %s", [name])
+                row = cursor.fetchone()
+            if row:
+                return row[0] - count
+            # ยังไม่มีตัวนับของเอกสารนี้ (อาจมี process อื่นสร้างพร้อมกัน)
+            sid = conn.savepoint()
+            try:
+                cursor.execute(f"INSERT INTO {table} (name, next_value) VALUES (%s, 1)", [name])
+                conn.savepoint_commit(sid)
+            except IntegrityError:
+                conn.savepoint_rollback(sid)
+    raise RuntimeError(f"ไม่สามารถออกเลขที่เอกสาร {name}")
+
+
+def _reserve(name, count):
+    if not connection.in_atomic_block:
+        with transaction.atomic():
+            return _advance(connection, name, count)
+    # อยู่ใน transaction ของผู้เรียก: จองผ่าน connection แยกแล้ว commit ทันที
+    # เพื่อไม่ให้ช่วงเลขที่จำไว้ในหน่วยความจำถูกคืนเมื่อผู้เรียก rollback
+    other = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        other.set_autocommit(False)
+        start = _advance(other, name, count)
+        other.commit()
+        return start
+    finally:
+        other.close()
+
+
+def next_value(name):
+    block_size, gap_free = _config(name)
+    # SQLite เขียนได้ครั้งละหนึ่ง connection ถ้าผู้เรียกอยู่ใน transaction แล้ว connection แยก
+    # ใน _reserve จะรอ lock ที่ transaction นั้นถือไว้เอง (ค้างจนหมด busy_timeout)
+    # จึงเลื่อนตัวนับใน transaction เดียวกันแบบ gap_free แทน
+    if gap_free or (connection.vendor == 'sqlite' and connection.in_atomic_block):
+        # ล็อกแถวตัวนับไว้จนกว่า transaction ของเอกสารจะ commit
+        with transaction.atomic():
+            return _advance(connection, name, 1)
+    with _lock:
+        block = _blocks.get(name)
+        if block is None or block[0] >= block[1]:
+            start = _reserve(name, block_size)
+            block = _blocks[name] = [start, start + block_size]
+        value = block[0]
+        block[0] += 1
+    return value
+
+
+def next_number(name):
+    """คืนเลขที่เอกสารถัดไป เช่น INV-00042"""
+    return f"{name}-{next_value(name):05d}"
+
+
+def early_number(name):
+    """เลขที่เอกสารที่ออกก่อนเปิด transaction ของเอกสาร เพื่อให้จองเป็นช่วงได้ทุกฐานข้อมูล
+
+    คืน '' ถ้าต้องออกภายใน transaction ของเอกสาร: โหมด gap_free (เลขต้อง rollback
+    ไปพร้อมเอกสาร) หรือผู้เรียกอยู่ใน transaction อยู่แล้ว
+    """
+    if _config(name)[1] or connection.in_atomic_block:
+        return ''
+    return next_number(name)
+
+
+def reset(name, value):
+    """ตั้งตัวนับให้เลขถัดไปเป็น value (เช่น หลังสร้างเอกสารจำนวนมากด้วย bulk_create)
+
+    ทิ้งช่วงเลขที่จองไว้ใน process นี้ด้วย process อื่นที่จองไว้ก่อนต้องเริ่มใหม่
+    """
+    from .models import DocumentSequence
+
+    DocumentSequence.objects.update_or_create(name=name, defaults={'next_value': value})
+    with _lock:
+        _blocks.pop(name, None)
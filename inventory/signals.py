@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, post_delete
+
+from . import dashboard, versions
+from .models import Category, Product, Supplier, Sale, SaleItem, Purchase, PurchaseItem, Expense
+
+
+# ==================== แคชแดชบอร์ด ====================
+# tile ที่ต้องล้างเมื่อโมเดลแต่ละตัวเปลี่ยน
+DASHBOARD_DEPENDENCIES = {
+    Sale: ('summary', 'recent_sales'),
+    SaleItem: ('top_products',),
+    Purchase: ('summary',),
+    Expense: ('summary',),
+    Product: ('low_stock', 'top_products'),
+}
+
+
+def invalidate_dashboard(sender, **kwargs):
+    dashboard.invalidate(*DASHBOARD_DEPENDENCIES[sender])
+
+
+for model in DASHBOARD_DEPENDENCIES:
+    post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_{model.__name__}_save')
+    post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f'dashboard_{model.__name__}_delete')
+
+
+# ==================== เวอร์ชันของโมเดล (คีย์แคชของ template) ====================
+VERSIONED_MODELS = (Category, Product, Supplier, Purchase, PurchaseItem, Sale, SaleItem, Expense)
+
+
+def bump_version(sender, **kwargs):
+    versions.bump(sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=model, dispatch_uid=f'version_{model.__name__}_save')
+    post_delete.connect(bump_version, sender=model, dispatch_uid=f'version_{model.__name__}_delete')
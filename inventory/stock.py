@@ -0,0 +1,148 @@
+"""บันทึกความเคลื่อนไหวสต็อก
+
+ทุกการเปลี่ยนแปลง Product.stock_quantity ต้องผ่าน record() ซึ่งเพิ่มแถวใน
+StockMovement และปรับยอดด้วย F() ในคำสั่ง UPDATE เดียว แทนการโหลด
+สินค้ามาบวก/ลบแล้ว save() ทั้งแถว จึงไม่มียอดหายเมื่อหลายเครื่องขาย
+สินค้าเดียวกันพร้อมกัน
+
+การปรับสต็อกไม่ bump เวอร์ชันของ Product (versions.py) เพื่อไม่ให้การขายทุกบิล
+ต้องเขียนแถวเวอร์ชันเดียวกัน หน้าที่แสดงยอดคงเหลือจึงใช้ latest_movement() ใน ETag
+"""
+from django.db import transaction
+from django.db.models import F, Q, Case, When, Value, IntegerField
+from django.utils import timezone
+
+from . import costs, dashboard
+
+
+def refresh_low_stock(queryset):
+    """ปรับสถานะสต็อกต่ำ (Product.low_stock_since) ของสินค้าใน queryset ให้ตรงกับยอดคงเหลือ
+
+    แก้เฉพาะแถวที่สถานะเปลี่ยน สินค้าที่เพิ่งต่ำจะได้เวลาปัจจุบันและรอแจ้งเตือน
+    สินค้าที่กลับมาพอจะถูกล้างสถานะ คืนจำนวนแถวที่แก้
+    """
+    low = Q(stock_quantity__lte=F('min_stock'))
+    return queryset.filter(
+        Q(low, low_stock_since__isnull=True) | Q(~low, low_stock_since__isnull=False)
+    ).update(
+        low_stock_since=Case(When(low, then=Value(timezone.now())), default=None),
+        low_stock_alerted=False,
+    )
+
+
+def latest_movement():
+    """id ของความเคลื่อนไหวสต็อกล่าสุด (อ่านจาก primary key) เปลี่ยนทุกครั้งที่ยอดคงเหลือเปลี่ยน"""
+    from .models import StockMovement
+
+    return StockMovement.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+
+class InsufficientStock(Exception):
+    """สินค้าคงเหลือไม่พอสำหรับการตัดสต็อก"""
+
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f"สินค้า {product_id} เหลือไม่พอสำหรับ {requested} หน่วย")
+
+
+class _PartialUpdate(Exception):
+    pass
+
+
+def _check_kind(kind):
+    """ประเภทความเคลื่อนไหวต้องเป็นหนึ่งใน choices ของ StockMovement.kind"""
+    from .models import StockMovement
+
+    if kind not in dict(StockMovement._meta.get_field('kind').choices):
+        raise ValueError(f"ประเภทความเคลื่อนไหวสต็อกไม่ถูกต้อง: {kind!r}")
+
+
+def record(product, quantity, kind, reference='', check_stock=False, unit_cost=None):
+    """ปรับสต็อกของสินค้าตาม quantity (+เข้า / -ออก) และบันทึกความเคลื่อนไหว
+
+    ถ้า check_stock=True การตรวจยอดคงเหลือและการตัดสต็อกจะอยู่ใน UPDATE
+    แบบมีเงื่อนไขคำสั่งเดียว ถ้าไม่พอจะ raise InsufficientStock
+    ถ้าระบุ unit_cost (รับสินค้า) จะปรับต้นทุนเฉลี่ยใน UPDATE เดียวกัน
+    """
+    from .models import Product, StockMovement
+
+    _check_kind(kind)
+    product_id = getattr(product, 'pk', product)
+    with transaction.atomic():
+        rows = Product.objects.filter(pk=product_id)
+        if check_stock and quantity < 0:
+            rows = rows.filter(stock_quantity__gte=-quantity)
+        updates = {}
+        if unit_cost is not None and quantity > 0:
+            updates['average_cost'] = costs.average_after_receipt(quantity, unit_cost)
+        updated = rows.update(
+            stock_quantity=F('stock_quantity') + quantity,
+            updated_at=timezone.now(),
+            **updates,
+        )
+        if not updated:
+            if check_stock:
+                raise InsufficientStock(product_id, -quantity)
+            raise Product.DoesNotExist(f"ไม่พบสินค้า {product_id}")
+        refresh_low_stock(Product.objects.filter(pk=product_id))
+        dashboard.invalidate('low_stock')
+        return StockMovement.objects.create(
+            product_id=product_id,
+            kind=kind,
+            quantity=quantity,
+            reference=reference,
+        )
+
+
+def record_many(quantities, kind, reference='', check_stock=False):
+    """ปรับสต็อกหลายสินค้าพร้อมกันด้วย UPDATE เดียว quantities = {product_id: จำนวน (+เข้า / -ออก)}
+
+    ถ้า check_stock=True และมีสินค้าใดเหลือไม่พอ จะไม่ตัดสต็อกเลยสักรายการ
+    และ raise InsufficientStock ของสินค้ารายการแรกที่ไม่พอ
+    """
+    from .models import Product, StockMovement
+
+    _check_kind(kind)
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return []
+    with transaction.atomic():
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    rows = Product.objects.filter(pk__in=list(quantities))
+                    if check_stock:
+                        rows = rows.filter(stock_quantity__gte=Case(
+                            *[When(pk=product_id, then=Value(-quantity)) for product_id, quantity in quantities.items()],
+                            output_field=IntegerField(),
+                        ))
+                    updated = rows.update(
+                        stock_quantity=F('stock_quantity') + Case(
+                            *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+                            output_field=IntegerField(),
+                        ),
+                        updated_at=timezone.now(),
+                    )
+                    if updated != len(quantities):
+                        raise _PartialUpdate
+                break
+            except _PartialUpdate:
+                # ยกเลิกการตัดสต็อกทั้งหมดแล้วหาสินค้าที่ไม่พอจากยอดเดิม
+                current = dict(Product.objects.filter(pk__in=list(quantities)).values_list('pk', 'stock_quantity'))
+                for product_id, quantity in quantities.items():
+                    if product_id not in current:
+                        raise Product.DoesNotExist(f"ไม่พบสินค้า {product_id}")
+                    if current[product_id] < -quantity:
+                        raise InsufficientStock(product_id, -quantity)
+                # ตอนนี้ทุกสินค้าพอแล้ว (เช่น มีการรับสินค้าเข้าระหว่างนั้น) ลองตัดใหม่อีกครั้ง
+        else:
+            # ยอดยังเปลี่ยนไปมาระหว่างตรวจ แจ้งเป็นสต็อกไม่พอของสินค้าที่ตัดรายการแรก
+            product_id, quantity = min(quantities.items(), key=lambda item: item[1])
+            raise InsufficientStock(product_id, -quantity)
+        refresh_low_stock(Product.objects.filter(pk__in=list(quantities)))
+        dashboard.invalidate('low_stock')
+        return StockMovement.objects.bulk_create([
+            StockMovement(product_id=product_id, kind=kind, quantity=quantity, reference=reference)
+            for product_id, quantity in quantities.items()
+        ])
@@ -0,0 +1,314 @@
+"""สร้างข้อมูลจำลองของร้านสำหรับทดสอบประสิทธิภาพ
+
+สร้างข้อมูลทุกโมเดลใน inventory.models ด้วย bulk_create (ไม่ผ่าน save() ทีละแถว)
+แล้วคำนวณตารางที่ดูแลต่อเนื่องตามปกติใหม่ทั้งหมด: ตารางสรุปรายวัน
+สถิติยอดขาย ดัชนีค้นหา ตัวนับเลขที่เอกสาร และดัชนีรหัสสินค้า
+
+ข้อมูลสุ่มจาก seed เดียวกันจะได้ผลเหมือนเดิมทุกครั้ง สินค้าขายดีตามการแจกแจง
+แบบ Zipf (สินค้าไม่กี่รายการขายได้มาก) และสต็อกคงเหลือสอดคล้องกับประวัติ
+ความเคลื่อนไหว (ยอดยกมา + รับเข้า - ขาย)
+"""
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import costs, dashboard, rollups, sales_stats, search, sequences, stock, versions
+
+CENT = Decimal('0.01')
+
+# หมวดหมู่: [(ชื่อสินค้า, [ขนาด/หน่วยบรรจุ], หน่วย, (ราคาทุนต่ำสุด, สูงสุด))]
+CATALOG = {
+    'เครื่องดื่ม': [
+        ('น้ำดื่ม', ['600 มล.', '1.5 ลิตร'], 'ขวด', (4, 12)),
+        ('น้ำอัดลม', ['325 มล.', '1.25 ลิตร'], 'ขวด', (10, 28)),
+        ('ชาเขียว', ['420 มล.'], 'ขวด', (12, 18)),
+        ('กาแฟกระป๋อง', ['180 มล.'], 'กระป๋อง', (9, 14)),
+        ('นมจืด', ['225 มล.'], 'กล่อง', (8, 12)),
+    ],
+    'ขนมขบเคี้ยว': [
+        ('มันฝรั่งทอด', ['50 กรัม', '75 กรัม'], 'ถุง', (15, 30)),
+        ('ข้าวเกรียบ', ['60 กรัม'], 'ถุง', (8, 15)),
+        ('ขนมปังกรอบ', ['100 กรัม'], 'ห่อ', (10, 25)),
+        ('เวเฟอร์', ['50 กรัม'], 'ห่อ', (4, 10)),
+    ],
+    'เครื่องปรุง': [
+        ('น้ำปลา', ['300 มล.', '700 มล.'], 'ขวด', (15, 40)),
+        ('ซีอิ๊วขาว', ['300 มล.'], 'ขวด', (18, 30)),
+        ('ซอสหอยนางรม', ['300 มล.', '600 มล.'], 'ขวด', (20, 45)),
+        ('น้ำตาลทราย', ['1 กก.'], 'ถุง', (20, 28)),
+        ('ผงชูรส', ['250 กรัม'], 'ถุง', (18, 30)),
+    ],
+    'อาหารแห้ง': [
+        ('ข้าวหอมมะลิ', ['5 กก.'], 'ถุง', (150, 220)),
+        ('บะหมี่กึ่งสำเร็จรูป', ['60 กรัม'], 'ซอง', (5, 7)),
+        ('ปลากระป๋อง', ['155 กรัม'], 'กระป๋อง', (14, 22)),
+        ('วุ้นเส้น', ['100 กรัม'], 'ห่อ', (10, 18)),
+    ],
+    'ของใช้ในบ้าน': [
+        ('ผงซักฟอก', ['800 กรัม'], 'ถุง', (45, 80)),
+        ('น้ำยาล้างจาน', ['500 มล.'], 'ถุง', (18, 30)),
+        ('กระดาษทิชชู่', ['6 ม้วน'], 'แพ็ค', (45, 90)),
+        ('ถุงขยะ', ['30 ใบ'], 'แพ็ค', (20, 40)),
+    ],
+    'ของใช้ส่วนตัว': [
+        ('สบู่ก้อน', ['70 กรัม'], 'ก้อน', (10, 20)),
+        ('ยาสีฟัน', ['150 กรัม'], 'หลอด', (30, 60)),
+        ('แชมพู', ['170 มล.'], 'ขวด', (45, 90)),
+        ('ผ้าอนามัย', ['8 ชิ้น'], 'ห่อ', (25, 45)),
+    ],
+}
+BRANDS = ['ตราช้าง', 'ตรานกแก้ว', 'ตราดอกบัว', 'ตราแม่ครัว', 'ตราไทยทอง', 'ตราสามดาว', 'ตราภูเขา', 'ตราเรือใบ']
+SUPPLIERS = ['สยามค้าส่ง', 'ไทยเทรดดิ้ง', 'รุ่งเรืองพาณิชย์', 'เจริญสินค้าอุปโภค', 'ศรีสุขการค้า', 'มั่งมีเครื่องดื่ม']
+FIRST_NAMES = ['สมชาย', 'สมหญิง', 'วิชัย', 'มาลี', 'ประเสริฐ', 'สุดา', 'อนันต์', 'กาญจนา', 'ธนพล', 'ปิยะนุช']
+EXPENSE_DESCRIPTIONS = {
+    'utilities': 'ค่าน้ำ-ค่าไฟประจำเดือน',
+    'rent': 'ค่าเช่าร้าน',
+    'salary': 'เงินเดือนพนักงาน',
+    'maintenance': 'ซ่อมตู้แช่',
+    'other': 'ค่าใช้จ่ายเบ็ดเตล็ด',
+}
+
+TABLES = (
+    'SaleItem', 'Sale', 'PurchaseItem', 'Purchase', 'Expense', 'StockMovement',
+    'ProductSalesDay', 'ProductSalesStats', 'ProductSearchTerm', 'Product', 'Category', 'Supplier',
+    'DailySummary', 'DailyExpenseSummary', 'DocumentSequence',
+)
+
+
+def _money(value):
+    return Decimal(value).quantize(CENT)
+
+
+def _random_moment(rng, start, days):
+    """เวลาสุ่มในช่วงเปิดร้าน (07:00-21:00) ภายใน days วันนับจาก start"""
+    day = start + timedelta(days=rng.randrange(days))
+    moment = datetime.combine(day, time(7)) + timedelta(seconds=rng.randrange(14 * 3600))
+    return min(timezone.make_aware(moment), timezone.now())
+
+
+def has_data():
+    from .models import Product, Sale, Purchase, Expense
+
+    return any(model.objects.exists() for model in (Product, Sale, Purchase, Expense))
+
+
+def clear():
+    """ลบข้อมูลของร้านทั้งหมด (ไม่รวมผู้ใช้) ด้วยคำสั่ง flush ของฐานข้อมูล"""
+    from django.apps import apps
+
+    tables = [apps.get_model('inventory', name)._meta.db_table for name in TABLES]
+    connection.ops.execute_sql_flush(connection.ops.sql_flush(no_style(), tables, reset_sequences=True))
+    for name in ('INV', 'PO'):
+        sequences.reset(name, 1)
+
+
+def generate(products=1000, sales=10000, purchases=500, expenses=200, years=2, seed=1, batch_size=2000, log=None):
+    """สร้างข้อมูลจำลอง คืน dict จำนวนแถวของแต่ละโมเดล"""
+    from .models import (
+        Category, Product, Supplier, Purchase, PurchaseItem, Sale, SaleItem, Expense, StockMovement,
+    )
+
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    days = max(1, int(365 * years))
+    start = today - timedelta(days=days - 1)
+    counts = {}
+
+    with transaction.atomic():
+        # หมวดหมู่และผู้จัดจำหน่าย
+        Category.objects.bulk_create([Category(name=name) for name in CATALOG])
+        categories = dict(Category.objects.values_list('name', 'pk'))
+        Supplier.objects.bulk_create([
+            Supplier(
+                name=f'บริษัท {name} จำกัด',
+                contact_person=f'คุณ{rng.choice(FIRST_NAMES)}',
+                phone=f'02-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}',
+            )
+            for name in SUPPLIERS
+        ])
+        supplier_ids = list(Supplier.objects.values_list('pk', flat=True))
+        counts['categories'], counts['suppliers'] = len(categories), len(supplier_ids)
+
+        # สินค้า
+        templates = [
+            (category, name, size, unit, prices)
+            for category, items in CATALOG.items()
+            for name, sizes, unit, prices in items
+            for size in sizes
+        ]
+        rows = []
+        for i in range(products):
+            category, name, size, unit, (low, high) = rng.choice(templates)
+            cost = _money(rng.uniform(low, high))
+            rows.append(Product(
+                code=f'885{i + 1:010d}',
+                name=f'{name} {rng.choice(BRANDS)} {size}',
+                category_id=categories[category],
+                unit=unit,
+                cost_price=cost,
+                average_cost=cost,
+                selling_price=_money(cost * Decimal(rng.uniform(1.1, 1.45))),
+                min_stock=rng.randrange(5, 30),
+            ))
+        Product.objects.bulk_create(rows, batch_size=batch_size)
+        # auto_now_add ตั้งเป็นเวลาปัจจุบัน ให้สินค้ามีอยู่ตั้งแต่ต้นช่วงข้อมูล
+        Product.objects.update(created_at=timezone.make_aware(datetime.combine(start, time(7))))
+        catalog = list(Product.objects.order_by('pk').values_list('pk', 'selling_price', 'cost_price'))
+        counts['products'] = len(catalog)
+        log(f'สินค้า {len(catalog)} รายการ')
+
+        # ความนิยมของสินค้าแบบ Zipf
+        order = list(range(len(catalog)))
+        rng.shuffle(order)
+        weights = [0.0] * len(catalog)
+        for rank, index in enumerate(order, start=1):
+            weights[index] = 1 / rank ** 0.8
+        cumulative, total = [], 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+
+        sold = defaultdict(int)
+        received = defaultdict(int)
+        movements = []
+
+        # การขาย (เรียงตามวันที่ เลขที่ใบเสร็จจึงเรียงตามเวลา)
+        moments = sorted(_random_moment(rng, start, days) for _ in range(sales))
+        for offset in range(0, len(moments), batch_size):
+            chunk = moments[offset:offset + batch_size]
+            sale_rows, lines = [], []
+            for n, moment in enumerate(chunk, start=offset + 1):
+                picked = rng.choices(range(len(catalog)), cum_weights=cumulative, k=rng.choice((1, 1, 2, 2, 3, 3, 4, 5, 8)))
+                items = []
+                for index in dict.fromkeys(picked):
+                    pk, price, _ = catalog[index]
+                    quantity = rng.choice((1, 1, 1, 2, 2, 3, 6))
+                    items.append((pk, quantity, price, price * quantity))
+                total_amount = sum(item[3] for item in items)
+                discount = _money(rng.choice((5, 10, 20))) if rng.random() < 0.1 and total_amount > 100 else Decimal('0')
+                sale_rows.append(Sale(
+                    sale_number=f'INV-{n:05d}',
+                    sale_date=moment,
+                    customer_name=f'คุณ{rng.choice(FIRST_NAMES)}' if rng.random() < 0.2 else '',
+                    total_amount=total_amount,
+                    discount=discount,
+                    net_amount=total_amount - discount,
+                    payment_method=rng.choices(('cash', 'transfer', 'card'), weights=(70, 25, 5))[0],
+                ))
+                lines.append(items)
+            Sale.objects.bulk_create(sale_rows)
+            sale_ids = dict(Sale.objects.filter(
+                sale_number__in=[sale.sale_number for sale in sale_rows]
+            ).values_list('sale_number', 'pk'))
+            item_rows = []
+            for sale, items in zip(sale_rows, lines):
+                for pk, quantity, price, line_total in items:
+                    item_rows.append(SaleItem(
+                        sale_id=sale_ids[sale.sale_number], product_id=pk,
+                        quantity=quantity, unit_price=price, total_price=line_total,
+                    ))
+                    movements.append(StockMovement(product_id=pk, kind='sale', quantity=-quantity, reference=sale.sale_number))
+                    sold[pk] += quantity
+            SaleItem.objects.bulk_create(item_rows, batch_size=batch_size)
+            StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+            movements = []
+            log(f'การขาย {offset + len(chunk)}/{sales}')
+        counts['sales'] = sales
+        counts['sale_items'] = SaleItem.objects.count()
+
+        # ใบสั่งซื้อ
+        purchase_rows, purchase_lines = [], []
+        for n, moment in enumerate(sorted(_random_moment(rng, start, days) for _ in range(purchases)), start=1):
+            age = (today - timezone.localdate(moment)).days
+            if rng.random() < 0.03:
+                status = 'cancelled'
+            else:
+                status = 'received' if age > 7 else rng.choice(('pending', 'received'))
+            items = []
+            for index in dict.fromkeys(rng.choices(range(len(catalog)), cum_weights=cumulative, k=rng.randrange(3, 15))):
+                pk, _, cost = catalog[index]
+                quantity = rng.choice((12, 24, 36, 48, 60, 120))
+                items.append((pk, quantity, cost, cost * quantity))
+            purchase_rows.append(Purchase(
+                purchase_number=f'PO-{n:05d}',
+                supplier_id=rng.choice(supplier_ids),
+                purchase_date=moment,
+                received_date=min(moment + timedelta(days=rng.randrange(1, 5)), timezone.now()) if status == 'received' else None,
+                total_amount=sum(item[3] for item in items),
+                status=status,
+            ))
+            purchase_lines.append(items)
+        Purchase.objects.bulk_create(purchase_rows, batch_size=batch_size)
+        purchase_ids = dict(Purchase.objects.values_list('purchase_number', 'pk'))
+        item_rows = []
+        for purchase, items in zip(purchase_rows, purchase_lines):
+            for pk, quantity, cost, line_total in items:
+                item_rows.append(PurchaseItem(
+                    purchase_id=purchase_ids[purchase.purchase_number], product_id=pk,
+                    quantity=quantity, unit_price=cost, total_price=line_total,
+                ))
+                if purchase.status == 'received':
+                    movements.append(StockMovement(product_id=pk, kind='receive', quantity=quantity, reference=purchase.purchase_number))
+                    received[pk] += quantity
+        PurchaseItem.objects.bulk_create(item_rows, batch_size=batch_size)
+        counts['purchases'], counts['purchase_items'] = len(purchase_rows), len(item_rows)
+        log(f'ใบสั่งซื้อ {len(purchase_rows)} ใบ')
+
+        # ยอดยกมา: ให้สต็อกไม่ติดลบและสินค้าบางส่วนต่ำกว่าจำนวนขั้นต่ำ
+        balances = {}
+        for pk, _, _ in catalog:
+            opening = max(0, sold[pk] - received[pk]) + rng.choice((0, 5, 20, 50, 100, 200))
+            if opening:
+                movements.append(StockMovement(product_id=pk, kind='adjustment', quantity=opening))
+            balances[pk] = opening + received[pk] - sold[pk]
+        StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+        Product.objects.bulk_update(
+            [Product(pk=pk, stock_quantity=quantity) for pk, quantity in balances.items()],
+            ['stock_quantity'], batch_size=batch_size,
+        )
+        counts['stock_movements'] = StockMovement.objects.count()
+
+        # รายจ่าย: ค่าเช่า เงินเดือน ค่าน้ำไฟ ทุกเดือน และรายจ่ายอื่นกระจายทั้งช่วง
+        expense_rows = []
+        month = start.replace(day=1)
+        while month <= today and len(expense_rows) + 3 <= expenses:
+            for category, amount in (('rent', 15000), ('salary', 24000), ('utilities', rng.uniform(2500, 6000))):
+                expense_rows.append(Expense(
+                    expense_date=timezone.make_aware(datetime.combine(month, time(9))),
+                    category=category,
+                    description=EXPENSE_DESCRIPTIONS[category],
+                    amount=_money(amount),
+                ))
+            month = (month + timedelta(days=32)).replace(day=1)
+        while len(expense_rows) < expenses:
+            category = rng.choice(('maintenance', 'other', 'other'))
+            expense_rows.append(Expense(
+                expense_date=_random_moment(rng, start, days),
+                category=category,
+                description=EXPENSE_DESCRIPTIONS[category],
+                amount=_money(rng.uniform(100, 3000)),
+            ))
+        Expense.objects.bulk_create(expense_rows, batch_size=batch_size)
+        counts['expenses'] = len(expense_rows)
+
+        # ตารางที่ปกติดูแลโดย save()/signal
+        sequences.reset('INV', sales + 1)
+        sequences.reset('PO', purchases + 1)
+        costs.rebuild(batch_size=batch_size)
+        log('ต้นทุนขาย')
+        counts['daily_summaries'], _ = rollups.rebuild()
+        log('ตารางสรุปรายวัน')
+        sales_stats.rebuild(batch_size=batch_size)
+        log('สถิติยอดขาย')
+        search.rebuild(batch_size=batch_size)
+        log('ดัชนีค้นหา')
+        stock.refresh_low_stock(Product.objects.all())
+        dashboard.invalidate(*dashboard.TILES)
+        versions.bump(Category, Supplier, Product, Sale, SaleItem, Purchase, PurchaseItem, Expense)
+    return counts
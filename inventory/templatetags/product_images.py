@@ -0,0 +1,66 @@
+"""แท็กแสดงรูปสินค้าจากรูปย่อ (WebP + JPEG สำรอง) พร้อม srcset
+
+ตัวอย่าง:
+    {% load product_images %}
+    {% product_image product 'thumb' 50 style="object-fit: cover;" %}
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from inventory import images
+
+register = template.Library()
+
+
+def _srcset(image_hash, ext, sizes):
+    return ', '.join(
+        f'{images.derivative_url(image_hash, size, ext)} {images.SIZES[size]}w' for size in sizes
+    )
+
+
+def _candidates(size):
+    """ขนาดที่ใช้ใน srcset: ขนาดที่ขอและขนาดที่ใหญ่กว่า (สำหรับจอความละเอียดสูง)"""
+    edge = images.SIZES[size]
+    return [name for name, value in sorted(images.SIZES.items(), key=lambda item: item[1]) if value >= edge]
+
+
+@register.simple_tag
+def product_image_url(product, size='detail', ext='jpg'):
+    """URL ของรูปย่อ (หรือรูปต้นฉบับถ้ายังไม่มีรูปย่อ)"""
+    if not product.image:
+        return ''
+    if not product.image_hash:
+        return product.image.url
+    return images.derivative_url(product.image_hash, size, ext)
+
+
+@register.simple_tag
+def product_image_srcset(product, size='thumb', ext='webp'):
+    if not product.image_hash:
+        return ''
+    return _srcset(product.image_hash, ext, _candidates(size))
+
+
+@register.simple_tag
+def product_image(product, size='thumb', width=None, height=None, **attrs):
+    """แท็ก <picture> ของรูปสินค้า width/height คือขนาดที่แสดงผล (px)"""
+    if not product.image:
+        return ''
+    width = width or images.SIZES[size]
+    height = height or width
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    if not product.image_hash:
+        return format_html(
+            '<img src="{}" alt="{}" width="{}" height="{}" loading="lazy"{}>',
+            product.image.url, product.name, width, height, extra,
+        )
+    sizes = _candidates(size)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}px">'
+        '<img src="{}" srcset="{}" sizes="{}px" alt="{}" width="{}" height="{}" loading="lazy" decoding="async"{}>'
+        '</picture>',
+        _srcset(product.image_hash, 'webp', sizes), width,
+        images.derivative_url(product.image_hash, size, 'jpg'), _srcset(product.image_hash, 'jpg', sizes), width,
+        product.name, width, height, extra,
+    )
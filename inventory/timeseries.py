@@ -0,0 +1,260 @@
+"""ยอดขายแบบอนุกรมเวลาสำหรับกราฟ (รายชั่วโมง/วัน/สัปดาห์/เดือน)
+
+ค่าของแต่ละช่วง: ยอดขาย (revenue), จำนวนบิล (count), จำนวนชิ้น (units),
+ต้นทุนขาย (cost) และกำไรขั้นต้น (margin = revenue - cost)
+
+- รายวัน/สัปดาห์/เดือน รวมจากตารางสรุป DailySummary และ ProductSalesDay
+- รายชั่วโมง อ่านจาก Sale/SaleItem โดยตรง
+- ช่วงที่เลือกได้จำกัดไม่เกิน MAX_DAYS วันตามหน่วย
+
+ข้อมูลถูกเก็บใน cache 'timeseries' เป็นก้อน: ค่ารายวันก้อนละเดือน ค่ารายชั่วโมงก้อนละวัน
+ก้อนที่ปิดแล้ว (จบก่อนวันนี้) อ่านจาก cache ส่วนก้อนปัจจุบันคำนวณใหม่ทุกครั้ง
+กราฟหลายปีจึงอ่านฐานข้อมูลเพียงเดือน (หรือวัน) ล่าสุด
+ถ้ามีการแก้ข้อมูลย้อนหลัง rollups จะเปลี่ยนเวอร์ชัน 'timeseries' ทำให้คีย์เดิมถูกเลิกใช้
+
+ถ้าจำนวนช่วงมากกว่า points ที่ขอ จะรวมช่วงติดกันทีละ step ช่วง (downsample)
+"""
+import math
+from collections import defaultdict
+from datetime import date, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import periods, versions
+
+UNITS = ('hour', 'day', 'week', 'month')
+UNIT_LABELS = {'hour': 'ชั่วโมง', 'day': 'วัน', 'week': 'สัปดาห์', 'month': 'เดือน'}
+DEFAULT_DAYS = {'hour': 2, 'day': 90, 'week': 365, 'month': 730}
+# ช่วงยาวที่สุดที่เลือกได้ (วัน) ของแต่ละหน่วย กันคำขอที่วนหลายแสนวัน/สร้างคีย์แคชนับพัน
+MAX_DAYS = {'hour': 93, 'day': 3 * 366, 'week': 10 * 366, 'month': 20 * 366}
+DEFAULT_POINTS = 200
+MAX_POINTS = 1000
+# ก้อนที่ปิดแล้วไม่เปลี่ยนอีก (ยกเว้นแก้ย้อนหลังซึ่งเปลี่ยนเวอร์ชัน) เก็บได้นาน
+CLOSED_TIMEOUT = 7 * 24 * 3600
+VERSION = 'timeseries'
+
+
+class TimeSeriesError(Exception):
+    """พารามิเตอร์ของอนุกรมเวลาไม่ถูกต้อง"""
+
+
+def invalidate():
+    """เลิกใช้ก้อนข้อมูลใน cache ทั้งหมด (หลัง commit) เมื่อยอดขายย้อนหลังเปลี่ยน"""
+    versions.bump(VERSION)
+
+
+def _zero():
+    # revenue, count, units, cost
+    return [Decimal('0.00'), 0, 0, Decimal('0.00')]
+
+
+def _add(target, values):
+    for i, value in enumerate(values):
+        target[i] += value
+
+
+def _hour(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _compute_days(first, last):
+    """ค่ารายวันระหว่าง first ถึง last (รวมวันสุดท้าย) {date: [...]}"""
+    from .models import DailySummary, ProductSalesDay
+
+    values = defaultdict(_zero)
+    rows = DailySummary.objects.filter(date__gte=first, date__lte=last).values_list(
+        'date', 'revenue', 'sale_count', 'cost_of_goods',
+    )
+    for day, revenue, count, cost in rows:
+        _add(values[day], (revenue, count, 0, cost))
+    units = ProductSalesDay.objects.filter(date__gte=first, date__lte=last).values('date').annotate(
+        total=Sum('units'),
+    ).values_list('date', 'total').order_by()
+    for day, total in units:
+        values[day][2] += total or 0
+    return values
+
+
+def _compute_hours(first, last):
+    """ค่ารายชั่วโมงระหว่างวันที่ first ถึง last {datetime ท้องถิ่นต้นชั่วโมง: [...]}"""
+    from .models import Sale, SaleItem
+
+    period = periods.custom(first, last)
+    values = defaultdict(_zero)
+    sales = Sale.objects.filter(**period.filter('sale_date')).values_list(
+        'sale_date', 'net_amount', 'cost_total',
+    ).order_by()
+    for moment, revenue, cost in sales.iterator(chunk_size=5000):
+        _add(values[_hour(moment)], (revenue or 0, 1, 0, cost or 0))
+    items = SaleItem.objects.filter(**period.filter('sale__sale_date')).values_list(
+        'sale__sale_date', 'quantity',
+    ).order_by()
+    for moment, quantity in items.iterator(chunk_size=5000):
+        values[_hour(moment)][2] += quantity
+    return values
+
+
+def _blocks(kind, blocks, compute, day_of):
+    """รวมค่าของหลายก้อน [(วันแรก, วันสุดท้าย, ปิดแล้ว)] ก้อนที่ปิดแล้วอ่านจาก cache
+
+    ก้อนที่ไม่มีใน cache คำนวณรวมใน query เดียว แล้วเก็บเฉพาะก้อนที่ปิดแล้ว
+    """
+    version = versions.get(VERSION)
+    keys = {block: f'timeseries:{version}:{kind}:{block[0].isoformat()}' for block in blocks if block[2]}
+    cache = caches['timeseries']
+    found = cache.get_many(keys.values())
+    values = {}
+    missing = []
+    for block in blocks:
+        if keys.get(block) in found:
+            values.update(found[keys[block]])
+        else:
+            missing.append(block)
+    if missing:
+        computed = compute(missing[0][0], missing[-1][1])
+        values.update(computed)
+        cache.set_many({
+            keys[block]: {
+                key: value for key, value in computed.items() if block[0] <= day_of(key) <= block[1]
+            }
+            for block in missing if block[2]
+        }, CLOSED_TIMEOUT)
+    return values
+
+
+def _months(first, last):
+    """ช่วงเดือน [(วันแรก, วันสุดท้าย)] ที่ครอบ first ถึง last"""
+    start = first.replace(day=1)
+    while start <= last:
+        following = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+        yield start, following - timedelta(days=1)
+        start = following
+
+
+def _days(first, last, today):
+    blocks = [(start, end, end < today) for start, end in _months(first, last)]
+    return _blocks('day', blocks, _compute_days, lambda key: key)
+
+
+def _hours(first, last, today):
+    blocks = [
+        (day, day, day < today)
+        for day in (first + timedelta(days=i) for i in range((last - first).days + 1))
+    ]
+    return _blocks('hour', blocks, _compute_hours, lambda key: key.date())
+
+
+def _bucket(unit, day):
+    if unit == 'week':
+        return day - timedelta(days=day.weekday())
+    if unit == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next(unit, start):
+    if unit == 'hour':
+        return timezone.localtime(start.astimezone(dt_timezone.utc) + timedelta(hours=1))
+    if unit == 'week':
+        return start + timedelta(days=7)
+    if unit == 'month':
+        return date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start + timedelta(days=1)
+
+
+def _buckets(unit, first, last, today):
+    """[(ต้นช่วง, [ค่า])] เรียงตามเวลา ครอบ first ถึง last (ขยายให้เต็มสัปดาห์/เดือน)"""
+    if unit == 'hour':
+        values = _hours(first, last, today)
+        # บวกเวลาแบบ UTC เพื่อให้ได้ทุกชั่วโมงจริงแม้เขตเวลามีการปรับเวลา
+        moment = periods.start_of(first).astimezone(dt_timezone.utc)
+        end = periods.start_of(last + timedelta(days=1))
+        result = []
+        while moment < end:
+            start = timezone.localtime(moment)
+            result.append((start, values.get(start) or _zero()))
+            moment += timedelta(hours=1)
+        return result
+
+    first = _bucket(unit, first)
+    last = _next(unit, _bucket(unit, last)) - timedelta(days=1)
+    values = _days(first, last, today)
+    buckets = {}
+    day = first
+    while day <= last:
+        bucket = buckets.setdefault(_bucket(unit, day), _zero())
+        if day in values:
+            _add(bucket, values[day])
+        day += timedelta(days=1)
+    return list(buckets.items())
+
+
+def _downsample(unit, buckets, points):
+    """รวมช่วงติดกันทีละ step ช่วงให้เหลือไม่เกิน points จุด คืน (step, [(ต้น, ท้าย, [ค่า])])"""
+    step = max(math.ceil(len(buckets) / points), 1)
+    result = []
+    for i in range(0, len(buckets), step):
+        group = buckets[i:i + step]
+        values = _zero()
+        for _, bucket in group:
+            _add(values, bucket)
+        result.append((group[0][0], _next(unit, group[-1][0]), values))
+    return step, result
+
+
+def parse(params, today=None):
+    """อ่านพารามิเตอร์ bucket, date_from, date_to, points จาก request.GET
+
+    คืน (unit, date_from, date_to, points) หรือ raise TimeSeriesError
+    """
+    today = today or timezone.localdate()
+    unit = params.get('bucket') or 'day'
+    if unit not in UNITS:
+        raise TimeSeriesError(f'bucket ต้องเป็น {", ".join(UNITS)}')
+    date_to = periods.parse_date(params.get('date_to'))
+    date_from = periods.parse_date(params.get('date_from'))
+    if (params.get('date_to') and date_to is None) or (params.get('date_from') and date_from is None):
+        raise TimeSeriesError('รูปแบบวันที่ไม่ถูกต้อง (YYYY-MM-DD)')
+    date_to = date_to or today
+    date_from = date_from or date_to - timedelta(days=DEFAULT_DAYS[unit] - 1)
+    if date_from > date_to:
+        raise TimeSeriesError('วันที่เริ่มต้องไม่เกินวันที่สิ้นสุด')
+    if (date_to - date_from).days >= MAX_DAYS[unit]:
+        raise TimeSeriesError(f'ข้อมูลราย{UNIT_LABELS[unit]}เลือกช่วงได้ไม่เกิน {MAX_DAYS[unit]} วัน')
+    try:
+        points = int(params.get('points') or DEFAULT_POINTS)
+    except ValueError:
+        raise TimeSeriesError('points ต้องเป็นตัวเลข')
+    if not 1 <= points <= MAX_POINTS:
+        raise TimeSeriesError(f'points ต้องอยู่ระหว่าง 1 ถึง {MAX_POINTS}')
+    return unit, date_from, date_to, points
+
+
+def series(unit, date_from, date_to, points=DEFAULT_POINTS, today=None):
+    """อนุกรมเวลาพร้อมส่งเป็น JSON (จำนวนเงินเป็นข้อความเหมือน API อื่น)"""
+    today = today or timezone.localdate()
+    last = date_to if unit in ('hour', 'day') else _next(unit, _bucket(unit, date_to)) - timedelta(days=1)
+    step, rows = _downsample(unit, _buckets(unit, date_from, date_to, today), points)
+    return {
+        'bucket': unit,
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'step': step,
+        # ทุกช่วงจบก่อนวันนี้ ไม่เปลี่ยนอีก (ใช้กำหนดอายุ cache ของ response)
+        'closed': last < today,
+        'points': [
+            {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'revenue': str(revenue),
+                'count': count,
+                'units': units,
+                'cost': str(cost),
+                'margin': str(revenue - cost),
+            }
+            for start, end, (revenue, count, units, cost) in rows
+        ],
+    }
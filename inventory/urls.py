@@ -1,19 +1,32 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# ภายใต้ ASGI ใช้ view แบบ async ที่ query ส่วนต่าง ๆ พร้อมกัน (ดู shop/asgi.py)
+if settings.ASYNC_VIEWS:
+    dashboard_view = views.dashboard_async
+    report_monthly_view = views.report_monthly_async
+    report_yearly_view = views.report_yearly_async
+else:
+    dashboard_view = views.dashboard
+    report_monthly_view = views.report_monthly
+    report_yearly_view = views.report_yearly
+
 urlpatterns = [
     # Authentication
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', dashboard_view, name='dashboard'),
     
     # Products
     path('products/', views.product_list, name='product_list'),
     path('products/create/', views.product_create, name='product_create'),
+    path('products/import/', views.product_import, name='product_import'),
     path('products/<int:pk>/update/', views.product_update, name='product_update'),
     path('products/<int:pk>/delete/', views.product_delete, name='product_delete'),
+    path('api/products/lookup/', views.product_lookup, name='product_lookup'),
     
     # Categories
     path('categories/', views.category_list, name='category_list'),
@@ -27,6 +40,7 @@ urlpatterns = [
     path('purchases/', views.purchase_list, name='purchase_list'),
     path('purchases/create/', views.purchase_create, name='purchase_create'),
     path('purchases/<int:pk>/', views.purchase_detail, name='purchase_detail'),
+    path('purchases/<int:pk>/pdf/', views.purchase_pdf, name='purchase_pdf'),
     path('purchases/<int:pk>/receive/', views.purchase_receive, name='purchase_receive'),
     path('purchase-items/<int:pk>/delete/', views.purchase_item_delete, name='purchase_item_delete'),
     
@@ -34,13 +48,24 @@ urlpatterns = [
     path('sales/', views.sale_list, name='sale_list'),
     path('sales/create/', views.sale_create, name='sale_create'),
     path('sales/<int:pk>/', views.sale_detail, name='sale_detail'),
+    path('sales/<int:pk>/pdf/', views.sale_pdf, name='sale_pdf'),
     path('sale-items/<int:pk>/delete/', views.sale_item_delete, name='sale_item_delete'),
+    path('api/sales/checkout/', views.sale_checkout, name='sale_checkout'),
     
     # Expenses
     path('expenses/', views.expense_list, name='expense_list'),
     path('expenses/create/', views.expense_create, name='expense_create'),
     
     # Reports
-    path('reports/monthly/', views.report_monthly, name='report_monthly'),
-    path('reports/yearly/', views.report_yearly, name='report_yearly'),
+    path('api/reports/sales-timeseries/', views.sales_timeseries, name='sales_timeseries'),
+    path('reports/monthly/', report_monthly_view, name='report_monthly'),
+    path('reports/yearly/', report_yearly_view, name='report_yearly'),
+    path('reports/monthly/pdf/', views.report_monthly_pdf, name='report_monthly_pdf'),
+    path('reports/yearly/pdf/', views.report_yearly_pdf, name='report_yearly_pdf'),
+    
+    # Exports
+    path('exports/<str:kind>/', views.export_data, name='export_data'),
+    
+    # Metrics (Prometheus)
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
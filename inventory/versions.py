@@ -0,0 +1,138 @@
+"""เลขเวอร์ชัน (version stamp) ของแต่ละโมเดล สำหรับคีย์แคชของ template และ conditional GET
+
+เวอร์ชันของโมเดลเปลี่ยนทุกครั้งที่มีการบันทึก/ลบแถว (signal ใน signals.py)
+หรือเขียนแบบ bulk (ผู้เขียนเรียก bump() เอง) แคชที่ใช้เวอร์ชันเป็นส่วนหนึ่งของคีย์
+จึงไม่ถูกอ่านอีกหลังข้อมูลเปลี่ยน โดยไม่ต้องตามลบทีละคีย์ ค่าเดิมจะหมดอายุไปเอง
+
+เวอร์ชันเป็นเวลาที่เปลี่ยนล่าสุด (nanosecond) เก็บในตาราง VersionStamp (แถวละชนิดข้อมูล)
+ไม่ใช่ cache ของ process เพื่อให้ทุก worker เห็นการเปลี่ยนแปลงเดียวกัน
+การอ่านเป็น query เดียวตามชื่อ (unique index) ไม่แตะตารางข้อมูลจริง
+นอกจากโมเดล ยังใช้ชื่อ (str) เป็นเวอร์ชันของข้อมูลอื่นได้ เช่น 'timeseries'
+
+view ที่ครอบด้วย @not_modified(โมเดล, ...) ส่ง ETag/Last-Modified จากเวอร์ชัน
+และตอบ 304 Not Modified เมื่อเบราว์เซอร์โหลดซ้ำโดยที่ข้อมูลยังไม่เปลี่ยน
+โดยไม่ต้อง query ตารางข้อมูลหรือ render template
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def _name(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def get(*models):
+    """เวอร์ชันรวมของโมเดลที่ระบุ เช่น '1718...-1718...' (ใช้เป็นส่วนของคีย์แคช)"""
+    return '-'.join(str(value) for value in get_many(*models))
+
+
+def get_many(*models):
+    """[เวอร์ชัน] ของแต่ละโมเดลตามลำดับที่ระบุ อ่านใน query เดียว"""
+    from .models import VersionStamp
+
+    names = [_name(model) for model in models]
+    found = dict(VersionStamp.objects.filter(name__in=names).values_list('name', 'value'))
+    missing = [name for name in names if name not in found]
+    if missing:
+        # ยังไม่เคยมีเวอร์ชัน ใช้ ignore_conflicts ไม่ทับค่าที่ process อื่นเพิ่งตั้ง
+        now = time.time_ns()
+        VersionStamp.objects.bulk_create(
+            [VersionStamp(name=name, value=now) for name in missing], ignore_conflicts=True,
+        )
+        found.update(VersionStamp.objects.filter(name__in=missing).values_list('name', 'value'))
+    return [found.get(name, 0) for name in names]
+
+
+def _write(names):
+    from .models import VersionStamp
+
+    now = time.time_ns()
+    if VersionStamp.objects.filter(name__in=names).update(value=now) < len(names):
+        VersionStamp.objects.bulk_create(
+            [VersionStamp(name=name, value=now) for name in names], ignore_conflicts=True,
+        )
+
+
+def bump(*models):
+    """เปลี่ยนเวอร์ชันหลัง transaction ปัจจุบัน commit (ก่อนหน้านั้นคนอื่นยังเห็นข้อมูลเดิม)
+
+    ชื่อที่ bump หลายครั้งใน transaction เดียวกันถูกรวมเป็น UPDATE เดียวตอน commit
+    แถวเวอร์ชันจึงถูกเขียนครั้งเดียวต่อ transaction ไม่ใช่ทุกแถวข้อมูลที่บันทึก
+    """
+    names = {_name(model) for model in models}
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        _write(names)
+        return
+    # callback ที่รอ commit อยู่ (ถ้า savepoint ที่ลงทะเบียนไว้ถูก rollback มันจะหายจากรายการ)
+    flush = getattr(conn, 'pending_version_flush', None)
+    if flush is None or not any(entry[1] is flush for entry in conn.run_on_commit):
+        def flush():
+            conn.pending_version_flush = None
+            _write(flush.names)
+        flush.names = set()
+        conn.pending_version_flush = flush
+        transaction.on_commit(flush)
+    flush.names.update(names)
+
+
+def not_modified(*models, extra=None):
+    """decorator ของ view (GET) ที่หน้าเปลี่ยนเฉพาะเมื่อข้อมูลของ models เปลี่ยน
+
+    ETag รวมเวอร์ชัน ผู้ใช้ วันที่ (ค่าเริ่มต้นของรายงานขึ้นกับวันนี้) และ URL พร้อม query string
+    extra: ฟังก์ชันที่คืนค่าเพิ่มเติมของ ETag สำหรับข้อมูลที่เปลี่ยนโดยไม่ bump เวอร์ชัน
+    ถ้ามีข้อความ (messages) รอแสดงจะไม่ตอบ 304 เพราะข้อความอยู่ในหน้าที่ render ใหม่เท่านั้น
+    ใช้กับ view แบบ async ได้ (อ่านผู้ใช้ด้วย request.auser() และอ่านเวอร์ชันใน thread)
+    """
+    def validators(request, user):
+        """(ETag, Last-Modified เป็น timestamp) หรือ (None, None) ถ้าไม่ควรตอบ 304"""
+        if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+            return None, None
+        version = get(*models)
+        value = f'{version}:{user.pk}:{timezone.localdate()}:{request.get_full_path()}'
+        if extra is not None:
+            value += f':{extra()}'
+        latest = max(int(stamp) for stamp in version.split('-'))
+        return quote_etag(hashlib.md5(value.encode()).hexdigest()), latest // 10 ** 9
+
+    def conditional(request, etag, last_modified):
+        if etag is None:
+            return None
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def finish(response, etag, last_modified):
+        if etag is not None and response.status_code in (200, 304):
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+        # no-cache: เบราว์เซอร์ต้องถามทุกครั้ง (ไม่ใช้หน้าเก่าเองจาก Last-Modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                user = await request.auser()
+                etag, last_modified = await sync_to_async(validators)(request, user)
+                response = conditional(request, etag, last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(response, etag, last_modified)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                etag, last_modified = validators(request, request.user)
+                response = conditional(request, etag, last_modified)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return finish(response, etag, last_modified)
+        return wrapper
+    return decorator
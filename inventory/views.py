@@ -1,15 +1,33 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.core.exceptions import BadRequest, ObjectDoesNotExist
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.db.models import Sum, Count, Q, F
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, FileResponse, Http404
+from django.views.decorators.http import require_POST
+from django.db import transaction
+from django.db.models import Sum, Count, Max, Q, F
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
 from datetime import datetime, timedelta
 from decimal import Decimal
 from .models import *
 from .forms import *
+from . import documents, exports, imports, metrics, periods, reports, stock, timeseries, versions
+from . import search as product_search
+from . import lookup
+from . import dashboard as dashboard_tiles
+from .checkout import checkout, CheckoutError
+from .routers import read_replica
+import hashlib
+import json
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
@@ -45,67 +63,42 @@ def logout_view(request):
     return redirect('login')
 
 # ==================== Dashboard ====================
+DASHBOARD_TILES = ('summary', 'low_stock', 'top_products', 'recent_sales')
+
+def _dashboard_context(tiles):
+    context = dict(tiles['summary'])
+    context.update({
+        'low_stock_products': tiles['low_stock'],
+        'top_products': tiles['top_products'],
+        'recent_sales': tiles['recent_sales'],
+    })
+    return context
+
 @login_required
 def dashboard(request):
-    today = timezone.now().date()
-    
-    # สรุปข้อมูลวันนี้
-    today_sales = Sale.objects.filter(sale_date__date=today)
-    today_revenue = today_sales.aggregate(total=Sum('net_amount'))['total'] or 0
-    today_sales_count = today_sales.count()
-    
-    # สรุปข้อมูลเดือนนี้
-    month_start = today.replace(day=1)
-    month_sales = Sale.objects.filter(sale_date__date__gte=month_start)
-    month_revenue = month_sales.aggregate(total=Sum('net_amount'))['total'] or 0
-    
-    month_purchases = Purchase.objects.filter(purchase_date__date__gte=month_start, status='received')
-    month_cost = month_purchases.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    month_expenses = Expense.objects.filter(expense_date__date__gte=month_start)
-    month_expense_total = month_expenses.aggregate(total=Sum('amount'))['total'] or 0
-    
-    month_profit = month_revenue - month_cost - month_expense_total
-    
-    # สินค้าใกล้หมด
-    low_stock_products = Product.objects.filter(stock_quantity__lte=F('min_stock'))[:5]
-    
-    # ยอดขายสูงสุด
-    top_products = Product.objects.annotate(
-        total_sold=Sum('saleitem__quantity')
-    ).order_by('-total_sold')[:5]
-    
-    # รายการขายล่าสุด
-    recent_sales = Sale.objects.all()[:10]
-    
-    context = {
-        'today_revenue': today_revenue,
-        'today_sales_count': today_sales_count,
-        'month_revenue': month_revenue,
-        'month_cost': month_cost,
-        'month_expense_total': month_expense_total,
-        'month_profit': month_profit,
-        'low_stock_products': low_stock_products,
-        'top_products': top_products,
-        'recent_sales': recent_sales,
-    }
-    return render(request, 'dashboard.html', context)
+    # ข้อมูลแต่ละส่วนมาจากแคช และคำนวณใหม่เฉพาะส่วนที่ข้อมูลเปลี่ยน
+    tiles = dashboard_tiles.get_tiles(*DASHBOARD_TILES)
+    return render(request, 'dashboard.html', _dashboard_context(tiles))
+
+@login_required
+async def dashboard_async(request):
+    # เหมือน dashboard แต่คำนวณ tile ที่ไม่มีในแคชพร้อมกัน (ใช้เมื่อรันด้วย ASGI)
+    tiles = await dashboard_tiles.aget_tiles(*DASHBOARD_TILES)
+    return await sync_to_async(render)(request, 'dashboard.html', _dashboard_context(tiles))
 
 # ==================== Product Views ====================
 @login_required
+@versions.not_modified(Product, Category, extra=stock.latest_movement)
 def product_list(request):
-    products = Product.objects.all()
     search = request.GET.get('search', '')
     category_id = request.GET.get('category', '')
+    if not category_id.isdigit():
+        category_id = ''
     
-    if search:
-        products = products.filter(
-            Q(code__icontains=search) | 
-            Q(name__icontains=search)
-        )
-    
-    if category_id:
-        products = products.filter(category_id=category_id)
+    # ค้นหาจากดัชนีและแบ่งหน้าแบบ keyset
+    products, next_cursor = product_search.search_products(
+        search, category_id=category_id or None, after=request.GET.get('after')
+    )
     
     categories = Category.objects.all()
     
@@ -114,6 +107,7 @@ def product_list(request):
         'categories': categories,
         'search': search,
         'selected_category': category_id,
+        'next_cursor': next_cursor,
     }
     return render(request, 'product_list.html', context)
 
@@ -122,7 +116,11 @@ def product_create(request):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                product = form.save()
+                # ยอดยกมา
+                if product.stock_quantity:
+                    StockMovement.objects.create(product=product, kind='adjustment', quantity=product.stock_quantity)
             messages.success(request, 'เพิ่มสินค้าเรียบร้อยแล้ว')
             return redirect('product_list')
     else:
@@ -134,9 +132,19 @@ def product_create(request):
 def product_update(request, pk):
     product = get_object_or_404(Product, pk=pk)
     if request.method == 'POST':
+        old_quantity = product.stock_quantity
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                product = form.save(commit=False)
+                # บันทึกเฉพาะช่องในฟอร์ม (ยกเว้น stock) แล้วปรับ stock ผ่านสมุดความเคลื่อนไหว
+                # ช่องที่ระบบดูแล (ต้นทุนเฉลี่ย สถานะสต็อกต่ำ ฯลฯ) ไม่ถูกทับด้วยค่าที่โหลดไว้ก่อน
+                delta = product.stock_quantity - old_quantity
+                product.save(update_fields=[
+                    name for name in ProductForm.Meta.fields if name != 'stock_quantity'
+                ] + ['updated_at'])
+                if delta:
+                    stock.record(product, delta, 'adjustment')
             messages.success(request, 'แก้ไขสินค้าเรียบร้อยแล้ว')
             return redirect('product_list')
     else:
@@ -153,8 +161,69 @@ def product_delete(request, pk):
         return redirect('product_list')
     return render(request, 'product_confirm_delete.html', {'product': product})
 
+# จำนวนข้อผิดพลาดสูงสุดที่แสดงในหน้าผลการนำเข้า
+IMPORT_MAX_ERRORS = 200
+
+@login_required
+def product_import(request):
+    """นำเข้า/ปรับปรุงสินค้าจำนวนมากจากไฟล์ CSV หรือ XLSX"""
+    result = None
+    if request.method == 'POST':
+        form = ProductImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = imports.import_products(
+                    upload,
+                    imports.detect_format(upload.name),
+                    create_categories=form.cleaned_data['create_categories'],
+                )
+            except imports.ImportFileError as e:
+                messages.error(request, str(e))
+            else:
+                if result.errors:
+                    messages.warning(request, f'นำเข้าสินค้าเสร็จสิ้น: {result}')
+                else:
+                    messages.success(request, f'นำเข้าสินค้าเรียบร้อยแล้ว: {result}')
+    else:
+        form = ProductImportForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+        'errors': result.errors[:IMPORT_MAX_ERRORS] if result else [],
+        'columns': [(name, Product._meta.get_field(name).verbose_name) for name in imports.FIELDS],
+        'required': imports.REQUIRED,
+    }
+    return render(request, 'product_import.html', context)
+
+LOOKUP_MAX_CODES = 200
+
+@login_required
+def product_lookup(request):
+    """ค้นหาสินค้าจากรหัส/บาร์โค้ด ?code=xxx (ระบุหลายครั้ง หรือ ?codes=a,b,c สำหรับหลายรหัส)"""
+    codes = request.GET.getlist('code')
+    for value in request.GET.getlist('codes'):
+        codes.extend(value.split(','))
+    codes = [code.strip() for code in codes if code.strip()]
+    if not codes:
+        return JsonResponse({'error': 'กรุณาระบุรหัสสินค้า'}, status=400)
+    if len(codes) > LOOKUP_MAX_CODES:
+        return JsonResponse({'error': f'ค้นหาได้ครั้งละไม่เกิน {LOOKUP_MAX_CODES} รหัส'}, status=400)
+    
+    found = lookup.lookup(codes)
+    if len(codes) == 1 and 'codes' not in request.GET:
+        if codes[0] not in found:
+            return JsonResponse({'error': f'ไม่พบสินค้ารหัส {codes[0]}'}, status=404)
+        return JsonResponse(found[codes[0]])
+    return JsonResponse({
+        'results': found,
+        'missing': [code for code in dict.fromkeys(codes) if code not in found],
+    })
+
 # ==================== Category Views ====================
 @login_required
+@versions.not_modified(Category)
 def category_list(request):
     categories = Category.objects.all()
     return render(request, 'category_list.html', {'categories': categories})
@@ -174,6 +243,7 @@ def category_create(request):
 
 # ==================== Supplier Views ====================
 @login_required
+@versions.not_modified(Supplier)
 def supplier_list(request):
     suppliers = Supplier.objects.all()
     return render(request, 'supplier_list.html', {'suppliers': suppliers})
@@ -196,6 +266,7 @@ def supplier_create(request):
 
 # ==================== Purchase Views ====================
 @login_required
+@versions.not_modified(Purchase, Supplier)
 def purchase_list(request):
     purchases = Purchase.objects.all()
     status = request.GET.get('status', '')
@@ -265,35 +336,42 @@ def purchase_item_delete(request, pk):
 
 @login_required
 def purchase_receive(request, pk):
-    purchase = get_object_or_404(Purchase, pk=pk)
-    if purchase.status == 'pending':
-        purchase.status = 'received'
-        purchase.received_date = timezone.now()
-        purchase.save()
-        
-        # อัพเดท stock
-        for item in purchase.items.all():
-            item.product.stock_quantity += item.quantity
-            item.product.save()
-        
+    with transaction.atomic():
+        purchase = get_object_or_404(Purchase.objects.select_for_update(), pk=pk)
+        received = purchase.status == 'pending'
+        if received:
+            purchase.status = 'received'
+            purchase.received_date = timezone.now()
+            purchase.save()
+            
+            # อัพเดท stock และต้นทุนเฉลี่ย
+            for product_id, quantity, unit_price in purchase.items.values_list('product_id', 'quantity', 'unit_price'):
+                stock.record(product_id, quantity, 'receive', purchase.purchase_number, unit_cost=unit_price)
+    
+    if received:
         messages.success(request, 'รับสินค้าเรียบร้อยแล้ว')
     
     return redirect('purchase_detail', pk=pk)
 
 # ==================== Sale Views ====================
 @login_required
+@versions.not_modified(Sale)
 def sale_list(request):
     sales = Sale.objects.all()
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
     
-    if date_from:
-        sales = sales.filter(sale_date__date__gte=date_from)
-    if date_to:
-        sales = sales.filter(sale_date__date__lte=date_to)
+    # กรองเป็นช่วงเวลาครึ่งเปิดตามเวลาท้องถิ่น เพื่อให้ใช้ index ของ sale_date ได้
+    period = periods.custom(periods.parse_date(date_from), periods.parse_date(date_to))
+    sales = sales.filter(**period.filter('sale_date'))
+    # คีย์แคชของทั้งตาราง: จำนวนแถวและเวลาแก้ไขล่าสุดจากฐานข้อมูล (เหมือนกันทุก process)
+    # แถวที่ถูกแก้หรือเพิ่มทำให้ updated_at ล่าสุดเปลี่ยน แถวที่ถูกลบทำให้จำนวนเปลี่ยน
+    state = sales.aggregate(count=Count('id'), latest=Max('updated_at'))
     
     return render(request, 'sale_list.html', {
         'sales': sales,
+        'sales_count': state['count'],
+        'sales_latest': state['latest'],
         'date_from': date_from,
         'date_to': date_to,
     })
@@ -324,19 +402,22 @@ def sale_detail(request, pk):
             item = form.save(commit=False)
             item.sale = sale
             
-            # ตรวจสอบ stock
-            if item.product.stock_quantity < item.quantity:
+            # ตรวจสอบและตัด stock พร้อมกันตอนบันทึก และอัพเดทยอดรวมใน transaction เดียวกัน
+            # ถ้าขั้นใดล้มเหลว รายการ สต็อก และยอดรวมจะไม่ถูกบันทึกเพียงบางส่วน
+            try:
+                with transaction.atomic():
+                    item.save()
+                    totals = sale.items.aggregate(total=Sum('total_price'), cost=Sum('total_cost'))
+                    total = totals['total'] or 0
+                    sale.total_amount = total
+                    sale.net_amount = total - sale.discount
+                    sale.cost_total = totals['cost'] or 0
+                    sale.save()
+            except stock.InsufficientStock:
+                item.product.refresh_from_db(fields=['stock_quantity'])
                 messages.error(request, f'สินค้า {item.product.name} เหลือไม่เพียงพอ (เหลือ {item.product.stock_quantity} {item.product.unit})')
                 return redirect('sale_detail', pk=pk)
             
-            item.save()
-            
-            # อัพเดทยอดรวม
-            total = sale.items.aggregate(total=Sum('total_price'))['total'] or 0
-            sale.total_amount = total
-            sale.net_amount = total - sale.discount
-            sale.save()
-            
             messages.success(request, 'เพิ่มรายการสินค้าเรียบร้อยแล้ว')
             return redirect('sale_detail', pk=pk)
     else:
@@ -354,23 +435,68 @@ def sale_item_delete(request, pk):
     item = get_object_or_404(SaleItem, pk=pk)
     sale = item.sale
     
-    # คืน stock
-    item.product.stock_quantity += item.quantity
-    item.product.save()
-    
-    item.delete()
-    
-    # อัพเดทยอดรวม
-    total = sale.items.aggregate(total=Sum('total_price'))['total'] or 0
-    sale.total_amount = total
-    sale.net_amount = total - sale.discount
-    sale.save()
+    # ลบรายการ คืน stock และอัพเดทยอดรวมใน transaction เดียวกัน
+    with transaction.atomic():
+        item.delete()
+        totals = sale.items.aggregate(total=Sum('total_price'), cost=Sum('total_cost'))
+        total = totals['total'] or 0
+        sale.total_amount = total
+        sale.net_amount = total - sale.discount
+        sale.cost_total = totals['cost'] or 0
+        sale.save()
     
     messages.success(request, 'ลบรายการเรียบร้อยแล้ว')
     return redirect('sale_detail', pk=sale.pk)
 
+@login_required
+@require_POST
+def sale_checkout(request):
+    """รับตะกร้าทั้งใบเป็น JSON แล้วบันทึกการขายในคำขอเดียว คืนใบเสร็จเป็น JSON"""
+    try:
+        cart = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'ข้อมูล JSON ไม่ถูกต้อง'}, status=400)
+    if not isinstance(cart, dict):
+        return JsonResponse({'error': 'ข้อมูล JSON ไม่ถูกต้อง'}, status=400)
+    
+    try:
+        sale = checkout(cart, user=request.user)
+    except CheckoutError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except stock.InsufficientStock as e:
+        product = Product.objects.filter(pk=e.product_id).values('code', 'name', 'unit', 'stock_quantity').first() or {}
+        return JsonResponse({
+            'error': f"สินค้า {product.get('name', e.product_id)} เหลือไม่เพียงพอ (เหลือ {product.get('stock_quantity', 0)} {product.get('unit', '')})",
+            'product': product.get('code'),
+            'requested': e.requested,
+            'available': product.get('stock_quantity', 0),
+        }, status=409)
+    
+    return JsonResponse({
+        'id': sale.pk,
+        'sale_number': sale.sale_number,
+        'sale_date': sale.sale_date.isoformat(),
+        'customer_name': sale.customer_name,
+        'payment_method': sale.payment_method,
+        'items': [
+            {
+                'code': item.product.code,
+                'name': item.product.name,
+                'unit': item.product.unit,
+                'quantity': item.quantity,
+                'unit_price': str(item.unit_price),
+                'total_price': str(item.total_price),
+            }
+            for item in sale.receipt_items
+        ],
+        'total_amount': str(sale.total_amount),
+        'discount': str(sale.discount),
+        'net_amount': str(sale.net_amount),
+    }, status=201)
+
 # ==================== Expense Views ====================
 @login_required
+@versions.not_modified(Expense)
 def expense_list(request):
     expenses = Expense.objects.all()
     category = request.GET.get('category', '')
@@ -399,113 +525,160 @@ def expense_create(request):
     return render(request, 'expense_form.html', {'form': form, 'title': 'บันทึกรายจ่าย'})
 
 # ==================== Report Views ====================
+def _report_month(request):
+    """ปี/เดือนของรายงานจาก query string (ค่าเริ่มต้นคือเดือนนี้) ถ้าไม่ถูกต้องตอบ 400"""
+    today = timezone.localdate()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+    except ValueError:
+        raise BadRequest('ปีหรือเดือนไม่ถูกต้อง')
+    if not 1 <= month <= 12 or not 1 <= year < 9999:
+        raise BadRequest('ปีหรือเดือนไม่ถูกต้อง')
+    return year, month
+
 @login_required
+@read_replica
+@versions.not_modified(Sale, SaleItem, Purchase, Expense, Product, Category, DailySummary, ProductSalesDay)
 def report_monthly(request):
-    year = int(request.GET.get('year', timezone.now().year))
-    month = int(request.GET.get('month', timezone.now().month))
-    
-    month_start = datetime(year, month, 1).date()
-    if month == 12:
-        month_end = datetime(year + 1, 1, 1).date()
-    else:
-        month_end = datetime(year, month + 1, 1).date()
-    
-    # รายได้
-    sales = Sale.objects.filter(sale_date__date__gte=month_start, sale_date__date__lt=month_end)
-    total_revenue = sales.aggregate(total=Sum('net_amount'))['total'] or 0
+    year, month = _report_month(request)
     
-    # ต้นทุน
-    purchases = Purchase.objects.filter(
-        received_date__date__gte=month_start,
-        received_date__date__lt=month_end,
-        status='received'
-    )
-    total_cost = purchases.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # รายจ่าย
-    expenses = Expense.objects.filter(expense_date__date__gte=month_start, expense_date__date__lt=month_end)
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    expense_by_category = expenses.values('category').annotate(total=Sum('amount'))
-    
-    # กำไร
-    profit = total_revenue - total_cost - total_expense
-    
-    # รายงานตามวัน
-    daily_sales = sales.extra(select={'day': 'date(sale_date)'}).values('day').annotate(
-        total=Sum('net_amount'),
-        count=Count('id')
-    ).order_by('day')
-    
-    context = {
-        'year': year,
-        'month': month,
-        'total_revenue': total_revenue,
-        'total_cost': total_cost,
-        'total_expense': total_expense,
-        'profit': profit,
-        'expense_by_category': expense_by_category,
-        'daily_sales': daily_sales,
-    }
+    context = reports.monthly(year, month)
     return render(request, 'report_monthly.html', context)
 
 @login_required
+@read_replica
+@versions.not_modified(Sale, SaleItem, Purchase, Expense, Product, Category, DailySummary, ProductSalesDay)
+async def report_monthly_async(request):
+    year, month = _report_month(request)
+    
+    context = await reports.amonthly(year, month)
+    return await sync_to_async(render)(request, 'report_monthly.html', context)
+
+@login_required
+@read_replica
+@versions.not_modified(Sale, SaleItem, Purchase, Expense, Product, Category, DailySummary, ProductSalesDay)
 def report_yearly(request):
     year = int(request.GET.get('year', timezone.now().year))
     
-    year_start = datetime(year, 1, 1).date()
-    year_end = datetime(year + 1, 1, 1).date()
-    
-    # รายได้
-    sales = Sale.objects.filter(sale_date__date__gte=year_start, sale_date__date__lt=year_end)
-    total_revenue = sales.aggregate(total=Sum('net_amount'))['total'] or 0
-    
-    # ต้นทุน
-    purchases = Purchase.objects.filter(
-        received_date__date__gte=year_start,
-        received_date__date__lt=year_end,
-        status='received'
-    )
-    total_cost = purchases.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # รายจ่าย
-    expenses = Expense.objects.filter(expense_date__date__gte=year_start, expense_date__date__lt=year_end)
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    
-    # กำไร
-    profit = total_revenue - total_cost - total_expense
+    context = reports.yearly(year)
+    return render(request, 'report_yearly.html', context)
+
+@login_required
+@read_replica
+@versions.not_modified(Sale, SaleItem, Purchase, Expense, Product, Category, DailySummary, ProductSalesDay)
+async def report_yearly_async(request):
+    year = int(request.GET.get('year', timezone.now().year))
     
-    # รายงานรายเดือน
-    monthly_data = []
-    for m in range(1, 13):
-        month_start = datetime(year, m, 1).date()
-        if m == 12:
-            month_end = datetime(year + 1, 1, 1).date()
-        else:
-            month_end = datetime(year, m + 1, 1).date()
-        
-        month_sales = sales.filter(sale_date__date__gte=month_start, sale_date__date__lt=month_end)
-        month_revenue = month_sales.aggregate(total=Sum('net_amount'))['total'] or 0
-        
-        month_purchases = purchases.filter(received_date__date__gte=month_start, received_date__date__lt=month_end)
-        month_cost = month_purchases.aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        month_expenses = expenses.filter(expense_date__date__gte=month_start, expense_date__date__lt=month_end)
-        month_expense = month_expenses.aggregate(total=Sum('amount'))['total'] or 0
-        
-        monthly_data.append({
-            'month': m,
-            'revenue': month_revenue,
-            'cost': month_cost,
-            'expense': month_expense,
-            'profit': month_revenue - month_cost - month_expense,
-        })
+    context = await reports.ayearly(year)
+    return await sync_to_async(render)(request, 'report_yearly.html', context)
+
+@login_required
+@read_replica
+def sales_timeseries(request):
+    """ยอดขายสำหรับกราฟ ?bucket=hour|day|week|month&date_from=&date_to=&points=
+
+    ตอบ 304 ถ้า If-None-Match ตรงกับ ETag (ข้อมูลไม่เปลี่ยน) ช่วงที่ปิดแล้วทั้งหมด
+    ให้เบราว์เซอร์เก็บได้นานกว่าช่วงที่รวมวันนี้
+    """
+    try:
+        unit, date_from, date_to, points = timeseries.parse(request.GET)
+    except timeseries.TimeSeriesError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    data = timeseries.series(unit, date_from, date_to, points)
+    response = JsonResponse(data)
+    etag = '"%s"' % hashlib.md5(response.content).hexdigest()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=86400 if data['closed'] else 60)
+    return get_conditional_response(request, etag=etag, response=response)
+
+# ==================== PDF Views ====================
+def _pdf_response(request, kind, key, back):
+    """ส่ง PDF จาก cache หรือสั่งสร้างใน process pool (ตอบ 202 ถ้ายังไม่เสร็จ)"""
+    try:
+        path, filename = documents.get(kind, key)
+    except ObjectDoesNotExist:
+        raise Http404
+    except documents.DocumentError as e:
+        messages.error(request, str(e))
+        return redirect(back)
+    if path is None:
+        response = render(request, 'pdf_pending.html', {'back': back}, status=202)
+        response['Retry-After'] = '2'
+        return response
+    return FileResponse(open(path, 'rb'), filename=filename, content_type='application/pdf')
+
+@login_required
+def sale_pdf(request, pk):
+    return _pdf_response(request, 'receipt', pk, reverse('sale_detail', args=[pk]))
+
+@login_required
+def purchase_pdf(request, pk):
+    return _pdf_response(request, 'purchase', pk, reverse('purchase_detail', args=[pk]))
+
+@login_required
+@read_replica
+def report_monthly_pdf(request):
+    year, month = _report_month(request)
+    back = f"{reverse('report_monthly')}?year={year}&month={month}"
+    return _pdf_response(request, 'report_monthly', f'{year}-{month}', back)
+
+@login_required
+@read_replica
+def report_yearly_pdf(request):
+    year = int(request.GET.get('year', timezone.now().year))
+    back = f"{reverse('report_yearly')}?year={year}"
+    return _pdf_response(request, 'report_yearly', str(year), back)
+
+# ==================== Metrics Views ====================
+def metrics_view(request):
+    """สถิติต่อ view ในรูปแบบข้อความของ Prometheus
+
+    เข้าถึงได้ด้วย header Authorization: Bearer <METRICS_TOKEN> หรือผู้ใช้ staff ที่ล็อกอินอยู่
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorized = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not authorized and not request.user.is_staff:
+        response = HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ==================== Export Views ====================
+EXPORT_LIST_VIEWS = {
+    'sales': 'sale_list',
+    'purchases': 'purchase_list',
+    'expenses': 'expense_list',
+}
+
+@login_required
+@read_replica
+def export_data(request, kind):
+    """ส่งออกข้อมูลตามตัวกรองเดียวกับหน้ารายการ ?format=csv|xlsx"""
+    if kind not in EXPORT_LIST_VIEWS:
+        raise Http404
+    fmt = request.GET.get('format', 'csv')
+    filename = f"{kind}-{timezone.localdate():%Y%m%d}.{fmt}"
     
-    context = {
-        'year': year,
-        'total_revenue': total_revenue,
-        'total_cost': total_cost,
-        'total_expense': total_expense,
-        'profit': profit,
-        'monthly_data': monthly_data,
-    }
-    return render(request, 'report_yearly.html', context)
\ No newline at end of file
+    try:
+        rows = exports.rows(kind, request.GET)
+        if fmt == 'csv':
+            response = StreamingHttpResponse(exports.iter_csv(rows), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+        if fmt == 'xlsx':
+            # XLSX เป็นไฟล์ zip จึงเขียนลงไฟล์ชั่วคราวก่อน (openpyxl write-only ใช้หน่วยความจำคงที่)
+            tmp = tempfile.TemporaryFile()
+            exports.write_xlsx(rows, tmp, title=kind)
+            tmp.seek(0)
+            return FileResponse(
+                tmp,
+                as_attachment=True,
+                filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+        raise exports.ExportError(f'ไม่รองรับรูปแบบไฟล์ {fmt}')
+    except exports.ExportError as e:
+        messages.error(request, str(e))
+        return redirect(EXPORT_LIST_VIEWS[kind])
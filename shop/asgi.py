@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shop.settings')
+# แดชบอร์ดและรายงานใช้ view แบบ async ที่ query พร้อมกัน
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# ไม่เริ่ม server ถ้าไม่มีฟอนต์ภาษาไทยสำหรับ PDF (เอกสารจะเป็นกล่องว่างทั้งหมด)
+from inventory import documents  # noqa: E402
+documents.check_font()
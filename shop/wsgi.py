@@ -13,4 +13,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "shop.settings")
 
 application = get_wsgi_application()
+
+# ไม่เริ่ม server ถ้าไม่มีฟอนต์ภาษาไทยสำหรับ PDF (เอกสารจะเป็นกล่องว่างทั้งหมด)
+from inventory import documents  # noqa: E402
+documents.check_font()
+
 app = application 